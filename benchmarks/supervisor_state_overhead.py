@@ -0,0 +1,102 @@
+"""
+Benchmark: per-node state overhead of the supervisor graph.
+
+Runs MarketingAssetAgent with instant stub services so that only graph and
+state-handling cost is measured, for increasing reference/generated image
+sizes, both without checkpointing and with the default SQLite checkpointing
+(which includes the checkpoint writes). Because nodes return state deltas
+and images are kept out of the checkpoints, the per-node overhead should
+stay flat regardless of image size, and the on-disk size should grow by one
+copy of each distinct image rather than one per checkpoint.
+
+Usage:
+    PYTHONPATH=. python benchmarks/supervisor_state_overhead.py
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from src.agent.supervisor import MarketingAssetAgent
+
+
+NODES_PER_RUN = 6
+RUNS = 50
+IMAGE_SIZES_MB = [0, 1, 8, 32]
+
+
+class StubGemini:
+    """Gemini stand-in that returns immediately."""
+
+    def __init__(self, image: bytes):
+        self.image = image
+
+    async def process_brief(self, brief, client_name):
+        return {"theme": "Benchmark", "mood": "fast"}
+
+    async def analyze_reference_image(self, image_data, mode="hybrid"):
+        return {"lighting": "flat", "style_description": "stub"}
+
+    async def generate_image_prompt(self, brief_data, brand_data, style_data=None, platform="instagram_post"):
+        return "stub prompt"
+
+    async def generate_image(self, prompt, size):
+        return self.image
+
+
+class StubDrive:
+    """Drive stand-in that returns immediately."""
+
+    async def get_brand_assets(self, client_id):
+        return {"name": client_id, "colors": ["#000000"]}
+
+    async def save_generated_image(self, client_id, campaign_name, platform, image_data, filename):
+        return f"memory://{client_id}/{filename}"
+
+
+def _disk_usage(path: str) -> int:
+    """Bytes used by the checkpoint database and its blob directory."""
+    total = os.path.getsize(path) if os.path.exists(path) else 0
+    for root, _, names in os.walk(f"{path}.blobs"):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    return total
+
+
+async def bench(size_mb: int, checkpoint_path: str = None):
+    payload = b"\0" * (size_mb * 1024 * 1024)
+    agent = MarketingAssetAgent(StubGemini(payload or b"\0"), StubDrive(), checkpoint_path=checkpoint_path)
+
+    # Warm up
+    await agent.run("bench", "brief", reference_image=payload or None)
+
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        final_state = await agent.run("bench", "brief", reference_image=payload or None)
+    elapsed = time.perf_counter() - start
+    await agent.aclose()
+
+    per_node_us = elapsed / (RUNS * NODES_PER_RUN) * 1e6
+    line = (
+        f"image={size_mb:>3} MB  per-node={per_node_us:8.1f} us  "
+        f"messages={len(final_state['messages'])}"
+    )
+    if checkpoint_path:
+        line += f"  on-disk={_disk_usage(checkpoint_path) / 1e6:8.1f} MB"
+    print(line)
+
+
+async def main():
+    print(f"{RUNS} runs x {NODES_PER_RUN} nodes per image size")
+
+    print("\nWithout checkpointing")
+    for size_mb in IMAGE_SIZES_MB:
+        await bench(size_mb)
+
+    print("\nDefault SQLite checkpointing")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in IMAGE_SIZES_MB:
+            await bench(size_mb, os.path.join(tmp, f"checkpoints-{size_mb}mb.sqlite3"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,6 @@
 """
 LangGraph Agent module for marketing asset generation.
 """
-from .supervisor import MarketingAssetAgent, AgentState
+from .supervisor import MarketingAssetAgent, AgentState, BatchStats
 
-__all__ = ["MarketingAssetAgent", "AgentState"]
+__all__ = ["MarketingAssetAgent", "AgentState", "BatchStats"]
@@ -0,0 +1,189 @@
+"""
+Checkpoint Blobs - keeps image bytes out of the run checkpoint database.
+
+Every checkpoint stores the full run state, and its metadata the node
+writes that produced it, so a reference image used to be serialized into
+each of a run's checkpoints (and hex-encoded once more in the metadata).
+BlobOffloadSerializer wraps the checkpointer's serializers: bytes values of
+at least BLOB_MIN_BYTES are written once to a content-addressed file store
+and replaced by their SHA-256, and read back when a checkpoint is loaded.
+"""
+from typing import Any, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import os
+import re
+import tempfile
+
+from langgraph.types import Send
+
+
+# Smaller values stay inline in the checkpoint
+BLOB_MIN_BYTES = 64 * 1024
+
+# Recently offloaded values remembered by identity, so the same image object
+# is not re-hashed for every checkpoint of a run
+RECENT_BLOBS = 32
+
+_MARKER = "__checkpoint_blob__"
+
+# A marker as it appears in serialized checkpoints (msgpack) and metadata (JSON)
+_MARKER_PATTERN = re.compile(_MARKER.encode() + rb"\W{1,4}([0-9a-f]{64})")
+
+
+class CheckpointBlobStore:
+    """
+    Content-addressed blobs on the local filesystem.
+
+    Entries live at <blob_dir>/<digest[:2]>/<digest>. Storing a blob that
+    already exists only bumps its mtime, which collect() uses to spare
+    blobs written by checkpoints that are not committed yet.
+    """
+
+    def __init__(self, blob_dir: str):
+        """
+        Initialize the store.
+
+        Args:
+            blob_dir: Directory for the blob files
+        """
+        self.blob_dir = Path(blob_dir)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        """Store a blob (atomically) and return its SHA-256 hex digest (computed if not given)."""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        try:
+            os.utime(path, None)
+            return digest
+        except FileNotFoundError:
+            pass
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Read a blob; raises KeyError if it was collected."""
+        try:
+            return self._path(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(f"Checkpoint blob not found: {digest}")
+
+    def collect(self, referenced: Set[str], older_than: float) -> int:
+        """
+        Delete blobs no checkpoint references any more.
+
+        Args:
+            referenced: Digests still referenced (see referenced_digests())
+            older_than: Only delete blobs last stored before this time.time()
+
+        Returns:
+            Number of blobs deleted
+        """
+        deleted = 0
+        for shard in self.blob_dir.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard):
+                if entry.name in referenced or not entry.is_file():
+                    continue
+                try:
+                    if entry.stat().st_mtime < older_than:
+                        os.unlink(entry.path)
+                        deleted += 1
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+
+def referenced_digests(serialized: Iterable[Optional[bytes]]) -> Set[str]:
+    """Digests of the blobs referenced by raw serialized checkpoints/metadata/writes."""
+    digests = set()
+    for raw in serialized:
+        if raw:
+            digests.update(match.decode() for match in _MARKER_PATTERN.findall(raw))
+    return digests
+
+
+class BlobOffloadSerializer:
+    """
+    Serializer wrapper that moves large bytes values to a CheckpointBlobStore.
+
+    Wraps both the typed (checkpoint, writes) and the plain (metadata)
+    interface of LangGraph serializers.
+    """
+
+    def __init__(self, inner, store: CheckpointBlobStore, min_bytes: int = BLOB_MIN_BYTES):
+        """
+        Initialize the wrapper.
+
+        Args:
+            inner: Serializer to wrap (e.g. JsonPlusSerializer)
+            store: Where large values are written
+            min_bytes: Size from which bytes values are offloaded
+        """
+        self.inner = inner
+        self.store = store
+        self.min_bytes = min_bytes
+        self._recent: "OrderedDict[int, Tuple[bytes, str]]" = OrderedDict()
+
+    def _put(self, value: bytes) -> str:
+        recent = self._recent.get(id(value))
+        if recent is not None and recent[0] is value:
+            self._recent.move_to_end(id(value))
+            return self.store.put(value, recent[1])
+        digest = self.store.put(value)
+        self._recent[id(value)] = (value, digest)
+        if len(self._recent) > RECENT_BLOBS:
+            self._recent.popitem(last=False)
+        return digest
+
+    def _offload(self, value: Any) -> Any:
+        if isinstance(value, bytes) and len(value) >= self.min_bytes:
+            return {_MARKER: self._put(value)}
+        if isinstance(value, dict):
+            return {key: self._offload(item) for key, item in value.items()}
+        if type(value) in (list, tuple):
+            return type(value)(self._offload(item) for item in value)
+        if isinstance(value, Send):
+            return Send(value.node, self._offload(value.arg))
+        return value
+
+    def _restore(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if len(value) == 1 and _MARKER in value:
+                return self.store.get(value[_MARKER])
+            return {key: self._restore(item) for key, item in value.items()}
+        if type(value) in (list, tuple):
+            return type(value)(self._restore(item) for item in value)
+        if isinstance(value, Send):
+            return Send(value.node, self._restore(value.arg))
+        return value
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(self._offload(obj))
+
+    def loads(self, data: bytes) -> Any:
+        return self._restore(self.inner.loads(data))
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        return self.inner.dumps_typed(self._offload(obj))
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        return self._restore(self.inner.loads_typed(data))
@@ -1,20 +1,112 @@
 """
 LangGraph Supervisor Agent for Marketing Asset Generation.
 Implements the supervisor pattern from Auzmor AI Agent principles.
+
+Runs are checkpointed to SQLite (keyed by run id), so a failed run can be
+resumed and any stage can be re-executed without repeating upstream calls.
+Image bytes are kept in a blob directory next to the database, and runs
+untouched for `checkpoint_retention` seconds are pruned.
 """
-from typing import TypedDict, Annotated, Sequence, Literal, Optional
-from langgraph.graph import StateGraph, END
+from typing import TypedDict, Annotated, Sequence, Literal, Optional, List, Dict, Iterable, AsyncIterator, Union
+from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode
+from langgraph.types import Send
+from collections import deque
+from pathlib import Path
+import asyncio
 import operator
+import statistics
+import time
+import uuid
+
+
+def merge_dicts(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Reducer that merges dict updates key by key."""
+    return {**(left or {}), **(right or {})}
+
+
+def keep_error(left: Optional[str], right: Optional[str]) -> Optional[str]:
+    """
+    Reducer for `error`: parallel branches may fail together; the first error wins.
+
+    Nodes only write `error` when they fail, so an explicit None is a reset
+    (e.g. before re-executing a failed run) and clears the stored error.
+    """
+    if right is None:
+        return None
+    return left or right
+
+
+def last_value(left, right):
+    """Reducer that accepts concurrent writes and keeps the latest one."""
+    return right
+
+
+class BatchStats:
+    """Timing statistics aggregated over one arun_many() batch."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.latencies: List[float] = []
+        self.queue_waits: List[float] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.per_client: Dict[str, int] = {}
+
+    def record(self, result: dict):
+        """Add one finished item."""
+        self.latencies.append(result["elapsed"])
+        self.queue_waits.append(result["queued"])
+        if result["error"]:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+        client_id = result["client_id"]
+        self.per_client[client_id] = self.per_client.get(client_id, 0) + 1
+
+    def summary(self) -> dict:
+        """
+        Summarize the batch.
+
+        Returns:
+            Dict with counts, wall time, summed item time and latency percentiles (seconds)
+        """
+        wall = (self.finished_at or time.perf_counter()) - self.started_at
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))]
+
+        total = sum(latencies)
+        return {
+            "items": len(latencies),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "wall_seconds": round(wall, 3),
+            "sum_item_seconds": round(total, 3),
+            "speedup": round(total / wall, 2) if wall > 0 else 0.0,
+            "latency_p50": round(percentile(0.5), 3),
+            "latency_p95": round(percentile(0.95), 3),
+            "latency_max": round(latencies[-1], 3) if latencies else 0.0,
+            "latency_mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "queue_wait_max": round(max(self.queue_waits), 3) if self.queue_waits else 0.0,
+            "per_client": dict(self.per_client),
+        }
 
 
 class AgentState(TypedDict):
     """State passed between agent nodes."""
     # Input
+    run_id: Optional[str]
     client_id: str
     brief: str
     platform: str
+    platforms: Optional[List[str]]
     reference_image: Optional[bytes]
+    style_mode: Optional[str]
 
     # Processed data
     brief_data: Optional[dict]
@@ -25,11 +117,15 @@ class AgentState(TypedDict):
     # Output
     generated_image: Optional[bytes]
     saved_path: Optional[str]
-    error: Optional[str]
+    assets: Annotated[List[dict], operator.add]
+    saved_paths: Annotated[dict, merge_dicts]
+    platform_errors: Annotated[dict, merge_dicts]
+    error: Annotated[Optional[str], keep_error]
 
     # Workflow control
     messages: Annotated[Sequence[str], operator.add]
-    next_step: str
+    next_step: Annotated[str, last_value]
+    attempts: Annotated[dict, merge_dicts]
 
 
 class MarketingAssetAgent:
@@ -40,47 +136,298 @@ class MarketingAssetAgent:
     1. Brief Processor - Parse and structure the campaign brief
     2. Brand Retriever - Fetch brand assets from Google Drive
     3. Reference Analyzer - Extract style from reference image (optional)
-    4. Image Generator - Create the final marketing image
-    5. Output Manager - Save to Google Drive
+    4. Prompt Builder - Combine brief, brand and style (joins 1-3)
+    5. Image Generator - Create the final marketing image (one branch per platform)
+    6. Output Manager - Save to Google Drive
+
+    Steps 1-3 are independent and run in parallel. With several target
+    platforms, image generation fans out into one branch per platform; a
+    platform that fails is reported in `platform_errors` and the others are
+    still saved.
+
+    A node that sets `error` is retried while it has retry budget left;
+    after that the run goes straight to END instead of calling downstream
+    models with incomplete data.
     """
 
-    def __init__(self, gemini_service, drive_service):
+    NODES = (
+        "brief_processor",
+        "brand_retriever",
+        "reference_analyzer",
+        "prompt_builder",
+        "image_generator",
+        "output_manager",
+    )
+
+    # Retries allowed per node after its first failed attempt
+    DEFAULT_RETRY_BUDGET = {
+        "brief_processor": 1,
+        "brand_retriever": 1,
+        "prompt_builder": 0,
+        "image_generator": 1,
+        "output_manager": 1,
+    }
+
+    # Seconds between automatic checkpoint prunes
+    PRUNE_INTERVAL = 3600
+
+    def __init__(
+        self,
+        gemini_service,
+        drive_service,
+        checkpoint_path: Optional[str] = "./.cache/agent_checkpoints.sqlite3",
+        retry_budget: Optional[dict] = None,
+        checkpoint_retention: Optional[float] = 7 * 24 * 3600
+    ):
         """
         Initialize the agent with required services.
 
         Args:
             gemini_service: GeminiService instance
             drive_service: DriveService instance
+            checkpoint_path: SQLite path for run checkpoints (None disables resume/regenerate)
+            retry_budget: Retries per node name (defaults to DEFAULT_RETRY_BUDGET)
+            checkpoint_retention: Seconds a run stays resumable after it was last
+                run, resumed or regenerated (None keeps runs forever)
         """
         self.gemini = gemini_service
         self.drive = drive_service
-        self.graph = self._build_graph()
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_retention = checkpoint_retention
+        self.retry_budget = {**self.DEFAULT_RETRY_BUDGET, **(retry_budget or {})}
+        self.workflow = self._build_graph()
+        self.graph = self.workflow.compile()
+
+        # Checkpointed graph is compiled lazily: the saver needs a running event loop
+        self._checkpointer = None
+        self._checkpointed_graph = None
+        self._blob_store = None
+        self._pruned_at: Optional[float] = None
+        self._graph_lock = asyncio.Lock()
+        self.last_batch_stats: Optional[BatchStats] = None
 
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow."""
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("brief_processor", self._process_brief)
-        workflow.add_node("brand_retriever", self._retrieve_brand)
-        workflow.add_node("reference_analyzer", self._analyze_reference)
-        workflow.add_node("prompt_builder", self._build_prompt)
-        workflow.add_node("image_generator", self._generate_image)
-        workflow.add_node("output_manager", self._save_output)
-
-        # Define edges
-        workflow.set_entry_point("brief_processor")
-
-        workflow.add_edge("brief_processor", "brand_retriever")
-        workflow.add_edge("brand_retriever", "reference_analyzer")
-        workflow.add_edge("reference_analyzer", "prompt_builder")
-        workflow.add_edge("prompt_builder", "image_generator")
-        workflow.add_edge("image_generator", "output_manager")
+        for node, node_fn in [
+            ("brief_processor", self._process_brief),
+            ("brand_retriever", self._retrieve_brand),
+            ("reference_analyzer", self._analyze_reference),
+            ("prompt_builder", self._build_prompt),
+            ("image_generator", self._generate_image),
+            ("output_manager", self._save_output),
+        ]:
+            workflow.add_node(node, self._tracked(node, node_fn))
+
+        # Fan out the independent context branches and join at prompt_builder
+        branches = ["brief_processor", "brand_retriever", "reference_analyzer"]
+        for branch in branches:
+            workflow.add_edge(START, branch)
+        workflow.add_edge(branches, "prompt_builder")
+
+        # Then fan out per platform, stopping early on any error
+        workflow.add_conditional_edges(
+            "prompt_builder",
+            self._fan_out_platforms,
+            ["image_generator", END]
+        )
+        workflow.add_conditional_edges(
+            "image_generator",
+            self._route_after("output_manager"),
+            ["output_manager", END]
+        )
         workflow.add_edge("output_manager", END)
 
-        return workflow.compile()
+        return workflow
+
+    def _tracked(self, name: str, node_fn):
+        """
+        Wrap a node with error short-circuiting and its retry budget.
+
+        A node reached after an upstream error (e.g. at the branch join) is
+        skipped. A failing node is retried in place up to its budget, so
+        only the final failure is written to `error` (or, for a fan-out
+        image_generator branch, to `platform_errors`).
+        """
+        async def run_node(state: AgentState) -> dict:
+            if state.get("error"):
+                return {"messages": [f"Skipping {name} after error"]}
+
+            attempt = (state.get("attempts") or {}).get(name, 0)
+            retry_messages = []
+            # Platforms a failed attempt did save; the retry only saves the rest
+            carried_paths = {}
+            while True:
+                attempt += 1
+                if carried_paths:
+                    state = {**state, "saved_paths": merge_dicts(state.get("saved_paths"), carried_paths)}
+                delta = await node_fn(state)
+                if not delta.get("error") or attempt > self.retry_budget.get(name, 0):
+                    break
+                carried_paths.update(delta.get("saved_paths") or {})
+                retry_messages += list(delta.get("messages", [])) + [f"Retrying {name} (attempt {attempt + 1})"]
+
+            if carried_paths:
+                delta["saved_paths"] = merge_dicts(carried_paths, delta.get("saved_paths"))
+
+            if delta.get("error") and name == "image_generator" and len(state.get("platforms") or []) > 1:
+                # One platform failing must not cost the others their output
+                delta["platform_errors"] = {state["platform"]: delta.pop("error")}
+
+            delta["messages"] = retry_messages + list(delta.get("messages", []))
+            delta["attempts"] = {name: attempt}
+            return delta
+
+        return run_node
+
+    def _route_after(self, next_node: str):
+        """Build a router that continues to next_node unless the run failed."""
+        def route(state: AgentState) -> str:
+            return END if state.get("error") else next_node
+
+        return route
+
+    def _fan_out_platforms(self, state: AgentState):
+        """Route to one image_generator branch per target platform."""
+        if state.get("error"):
+            return END
+
+        platforms = state.get("platforms") or []
+        if len(platforms) <= 1:
+            return "image_generator"
+        return [Send("image_generator", {**state, "platform": platform}) for platform in platforms]
+
+    async def _get_graph(self):
+        """Return the compiled graph, with SQLite checkpointing if configured."""
+        if not self.checkpoint_path:
+            return self.graph
+
+        async with self._graph_lock:
+            if self._checkpointed_graph is None:
+                import aiosqlite
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+                from .checkpoint_blobs import BlobOffloadSerializer, CheckpointBlobStore
+
+                if self.checkpoint_path != ":memory:":
+                    Path(self.checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+                conn = aiosqlite.connect(self.checkpoint_path)
+                conn.daemon = True  # don't block interpreter exit if aclose() is skipped
+                self._checkpointer = AsyncSqliteSaver(conn)
+
+                # Keep image bytes out of the database: each checkpoint holds
+                # the full state, so they would be written once per checkpoint
+                if self.checkpoint_path != ":memory:":
+                    self._blob_store = CheckpointBlobStore(f"{self.checkpoint_path}.blobs")
+                    self._checkpointer.serde = BlobOffloadSerializer(self._checkpointer.serde, self._blob_store)
+                    self._checkpointer.jsonplus_serde = BlobOffloadSerializer(
+                        self._checkpointer.jsonplus_serde, self._blob_store
+                    )
+
+                await self._checkpointer.setup()
+                async with self._checkpointer.lock:
+                    await conn.execute(
+                        "CREATE TABLE IF NOT EXISTS agent_runs (run_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+                    )
+                    await conn.commit()
+                self._checkpointed_graph = self.workflow.compile(checkpointer=self._checkpointer)
+
+        return self._checkpointed_graph
+
+    async def _require_checkpoints(self):
+        """Return the checkpointed graph, failing clearly if checkpointing is off."""
+        if not self.checkpoint_path:
+            raise RuntimeError("Checkpointing is disabled (checkpoint_path=None)")
+        return await self._get_graph()
+
+    @staticmethod
+    def _run_config(run_id: str) -> dict:
+        """LangGraph config addressing a run's checkpoint thread."""
+        return {"configurable": {"thread_id": run_id}}
+
+    async def _touch_run(self, run_id: str):
+        """Record activity on a run, which restarts its retention period."""
+        if self._checkpointer is None:
+            return
+        async with self._checkpointer.lock:
+            await self._checkpointer.conn.execute(
+                "INSERT OR REPLACE INTO agent_runs (run_id, updated_at) VALUES (?, ?)",
+                (run_id, time.time())
+            )
+            await self._checkpointer.conn.commit()
+
+    async def prune_checkpoints(self, retention: Optional[float] = None) -> int:
+        """
+        Delete the checkpoints of runs untouched for longer than `retention`.
+
+        Blobs that no remaining checkpoint references are deleted too.
+
+        Args:
+            retention: Seconds to keep runs (defaults to checkpoint_retention)
+
+        Returns:
+            Number of runs deleted
+        """
+        retention = self.checkpoint_retention if retention is None else retention
+        if not self.checkpoint_path or retention is None:
+            return 0
+
+        from .checkpoint_blobs import referenced_digests
+
+        await self._get_graph()
+        conn = self._checkpointer.conn
+        cutoff = time.time() - retention
+        async with self._checkpointer.lock:
+            # Threads without an agent_runs row predate run tracking
+            async with conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id NOT IN "
+                "(SELECT run_id FROM agent_runs WHERE updated_at >= ?)",
+                (cutoff,)
+            ) as cursor:
+                expired = [row[0] for row in await cursor.fetchall()]
+            for run_id in expired:
+                await conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (run_id,))
+                await conn.execute("DELETE FROM writes WHERE thread_id = ?", (run_id,))
+            await conn.execute("DELETE FROM agent_runs WHERE updated_at < ?", (cutoff,))
+            await conn.commit()
+
+            if self._blob_store is not None:
+                async with conn.execute("SELECT checkpoint, metadata FROM checkpoints") as cursor:
+                    referenced = referenced_digests(raw for row in await cursor.fetchall() for raw in row)
+                async with conn.execute("SELECT value FROM writes") as cursor:
+                    referenced |= referenced_digests(row[0] for row in await cursor.fetchall())
+
+        if self._blob_store is not None:
+            # Blobs stored after the cutoff may belong to checkpoints being written
+            await asyncio.to_thread(self._blob_store.collect, referenced, cutoff)
+        return len(expired)
+
+    async def _maybe_prune(self):
+        """Prune expired runs at most once per PRUNE_INTERVAL."""
+        if not self.checkpoint_path or self.checkpoint_retention is None:
+            return
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        try:
+            await self.prune_checkpoints()
+        except Exception as e:
+            print(f"Checkpoint pruning failed: {e}")
+
+    async def aclose(self):
+        """Close the checkpoint database connection."""
+        if self._checkpointer is not None:
+            await self._checkpointer.conn.close()
+            self._checkpointer = None
+            self._checkpointed_graph = None
 
-    async def _process_brief(self, state: AgentState) -> AgentState:
+    # Nodes return only the keys they change. LangGraph merges the delta into
+    # the state (appending `messages` via its operator.add reducer), so large
+    # fields like reference_image/generated_image are never copied per hop.
+
+    async def _process_brief(self, state: AgentState) -> dict:
         """Process the campaign brief and extract structured data."""
         try:
             brief_data = await self.gemini.process_brief(
@@ -88,85 +435,79 @@ class MarketingAssetAgent:
                 state.get("client_id", "Unknown")
             )
             return {
-                **state,
                 "brief_data": brief_data,
-                "messages": state.get("messages", []) + ["Brief processed successfully"],
+                "messages": ["Brief processed successfully"],
                 "next_step": "brand_retriever"
             }
         except Exception as e:
             return {
-                **state,
                 "error": f"Brief processing failed: {str(e)}",
-                "messages": state.get("messages", []) + [f"Error: {str(e)}"]
+                "messages": [f"Error: {str(e)}"]
             }
 
-    async def _retrieve_brand(self, state: AgentState) -> AgentState:
+    async def _retrieve_brand(self, state: AgentState) -> dict:
         """Retrieve brand assets from Google Drive."""
         try:
             brand_data = await self.drive.get_brand_assets(state["client_id"])
             return {
-                **state,
                 "brand_data": brand_data,
-                "messages": state.get("messages", []) + [f"Brand assets retrieved for {brand_data.get('name', state['client_id'])}"],
+                "messages": [f"Brand assets retrieved for {brand_data.get('name', state['client_id'])}"],
                 "next_step": "reference_analyzer"
             }
         except Exception as e:
             return {
-                **state,
                 "error": f"Brand retrieval failed: {str(e)}",
-                "messages": state.get("messages", []) + [f"Error: {str(e)}"]
+                "messages": [f"Error: {str(e)}"]
             }
 
-    async def _analyze_reference(self, state: AgentState) -> AgentState:
+    async def _analyze_reference(self, state: AgentState) -> dict:
         """Analyze reference image if provided."""
         if not state.get("reference_image"):
             return {
-                **state,
                 "style_data": None,
-                "messages": state.get("messages", []) + ["No reference image provided, skipping style analysis"],
+                "messages": ["No reference image provided, skipping style analysis"],
                 "next_step": "prompt_builder"
             }
 
         try:
-            style_data = await self.gemini.analyze_reference_image(state["reference_image"])
+            style_data = await self.gemini.analyze_reference_image(
+                state["reference_image"],
+                mode=state.get("style_mode") or "hybrid"
+            )
             return {
-                **state,
                 "style_data": style_data,
-                "messages": state.get("messages", []) + ["Reference image analyzed successfully"],
+                "messages": [f"Reference image analyzed successfully ({style_data.get('analysis', 'hybrid')})"],
                 "next_step": "prompt_builder"
             }
         except Exception as e:
             return {
-                **state,
                 "style_data": None,
-                "messages": state.get("messages", []) + [f"Reference analysis failed (continuing without): {str(e)}"],
+                "messages": [f"Reference analysis failed (continuing without): {str(e)}"],
                 "next_step": "prompt_builder"
             }
 
-    async def _build_prompt(self, state: AgentState) -> AgentState:
+    async def _build_prompt(self, state: AgentState) -> dict:
         """Build the optimized image generation prompt."""
         try:
             image_prompt = await self.gemini.generate_image_prompt(
-                brief_data=state.get("brief_data", {}),
-                brand_data=state.get("brand_data", {}),
+                brief_data=state.get("brief_data") or {},
+                brand_data=state.get("brand_data") or {},
                 style_data=state.get("style_data"),
                 platform=state.get("platform", "instagram_post")
             )
             return {
-                **state,
                 "image_prompt": image_prompt,
-                "messages": state.get("messages", []) + ["Image prompt generated"],
+                "messages": ["Image prompt generated"],
                 "next_step": "image_generator"
             }
         except Exception as e:
             return {
-                **state,
                 "error": f"Prompt building failed: {str(e)}",
-                "messages": state.get("messages", []) + [f"Error: {str(e)}"]
+                "messages": [f"Error: {str(e)}"]
             }
 
-    async def _generate_image(self, state: AgentState) -> AgentState:
-        """Generate the marketing image."""
+    async def _generate_image(self, state: AgentState) -> dict:
+        """Generate the marketing image for this branch's platform."""
         from ..config import PLATFORM_SIZES
 
         try:
@@ -179,61 +520,98 @@ class MarketingAssetAgent:
             )
 
             if generated_image:
-                return {
-                    **state,
-                    "generated_image": generated_image,
-                    "messages": state.get("messages", []) + ["Image generated successfully"],
+                delta = {
+                    "assets": [{"platform": platform, "image": generated_image}],
+                    "messages": [f"Image generated successfully ({platform})"],
                     "next_step": "output_manager"
                 }
+                # generated_image holds the single-platform result; fan-out
+                # branches only contribute to `assets`
+                if len(state.get("platforms") or []) <= 1:
+                    delta["generated_image"] = generated_image
+                return delta
             else:
                 return {
-                    **state,
                     "error": "Image generation returned None",
-                    "messages": state.get("messages", []) + ["Image generation failed"]
+                    "messages": ["Image generation failed"]
                 }
         except Exception as e:
             return {
-                **state,
                 "error": f"Image generation failed: {str(e)}",
-                "messages": state.get("messages", []) + [f"Error: {str(e)}"]
+                "messages": [f"Error: {str(e)}"]
             }
 
-    async def _save_output(self, state: AgentState) -> AgentState:
-        """Save the generated image to Google Drive."""
-        if not state.get("generated_image"):
-            return {
-                **state,
-                "messages": state.get("messages", []) + ["No image to save"]
-            }
+    async def _save_output(self, state: AgentState) -> dict:
+        """
+        Save the generated image(s) to Google Drive, one upload per platform in parallel.
+
+        Platforms already in `saved_paths` (saved by an earlier attempt) are
+        skipped, so a retry does not upload duplicates.
+        """
+        assets = state.get("assets") or []
+        if not assets and state.get("generated_image"):
+            assets = [{"platform": state.get("platform", "instagram_post"), "image": state["generated_image"]}]
+        already_saved = state.get("saved_paths") or {}
+
+        platform_errors = state.get("platform_errors") or {}
+        failed_messages = [f"Not saved ({platform}): {error}" for platform, error in platform_errors.items()]
+        if not assets:
+            if platform_errors:
+                return {
+                    "error": f"Image generation failed for all platforms: {', '.join(platform_errors)}",
+                    "messages": failed_messages
+                }
+            return {"messages": ["No image to save"]}
 
         try:
             # Generate filename
             import datetime
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            theme = state.get("brief_data", {}).get("theme", "campaign")
+            theme = (state.get("brief_data") or {}).get("theme", "campaign")
             filename = f"{theme.lower().replace(' ', '-')}_{timestamp}.png"
 
             # Get campaign name from brief
-            campaign_name = state.get("brief_data", {}).get("theme", "campaign").lower().replace(" ", "-")
-
-            saved_path = await self.drive.save_generated_image(
-                client_id=state["client_id"],
-                campaign_name=campaign_name,
-                platform=state.get("platform", "instagram_post"),
-                image_data=state["generated_image"],
-                filename=filename
-            )
-
-            return {
-                **state,
-                "saved_path": saved_path,
-                "messages": state.get("messages", []) + [f"Image saved to: {saved_path}"]
+            campaign_name = theme.lower().replace(" ", "-")
+
+            pending = [asset for asset in assets if asset["platform"] not in already_saved]
+            results = await asyncio.gather(*[
+                self.drive.save_generated_image(
+                    client_id=state["client_id"],
+                    campaign_name=campaign_name,
+                    platform=asset["platform"],
+                    image_data=asset["image"],
+                    filename=filename
+                )
+                for asset in pending
+            ], return_exceptions=True)
+
+            saved_paths = {}
+            save_errors = {}
+            for asset, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    save_errors[asset["platform"]] = str(result)
+                else:
+                    saved_paths[asset["platform"]] = result
+
+            all_paths = {**already_saved, **saved_paths}
+            delta = {
+                "saved_paths": saved_paths,
+                "messages": [f"Image saved to: {path}" for path in saved_paths.values()] + failed_messages
             }
+            first_path = next((all_paths[a["platform"]] for a in assets if a["platform"] in all_paths), None)
+            if first_path:
+                delta["saved_path"] = first_path
+            if save_errors:
+                # Keep the saved platforms in the delta so a retry skips them
+                delta["error"] = "Save failed: " + "; ".join(
+                    f"{platform}: {error}" for platform, error in save_errors.items()
+                )
+                delta["messages"] += [f"Error ({platform}): {error}" for platform, error in save_errors.items()]
+            return delta
         except Exception as e:
             return {
-                **state,
                 "error": f"Save failed: {str(e)}",
-                "messages": state.get("messages", []) + [f"Error: {str(e)}"]
+                "messages": [f"Error: {str(e)}"]
             }
 
     async def run(
@@ -241,7 +619,10 @@ class MarketingAssetAgent:
         client_id: str,
         brief: str,
         platform: str = "instagram_post",
-        reference_image: Optional[bytes] = None
+        reference_image: Optional[bytes] = None,
+        run_id: Optional[str] = None,
+        platforms: Optional[List[str]] = None,
+        style_mode: Optional[str] = None
     ) -> dict:
         """
         Run the full marketing asset generation workflow.
@@ -251,26 +632,264 @@ class MarketingAssetAgent:
             brief: Campaign brief text
             platform: Target platform
             reference_image: Optional reference image bytes
+            run_id: Checkpoint key for this run (generated if omitted)
+            platforms: Several target platforms to generate in parallel
+                (results in `assets` / `saved_paths`, failures in `platform_errors`)
+            style_mode: Reference analysis mode, "hybrid" (default) or "local"
+                (measured locally, no vision-model call)
 
         Returns:
-            Final state with generated image and metadata
+            Final state with generated image and metadata (including run_id)
         """
+        run_id = run_id or uuid.uuid4().hex
         initial_state: AgentState = {
+            "run_id": run_id,
             "client_id": client_id,
             "brief": brief,
-            "platform": platform,
+            "platform": platforms[0] if platforms else platform,
+            "platforms": platforms,
             "reference_image": reference_image,
+            "style_mode": style_mode,
             "brief_data": None,
             "brand_data": None,
             "style_data": None,
             "image_prompt": None,
             "generated_image": None,
             "saved_path": None,
+            "assets": [],
+            "saved_paths": {},
+            "platform_errors": {},
             "error": None,
             "messages": ["Starting marketing asset generation workflow"],
-            "next_step": "brief_processor"
+            "next_step": "brief_processor",
+            "attempts": {}
         }
 
         # Run the graph
-        final_state = await self.graph.ainvoke(initial_state)
+        graph = await self._get_graph()
+        await self._touch_run(run_id)
+        final_state = await graph.ainvoke(initial_state, self._run_config(run_id))
+        await self._maybe_prune()
+        return final_state
+
+    async def resume(self, run_id: str) -> dict:
+        """
+        Resume a checkpointed run.
+
+        An interrupted run continues from its next pending node. A run that
+        completed with an error is re-executed from the first node that
+        failed; everything upstream of it is reused from the checkpoint. A
+        fan-out run in which every platform failed is re-executed from
+        image generation.
+
+        Args:
+            run_id: Run id returned in the state of run()
+
+        Returns:
+            Final state of the resumed run
+        """
+        graph = await self._require_checkpoints()
+        config = self._run_config(run_id)
+
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            raise KeyError(f"Unknown run: {run_id}")
+        await self._touch_run(run_id)
+
+        if snapshot.next:
+            return await graph.ainvoke(None, config)
+        if not snapshot.values.get("error"):
+            return snapshot.values
+        if snapshot.values.get("platform_errors") and not snapshot.values.get("assets"):
+            # Every platform failed; output_manager only reported it
+            return await self.regenerate_from(run_id, "image_generator")
+
+        # History is newest-first: the latest error write is the one that ended the run
+        async for past in graph.aget_state_history(config):
+            for node, delta in (past.metadata.get("writes") or {}).items():
+                if isinstance(delta, dict) and delta.get("error"):
+                    # Platforms output_manager did save are not uploaded again
+                    updates = {"saved_paths": snapshot.values.get("saved_paths")} if node == "output_manager" else None
+                    return await self.regenerate_from(run_id, node, updates)
+
+        return snapshot.values
+
+    async def regenerate_from(
+        self,
+        run_id: str,
+        node: str,
+        updates: Optional[dict] = None
+    ) -> dict:
+        """
+        Re-execute a run from a chosen node, reusing all upstream results.
+
+        Forks the run's checkpoint taken just before `node` ran, so e.g.
+        regenerating from "image_generator" reuses the saved image_prompt and
+        skips the brief/reference LLM calls entirely.
+
+        Args:
+            run_id: Run id returned in the state of run()
+            node: Node to re-execute from (see NODES)
+            updates: Optional state overrides applied before re-executing
+
+        Returns:
+            Final state of the re-executed run
+        """
+        if node not in self.NODES:
+            raise ValueError(f"Unknown node: {node}")
+
+        graph = await self._require_checkpoints()
+        config = self._run_config(run_id)
+
+        # Latest checkpoint where `node` is about to run, skipping retry
+        # checkpoints (which `node` wrote itself)
+        target = None
+        writers = set()
+        async for past in graph.aget_state_history(config):
+            writers = set(past.metadata.get("writes") or {})
+            if node in past.next and node not in writers:
+                target = past
+                break
+        if target is None:
+            raise KeyError(f"Run {run_id} has no checkpoint before {node}")
+        await self._touch_run(run_id)
+
+        # Apply the update as the node that produced the checkpoint, so its
+        # outgoing edge leads back to `node`
+        writer = next((w for w in writers if w in self.NODES), None)
+        fork_config = await graph.aupdate_state(
+            target.config,
+            {
+                "error": None,
+                "attempts": {node: 0},  # fresh retry budget
+                "messages": [f"Re-executing from {node}"],
+                **(updates or {})
+            },
+            as_node=writer
+        )
+        final_state = await graph.ainvoke(None, fork_config)
+        # A cleared channel is omitted from the output; keep the key for callers
+        final_state.setdefault("error", None)
         return final_state
+
+    async def regenerate_image(self, run_id: str, image_prompt: Optional[str] = None) -> dict:
+        """
+        Generate a new image for a run ("same prompt, new image").
+
+        Args:
+            run_id: Run id returned in the state of run()
+            image_prompt: Optional replacement for the saved prompt
+
+        Returns:
+            Final state with the newly generated image
+        """
+        updates = {"image_prompt": image_prompt} if image_prompt else None
+        return await self.regenerate_from(run_id, "image_generator", updates)
+
+    async def arun_many(
+        self,
+        jobs: Iterable[Union[dict, tuple]],
+        concurrency: int = 8,
+        per_client_limit: Optional[int] = None,
+        stats: Optional[BatchStats] = None,
+        style_mode: Optional[str] = "local"
+    ) -> AsyncIterator[dict]:
+        """
+        Run many briefs concurrently, yielding results as they complete.
+
+        Jobs are dicts with run() keyword arguments (client_id, brief and
+        optionally platform, platforms, reference_image, run_id, style_mode),
+        or tuples of (client_id, brief[, platform[, reference_image]]).
+        Clients are served round-robin and each may hold at most `per_client_limit`
+        slots while other clients have queued work, so one client's large
+        calendar cannot starve the others; slots nobody else can use are
+        not left idle.
+
+        Args:
+            jobs: Inputs to run
+            concurrency: Maximum runs in flight
+            per_client_limit: Maximum in-flight runs per client while other
+                clients are waiting (defaults to half of `concurrency`, at least 1)
+            stats: Optional BatchStats to aggregate into (also kept on
+                `self.last_batch_stats`)
+            style_mode: Reference analysis mode for jobs that do not set one;
+                batches default to "local" so references cost no model call
+
+        Yields:
+            Dicts with index (position in `jobs`), client_id, run_id,
+            state (final state or None), error, elapsed and queued seconds
+        """
+        concurrency = max(1, concurrency)
+        per_client_limit = max(1, per_client_limit or concurrency // 2)
+        stats = stats or BatchStats()
+        self.last_batch_stats = stats
+
+        # Per-client FIFO queues, visited round-robin in first-seen order
+        queues: Dict[str, deque] = {}
+        for index, job in enumerate(jobs):
+            if not isinstance(job, dict):
+                job = dict(zip(("client_id", "brief", "platform", "reference_image"), job))
+            job = {
+                "style_mode": style_mode,
+                **job,
+                "run_id": job.get("run_id") or uuid.uuid4().hex
+            }
+            queues.setdefault(job["client_id"], deque()).append((index, job))
+        rotation = deque(queues)
+        active: Dict[str, int] = {client_id: 0 for client_id in queues}
+
+        def next_job():
+            for _ in range(len(rotation)):
+                client_id = rotation[0]
+                rotation.rotate(-1)
+                if queues[client_id] and active[client_id] < per_client_limit:
+                    return queues[client_id].popleft()
+            # Everyone with queued work is at the cap: the cap only exists to
+            # protect other clients, so let the one next in turn go over it
+            for _ in range(len(rotation)):
+                client_id = rotation[0]
+                rotation.rotate(-1)
+                if queues[client_id]:
+                    return queues[client_id].popleft()
+            return None
+
+        async def run_job(index: int, job: dict) -> dict:
+            started = time.perf_counter()
+            try:
+                state = await self.run(**job)
+                error = state.get("error")
+            except Exception as e:
+                state, error = None, str(e)
+            return {
+                "index": index,
+                "client_id": job["client_id"],
+                "run_id": job["run_id"],
+                "state": state,
+                "error": error,
+                "elapsed": time.perf_counter() - started,
+                "queued": started - stats.started_at,
+            }
+
+        pending = set()
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    picked = next_job()
+                    if picked is None:
+                        break
+                    index, job = picked
+                    active[job["client_id"]] += 1
+                    pending.add(asyncio.create_task(run_job(index, job)))
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    active[result["client_id"]] -= 1
+                    stats.record(result)
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            stats.finished_at = time.perf_counter()
@@ -13,6 +13,8 @@ from pydantic import BaseModel
 from typing import Optional, List
 import os
 import io
+import json
+import asyncio
 import base64
 from datetime import datetime
 
@@ -53,15 +55,40 @@ class GenerateRequest(BaseModel):
     brief: str
     platform: str = "instagram_post"
     reference_image_base64: Optional[str] = None
+    text_mode: str = "model"  # "local": text-free background + locally rendered copy
+    candidates: int = 1  # >1: generate concurrently and rank locally
+    reuse_threshold: Optional[float] = None  # Return an existing asset scoring at least this (0-1)
+    latency_budget: Optional[float] = None  # Seconds per brief/reference model call; prefers smaller models
+
+
+class BriefRequest(BaseModel):
+    """Request model for streamed brief analysis."""
+    client_id: str
+    brief: str
+    latency_budget: Optional[float] = None
+
+
+class CandidateResponse(BaseModel):
+    """One ranked generation candidate."""
+    image_base64: str
+    background_base64: Optional[str] = None
+    score: float
+    metrics: dict
+    quality_gate: Optional[dict] = None
 
 
 class GenerateResponse(BaseModel):
     """Response model for asset generation."""
     success: bool
     image_base64: Optional[str] = None
+    background_base64: Optional[str] = None  # Text-free image (text_mode="local" only)
     saved_path: Optional[str] = None
     brief_data: Optional[dict] = None
     prompt_used: Optional[str] = None
+    candidates: Optional[List[CandidateResponse]] = None  # Best first (candidates > 1)
+    quality_gate: Optional[dict] = None  # Local checks on the returned image, plus every attempt
+    similar_assets: Optional[List[dict]] = None  # Close matches among previously generated assets
+    reused_asset: Optional[dict] = None  # Set when an existing asset was returned instead of generating
     messages: List[str] = []
     error: Optional[str] = None
 
@@ -93,21 +120,55 @@ async def startup_event():
     try:
         settings = get_settings()
         api_key = settings.google_api_key
+        reference_max_edge = settings.reference_max_edge
+        style_mode = settings.style_analysis_mode
+        gate_retries = settings.quality_gate_retries
+        single_flight_exclude = settings.single_flight_exclude
+        brief_cache_threshold = settings.brief_cache_threshold
+        model_tiers = settings.model_tiers
+        brief_rules_confidence = settings.brief_rules_confidence
     except Exception:
         # Fallback to environment variable
         api_key = os.getenv("GOOGLE_API_KEY", "")
+        reference_max_edge = int(os.getenv("REFERENCE_MAX_EDGE", "1024"))
+        style_mode = os.getenv("STYLE_ANALYSIS_MODE", "hybrid")
+        gate_retries = int(os.getenv("QUALITY_GATE_RETRIES", "1"))
+        single_flight_exclude = os.getenv("SINGLE_FLIGHT_EXCLUDE", "")
+        brief_cache_threshold = os.getenv("BRIEF_CACHE_THRESHOLD", "0.9")
+        brief_cache_threshold = float(brief_cache_threshold) if brief_cache_threshold else None
+        model_tiers = os.getenv("MODEL_TIERS", "gemini-2.0-flash-lite,gemini-2.0-flash-exp")
+        brief_rules_confidence = os.getenv("BRIEF_RULES_MIN_CONFIDENCE", "0.7")
+        brief_rules_confidence = float(brief_rules_confidence) if brief_rules_confidence else None
 
     # Initialize MCP servers
     drive_mcp = DriveMCPServer(mock_mode=True)  # Start in mock mode
+    drive_mcp.start_background_sync()
 
     if api_key:
-        media_mcp = MediaMCPServer(api_key=api_key)
+        media_mcp = MediaMCPServer(
+            api_key=api_key,
+            reference_max_edge=reference_max_edge,
+            platform_sizes=PLATFORM_SIZES,
+            style_mode=style_mode,
+            gate_retries=gate_retries,
+            single_flight={tool.strip(): False for tool in single_flight_exclude.split(",") if tool.strip()},
+            brief_cache_threshold=brief_cache_threshold,
+            model_tiers=[model.strip() for model in model_tiers.split(",") if model.strip()],
+            brief_rules_confidence=brief_rules_confidence
+        )
         print("Media MCP Server initialized with API key")
     else:
         media_mcp = None
         print("Warning: No GOOGLE_API_KEY found, media generation disabled")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work on shutdown."""
+    if drive_mcp:
+        drive_mcp.stop_background_sync()
+
+
 # ==================== ENDPOINTS ====================
 
 @app.get("/")
@@ -122,12 +183,12 @@ async def root():
 
 
 @app.get("/api/clients", response_model=List[ClientResponse])
-async def list_clients():
+async def list_clients(refresh: bool = False):
     """Get list of available clients."""
     if not drive_mcp:
         raise HTTPException(status_code=500, detail="Drive service not initialized")
 
-    result = await drive_mcp.call_tool("list_clients")
+    result = await drive_mcp.call_tool("list_clients", force_refresh=refresh)
     if not result.success:
         raise HTTPException(status_code=500, detail=result.error)
 
@@ -135,12 +196,12 @@ async def list_clients():
 
 
 @app.get("/api/clients/{client_id}/brand")
-async def get_brand(client_id: str):
+async def get_brand(client_id: str, refresh: bool = False):
     """Get brand assets for a client."""
     if not drive_mcp:
         raise HTTPException(status_code=500, detail="Drive service not initialized")
 
-    result = await drive_mcp.call_tool("get_brand_assets", client_id=client_id)
+    result = await drive_mcp.call_tool("get_brand_assets", client_id=client_id, force_refresh=refresh)
     if not result.success:
         raise HTTPException(status_code=500, detail=result.error)
 
@@ -148,18 +209,40 @@ async def get_brand(client_id: str):
 
 
 @app.get("/api/clients/{client_id}/campaigns")
-async def get_campaigns(client_id: str):
+async def get_campaigns(client_id: str, refresh: bool = False):
     """Get past campaigns for a client."""
     if not drive_mcp:
         raise HTTPException(status_code=500, detail="Drive service not initialized")
 
-    result = await drive_mcp.call_tool("get_past_campaigns", client_id=client_id)
+    result = await drive_mcp.call_tool("get_past_campaigns", client_id=client_id, force_refresh=refresh)
     if not result.success:
         raise HTTPException(status_code=500, detail=result.error)
 
     return result.data
 
 
+@app.get("/api/drive/status")
+async def drive_status():
+    """Get freshness of the local Drive metadata mirror."""
+    if not drive_mcp:
+        raise HTTPException(status_code=500, detail="Drive service not initialized")
+
+    result = await drive_mcp.call_tool("get_sync_status")
+    if not result.success:
+        raise HTTPException(status_code=500, detail=result.error)
+
+    return result.data
+
+
+@app.get("/api/models/routing")
+async def model_routing():
+    """Get per-tier latency and JSON failure rates of brief/reference analysis calls."""
+    if not media_mcp:
+        raise HTTPException(status_code=500, detail="Media service not initialized")
+
+    return {"tiers": media_mcp.router.tiers, "stats": media_mcp.router.stats()}
+
+
 @app.get("/api/platforms")
 async def list_platforms():
     """Get list of available platforms with sizes."""
@@ -179,6 +262,54 @@ async def generate_asset(request: GenerateRequest):
     5. Generate image
     6. Save to Drive
     """
+    reference_image = None
+    if request.reference_image_base64:
+        try:
+            reference_image = base64.b64decode(request.reference_image_base64)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid reference image: {e}")
+
+    return await _generate(
+        request.client_id, request.brief, request.platform, reference_image,
+        request.text_mode, request.candidates, request.reuse_threshold, request.latency_budget
+    )
+
+
+@app.post("/api/generate/upload", response_model=GenerateResponse)
+async def generate_asset_upload(
+    client_id: str = Form(...),
+    brief: str = Form(...),
+    platform: str = Form("instagram_post"),
+    text_mode: str = Form("model"),
+    candidates: int = Form(1),
+    reuse_threshold: Optional[float] = Form(None),
+    latency_budget: Optional[float] = Form(None),
+    reference_image: Optional[UploadFile] = File(None)
+):
+    """
+    Generate a marketing asset from a multipart form.
+
+    Same workflow as /api/generate, but the reference image is sent as raw
+    bytes in its original format instead of base64 inside JSON.
+    """
+    reference_bytes = await reference_image.read() if reference_image else None
+    return await _generate(
+        client_id, brief, platform, reference_bytes or None, text_mode, candidates, reuse_threshold,
+        latency_budget
+    )
+
+
+async def _generate(
+    client_id: str,
+    brief: str,
+    platform: str,
+    reference_image: Optional[bytes],
+    text_mode: str = "model",
+    candidates: int = 1,
+    reuse_threshold: Optional[float] = None,
+    latency_budget: Optional[float] = None
+) -> GenerateResponse:
+    """Run the generation workflow shared by the JSON and multipart endpoints."""
     if not media_mcp:
         raise HTTPException(
             status_code=500,
@@ -188,29 +319,75 @@ async def generate_asset(request: GenerateRequest):
     messages = []
 
     try:
-        # Step 1: Process the brief
+        # Steps 1-3 overlap: brand retrieval does not depend on the brief, and
+        # the similar-asset search (step 4b) starts as soon as the streamed
+        # brief yields its theme
         messages.append("Processing campaign brief...")
-        brief_result = await media_mcp.call_tool(
-            "process_brief",
-            brief=request.brief,
-            client_name=request.client_id
-        )
+        brand_task = asyncio.create_task(drive_mcp.call_tool("get_brand_assets", client_id=client_id))
+        search_task = None
+
+        def start_asset_search(theme: Optional[str]):
+            nonlocal search_task
+            search_task = asyncio.create_task(drive_mcp.call_tool(
+                "find_similar_assets",
+                client_id=client_id,
+                text=" ".join(filter(None, [theme, brief])),
+                platform=platform,
+                k=3,
+                min_score=0.5
+            ))
+
+        def on_brief_field(field: str, value):
+            if field == "theme" and search_task is None:
+                messages.append(f"Theme identified: {value}")
+                start_asset_search(value)
+
+        # Step 1: Process the brief (streamed); with a reference image, the
+        # brief and the image are analyzed in one multimodal call (step 3)
+        if reference_image:
+            messages.append("Analyzing reference image...")
+            brief_result = await media_mcp.call_tool(
+                "analyze_brief_and_reference",
+                brief=brief,
+                client_name=client_id,
+                image_data=reference_image,
+                on_field=on_brief_field,
+                latency_budget=latency_budget
+            )
+        else:
+            brief_result = await media_mcp.call_tool(
+                "process_brief",
+                brief=brief,
+                client_name=client_id,
+                on_field=on_brief_field,
+                latency_budget=latency_budget
+            )
         if not brief_result.success:
+            for task in (brand_task, search_task):
+                if task:
+                    task.cancel()
             return GenerateResponse(
                 success=False,
                 error=f"Brief processing failed: {brief_result.error}",
                 messages=messages
             )
-        brief_data = brief_result.data
+        analysis = brief_result.data if reference_image else None
+        brief_data = analysis["brief_data"] if analysis else brief_result.data
+        if brief_data.get("brief_rules"):
+            rules = brief_data["brief_rules"]
+            messages.append(f"Brief extracted locally ({rules['format']} format, confidence {rules['confidence']:.2f})")
+        elif brief_data.get("brief_cache"):
+            messages.append(f"Brief matched a previous brief (similarity {brief_data['brief_cache']['similarity']:.2f})")
+        else:
+            messages.append("Brief analyzed by the model")
         messages.append(f"Brief processed: Theme = {brief_data.get('theme', 'N/A')}")
 
         # Step 2: Get brand assets
         messages.append("Retrieving brand assets...")
-        brand_result = await drive_mcp.call_tool(
-            "get_brand_assets",
-            client_id=request.client_id
-        )
+        brand_result = await brand_task
         if not brand_result.success:
+            if search_task:
+                search_task.cancel()
             return GenerateResponse(
                 success=False,
                 error=f"Brand retrieval failed: {brand_result.error}",
@@ -219,23 +396,17 @@ async def generate_asset(request: GenerateRequest):
         brand_data = brand_result.data
         messages.append(f"Brand loaded: {brand_data.get('name', 'Unknown')}")
 
-        # Step 3: Analyze reference image (if provided)
+        # Step 3: Reference image style (analyzed together with the brief)
         style_data = None
-        if request.reference_image_base64:
-            messages.append("Analyzing reference image...")
-            try:
-                image_bytes = base64.b64decode(request.reference_image_base64)
-                style_result = await media_mcp.call_tool(
-                    "analyze_reference_image",
-                    image_data=image_bytes
+        if analysis:
+            style_data = analysis["style_data"]
+            if style_data:
+                messages.append(
+                    f"Style extracted ({style_data.get('analysis', 'hybrid')}, {analysis['path']} call): "
+                    f"{style_data.get('mood', 'N/A')}"
                 )
-                if style_result.success:
-                    style_data = style_result.data
-                    messages.append(f"Style extracted: {style_data.get('mood', 'N/A')}")
-                else:
-                    messages.append(f"Reference analysis skipped: {style_result.error}")
-            except Exception as e:
-                messages.append(f"Reference analysis failed: {str(e)}")
+            else:
+                messages.append(f"Reference analysis skipped: {analysis.get('style_error')}")
 
         # Step 4: Generate image prompt
         messages.append("Building image prompt...")
@@ -244,7 +415,8 @@ async def generate_asset(request: GenerateRequest):
             brief_data=brief_data,
             brand_data=brand_data,
             style_data=style_data,
-            platform=request.platform
+            platform=platform,
+            text_mode=text_mode
         )
         if not prompt_result.success:
             return GenerateResponse(
@@ -255,16 +427,63 @@ async def generate_asset(request: GenerateRequest):
         image_prompt = prompt_result.data
         messages.append("Image prompt generated")
 
-        # Step 5: Generate image
+        # Step 4b: Look for close matches among previously generated assets
+        # (already running unless this request joined an identical in-flight
+        # brief call, which reports no fields)
+        similar_assets = None
+        if search_task is None:
+            start_asset_search(brief_data.get("theme"))
+        search_result = await search_task
+        if search_result.success and search_result.data:
+            similar_assets = search_result.data
+            best = similar_assets[0]
+            messages.append(f"{len(similar_assets)} similar asset(s) already exist (best score {best['score']:.2f})")
+            if reuse_threshold is not None and best["score"] >= reuse_threshold:
+                asset_result = await drive_mcp.call_tool("load_asset", asset_id=best["asset_id"])
+                if asset_result.success and asset_result.data:
+                    messages.append(f"Reused existing asset: {best['file_path'] or best['web_link']}")
+                    return GenerateResponse(
+                        success=True,
+                        image_base64=base64.b64encode(asset_result.data).decode("utf-8"),
+                        saved_path=best["file_path"] or best["web_link"],
+                        brief_data=brief_data,
+                        prompt_used=image_prompt,
+                        similar_assets=similar_assets,
+                        reused_asset=best,
+                        messages=messages
+                    )
+                messages.append(f"Could not load existing asset, generating: {asset_result.error}")
+
+        # Step 5: Generate image (several candidates, ranked locally, if requested)
         messages.append("Generating image (this may take a moment)...")
-        platform_size = PLATFORM_SIZES.get(request.platform, PLATFORM_SIZES["instagram_post"])
-        image_result = await media_mcp.call_tool(
-            "generate_image",
-            prompt=image_prompt,
-            width=platform_size["width"],
-            height=platform_size["height"]
-        )
-        if not image_result.success or not image_result.data:
+        platform_size = PLATFORM_SIZES.get(platform, PLATFORM_SIZES["instagram_post"])
+        if candidates > 1:
+            image_result = await media_mcp.call_tool(
+                "generate_image_candidates",
+                prompt=image_prompt,
+                width=platform_size["width"],
+                height=platform_size["height"],
+                count=candidates,
+                brand_data=brand_data,
+                platform=platform,
+                text_mode=text_mode
+            )
+            ranked = image_result.data if image_result.success else None
+        else:
+            # Checked by the local quality gate; only the image call is retried on failure
+            image_result = await media_mcp.call_tool(
+                "generate_image_gated",
+                prompt=image_prompt,
+                width=platform_size["width"],
+                height=platform_size["height"],
+                brand_data=brand_data
+            )
+            ranked = None
+            if image_result.success and image_result.data["image"]:
+                ranked = [{"image": image_result.data["image"], "gate": image_result.data["gate"]}]
+                for attempt, gate in enumerate(image_result.data["attempts"][:-1], start=1):
+                    messages.append(f"Quality gate failed on attempt {attempt} ({', '.join(gate['failures'])}), regenerating image")
+        if not ranked:
             return GenerateResponse(
                 success=False,
                 error=f"Image generation failed: {image_result.error or 'No image returned'}",
@@ -272,8 +491,23 @@ async def generate_asset(request: GenerateRequest):
                 prompt_used=image_prompt,
                 brief_data=brief_data
             )
-        image_bytes = image_result.data
-        messages.append("Image generated successfully!")
+        if candidates > 1:
+            messages.append(f"Generated {len(ranked)} candidates (best score {ranked[0]['score']:.2f})")
+        else:
+            messages.append("Image generated successfully!")
+        gate = ranked[0]["gate"]
+        if not gate["passed"]:
+            messages.append(f"Quality gate warning: {', '.join(gate['failures'])}")
+
+        # Steps 5b/5c: local copy and logo; messages are reported for the best candidate only
+        finished = await asyncio.gather(*[
+            _finish_image(
+                client_id, candidate["image"], platform, brief_data, brand_data, text_mode,
+                messages if i == 0 else []
+            )
+            for i, candidate in enumerate(ranked)
+        ])
+        image_bytes, background_bytes = finished[0]
 
         # Step 6: Save to Drive
         messages.append("Saving to Google Drive...")
@@ -283,11 +517,14 @@ async def generate_asset(request: GenerateRequest):
 
         save_result = await drive_mcp.call_tool(
             "save_image",
-            client_id=request.client_id,
+            client_id=client_id,
             campaign_name=theme_slug,
-            platform=request.platform,
+            platform=platform,
             image_data=image_bytes,
-            filename=filename
+            filename=filename,
+            prompt=image_prompt,
+            brief=brief,
+            theme=brief_data.get("theme")
         )
 
         saved_path = None
@@ -303,9 +540,22 @@ async def generate_asset(request: GenerateRequest):
         return GenerateResponse(
             success=True,
             image_base64=image_base64,
+            background_base64=base64.b64encode(background_bytes).decode("utf-8") if background_bytes else None,
             saved_path=saved_path,
             brief_data=brief_data,
             prompt_used=image_prompt,
+            candidates=[
+                CandidateResponse(
+                    image_base64=base64.b64encode(image).decode("utf-8"),
+                    background_base64=base64.b64encode(background).decode("utf-8") if background else None,
+                    score=candidate["score"],
+                    metrics=candidate["metrics"],
+                    quality_gate=candidate["gate"]
+                )
+                for candidate, (image, background) in zip(ranked, finished)
+            ] if candidates > 1 else None,
+            quality_gate={**gate, "attempts": image_result.data["attempts"]} if candidates <= 1 else gate,
+            similar_assets=similar_assets,
             messages=messages
         )
 
@@ -318,15 +568,187 @@ async def generate_asset(request: GenerateRequest):
         )
 
 
+@app.post("/api/brief/stream")
+async def stream_brief(request: BriefRequest):
+    """
+    Analyze a brief, streaming each field as Server-Sent Events.
+
+    Emits a `field` event ({"field", "value"}) as soon as each field of the
+    structured brief is complete, then `done` with the full brief data (or
+    `error`).
+    """
+    if not media_mcp:
+        raise HTTPException(status_code=500, detail="Media service not initialized")
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        result = await media_mcp.call_tool(
+            "process_brief",
+            brief=request.brief,
+            client_name=request.client_id,
+            latency_budget=request.latency_budget,
+            on_field=lambda field, value: queue.put_nowait(("field", {"field": field, "value": value}))
+        )
+        if result.success:
+            queue.put_nowait(("done", result.data))
+        else:
+            queue.put_nowait(("error", {"error": result.error}))
+
+    async def events():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event, data = await queue.get()
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event != "field":
+                    break
+        finally:
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/api/render-copy")
+async def render_copy(
+    background: UploadFile = File(...),
+    client_id: str = Form(...),
+    platform: str = Form("instagram_post"),
+    headline: Optional[str] = Form(None),
+    subheadline: Optional[str] = Form(None),
+    call_to_action: Optional[str] = Form(None)
+):
+    """
+    Render a copy variant onto a text-free background (from text_mode="local").
+
+    No model call is made, so variants and translations are cheap.
+    """
+    if not media_mcp:
+        raise HTTPException(status_code=500, detail="Media service not initialized")
+
+    brand_result = await drive_mcp.call_tool("get_brand_assets", client_id=client_id)
+    if not brand_result.success:
+        raise HTTPException(status_code=404, detail=brand_result.error)
+
+    result = await media_mcp.call_tool(
+        "render_text_overlay",
+        image_data=await background.read(),
+        copy={"headline": headline, "subheadline": subheadline, "call_to_action": call_to_action},
+        brand_data=brand_result.data,
+        platform=platform
+    )
+    if not result.success:
+        raise HTTPException(status_code=500, detail=result.error)
+
+    image_bytes = await _place_logo(client_id, result.data, platform, brand_result.data, [])
+    return StreamingResponse(io.BytesIO(image_bytes), media_type="image/png")
+
+
+async def _finish_image(
+    client_id: str,
+    image_bytes: bytes,
+    platform: str,
+    brief_data: dict,
+    brand_data: dict,
+    text_mode: str,
+    messages: List[str]
+) -> tuple:
+    """
+    Render local copy (text_mode="local") and place the logo on a generated image.
+
+    Returns:
+        (finished image bytes, text-free background bytes or None)
+    """
+    background_bytes = None
+    if text_mode == "local":
+        background_bytes = image_bytes
+        overlay_result = await media_mcp.call_tool(
+            "render_text_overlay",
+            image_data=background_bytes,
+            copy=brief_data,
+            brand_data=brand_data,
+            platform=platform
+        )
+        if overlay_result.success:
+            image_bytes = overlay_result.data
+            messages.append("Copy rendered locally")
+        else:
+            messages.append(f"Copy rendering failed: {overlay_result.error}")
+
+    image_bytes = await _place_logo(client_id, image_bytes, platform, brand_data, messages)
+    return image_bytes, background_bytes
+
+
+async def _place_logo(
+    client_id: str,
+    image_bytes: bytes,
+    platform: str,
+    brand_data: dict,
+    messages: List[str]
+) -> bytes:
+    """Composite the client's logo onto an asset; returns the input unchanged if there is none."""
+    if not brand_data.get("logo_url"):
+        return image_bytes
+
+    logo_result = await drive_mcp.call_tool("get_logo", client_id=client_id)
+    if not logo_result.success or not logo_result.data:
+        messages.append(f"Logo skipped: {logo_result.error or 'not found'}")
+        return image_bytes
+
+    composite_result = await media_mcp.call_tool(
+        "composite_logo",
+        image_data=image_bytes,
+        logo_data=logo_result.data,
+        platform=platform,
+        placement=brand_data.get("logo_placement")
+    )
+    if not composite_result.success:
+        messages.append(f"Logo placement failed: {composite_result.error}")
+        return image_bytes
+
+    messages.append("Logo placed")
+    return composite_result.data
+
+
+@app.post("/api/assets/search")
+async def search_assets(
+    client_id: str = Form(...),
+    text: Optional[str] = Form(None),
+    platform: Optional[str] = Form(None),
+    k: int = Form(5),
+    image: Optional[UploadFile] = File(None)
+):
+    """Find previously generated assets similar to a brief and/or an image."""
+    if not drive_mcp:
+        raise HTTPException(status_code=500, detail="Drive service not initialized")
+
+    image_data = await image.read() if image else None
+    if not text and not image_data:
+        raise HTTPException(status_code=400, detail="Provide text and/or an image to search by")
+
+    result = await drive_mcp.call_tool(
+        "find_similar_assets",
+        client_id=client_id,
+        text=text,
+        image_data=image_data or None,
+        platform=platform,
+        k=k
+    )
+    if not result.success:
+        raise HTTPException(status_code=500, detail=result.error)
+
+    return result.data
+
+
 @app.post("/api/analyze-reference")
-async def analyze_reference(file: UploadFile = File(...)):
-    """Analyze an uploaded reference image."""
+async def analyze_reference(file: UploadFile = File(...), mode: Optional[str] = None):
+    """Analyze an uploaded reference image (mode: "hybrid" or "local")."""
     if not media_mcp:
         raise HTTPException(status_code=500, detail="Media service not initialized")
 
     try:
         contents = await file.read()
-        result = await media_mcp.call_tool("analyze_reference_image", image_data=contents)
+        result = await media_mcp.call_tool("analyze_reference_image", image_data=contents, mode=mode)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.error)
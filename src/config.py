@@ -13,6 +13,31 @@ class Settings(BaseSettings):
     # Google AI (Gemini)
     google_api_key: str = Field(..., env="GOOGLE_API_KEY")
 
+    # Reference images are downscaled to this longest side before vision calls
+    reference_max_edge: int = Field(1024, env="REFERENCE_MAX_EDGE")
+
+    # Reference style analysis: "hybrid" (model writes the description) or "local" (no model call)
+    style_analysis_mode: str = Field("hybrid", env="STYLE_ANALYSIS_MODE")
+
+    # Regenerations allowed when an image fails the local quality gate
+    quality_gate_retries: int = Field(1, env="QUALITY_GATE_RETRIES")
+
+    # Comma-separated media tools that should NOT share identical concurrent calls
+    # (e.g. "generate_image,generate_image_gated" for distinct images per request)
+    single_flight_exclude: str = Field("", env="SINGLE_FLIGHT_EXCLUDE")
+
+    # Similarity (0-1) at which a brief reuses the processed result of a similar
+    # earlier brief for the same client; empty disables the cache
+    brief_cache_threshold: Optional[float] = Field(0.9, env="BRIEF_CACHE_THRESHOLD")
+
+    # Comma-separated models for brief and reference analysis, smallest first;
+    # each call is routed by input complexity and latency budget
+    model_tiers: str = Field("gemini-2.0-flash-lite,gemini-2.0-flash-exp", env="MODEL_TIERS")
+
+    # Confidence (0-1) at which a templated or key-value brief is extracted
+    # locally instead of by the model; empty disables local extraction
+    brief_rules_confidence: Optional[float] = Field(0.7, env="BRIEF_RULES_MIN_CONFIDENCE")
+
     # Google Drive
     google_service_account_json: Optional[str] = Field(None, env="GOOGLE_SERVICE_ACCOUNT_JSON")
     google_drive_root_folder_id: Optional[str] = Field(None, env="GOOGLE_DRIVE_ROOT_FOLDER_ID")
@@ -0,0 +1,367 @@
+"""
+Asset Index - similarity search over previously generated assets.
+
+Every saved asset is fingerprinted so a new request can find close matches
+before paying for another generation:
+- a 64-bit difference hash (perceptual; survives resizing and re-encoding)
+- a normalized 4x4x4 RGB color histogram
+- a hashed n-gram vector of its theme and brief (see brief_cache.vectorize);
+  prompts repeat the same brand boilerplate for every asset of a client, so
+  they are only vectorized when there is no brief
+- the brief's details (brief_cache.brief_details): n-gram vectors rate
+  "Christmas tacos" close to "Christmas burgers", so the text similarity is
+  scaled by the overlap of the content words, negations and explicit fields
+
+Fingerprints and metadata are persisted in SQLite; the vectors are also
+held per client as NumPy arrays, so a search is a handful of vectorized
+operations over all of a client's assets.
+"""
+from typing import Optional, Dict, List
+from pathlib import Path
+import io
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from .brief_cache import VECTOR_DIM, brief_details, vectorize
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset_id TEXT PRIMARY KEY,
+    client_id TEXT NOT NULL,
+    campaign TEXT,
+    platform TEXT,
+    width INTEGER,
+    height INTEGER,
+    file_path TEXT,
+    file_id TEXT,
+    web_link TEXT,
+    prompt TEXT,
+    brief TEXT,
+    theme TEXT,
+    created_at REAL,
+    dhash INTEGER NOT NULL,
+    histogram BLOB NOT NULL,
+    text_vector BLOB
+);
+CREATE INDEX IF NOT EXISTS assets_client ON assets (client_id);
+"""
+
+HISTOGRAM_BINS = 4  # per channel
+
+# Weights of the similarity components (re-normalized over those available)
+MATCH_WEIGHTS = {"text": 0.5, "dhash": 0.25, "color": 0.25}
+
+METADATA_FIELDS = (
+    "asset_id", "client_id", "campaign", "platform", "width", "height",
+    "file_path", "file_id", "web_link", "prompt", "brief", "theme", "created_at",
+)
+
+
+def _match_text(theme: Optional[str], brief: Optional[str], prompt: Optional[str]) -> Optional[str]:
+    """Text an asset is matched on: its theme and brief, or its prompt if it has neither."""
+    return " ".join(filter(None, [theme, brief])) or prompt
+
+
+def _detail_overlap(query: frozenset, details: frozenset) -> float:
+    """Jaccard overlap of two brief_details sets."""
+    union = len(query | details)
+    return len(query & details) / union if union else 0.0
+
+
+def image_fingerprint(image_data: bytes) -> Dict:
+    """
+    Perceptual hash, color histogram and size of an image.
+
+    Args:
+        image_data: Image bytes
+
+    Returns:
+        Dict with dhash (signed 64-bit int), histogram (float32 array), width, height
+    """
+    img = Image.open(io.BytesIO(image_data))
+    width, height = img.size
+    img.draft("RGB", (64, 64))
+    img = img.convert("RGB")
+
+    # Difference hash: is each pixel brighter than its right neighbour (9x8 grayscale)
+    gray = np.asarray(img.convert("L").resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    dhash = int(np.packbits(bits).view(">i8")[0])
+
+    small = np.asarray(img.resize((64, 64), Image.Resampling.BILINEAR), dtype=np.uint8)
+    bins = (small // (256 // HISTOGRAM_BINS)).reshape(-1, 3).astype(np.int32)
+    codes = (bins[:, 0] * HISTOGRAM_BINS + bins[:, 1]) * HISTOGRAM_BINS + bins[:, 2]
+    histogram = np.bincount(codes, minlength=HISTOGRAM_BINS ** 3).astype(np.float32)
+    histogram /= histogram.sum()
+
+    return {"dhash": dhash, "histogram": histogram, "width": width, "height": height}
+
+
+class _ClientAssets:
+    """Column arrays of one client's fingerprints."""
+
+    def __init__(self):
+        self.metadata: List[Dict] = []
+        self.dhashes = np.zeros(0, dtype=np.int64)
+        self.histograms = np.zeros((0, HISTOGRAM_BINS ** 3), dtype=np.float32)
+        self.text_vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self.details: List[frozenset] = []
+
+    def extend(self, rows: List[Dict]):
+        self.metadata.extend({k: row[k] for k in METADATA_FIELDS} for row in rows)
+        self.details.extend(
+            frozenset(brief_details(_match_text(r["theme"], r["brief"], r["prompt"]) or "")) for r in rows
+        )
+        self.dhashes = np.concatenate([self.dhashes, np.array([r["dhash"] for r in rows], dtype=np.int64)])
+        self.histograms = np.concatenate([self.histograms, np.stack([r["histogram"] for r in rows])])
+        self.text_vectors = np.concatenate([self.text_vectors, np.stack([r["text_vector"] for r in rows])])
+
+
+class AssetIndex:
+    """
+    Persistent fingerprint index of generated assets with nearest-neighbor search.
+
+    Thread-safe; fingerprinting is CPU-bound, so call add/scan via
+    asyncio.to_thread from async code.
+    """
+
+    def __init__(self, db_path: str = "./.cache/asset_index.sqlite3"):
+        """
+        Initialize the index and load existing fingerprints.
+
+        Args:
+            db_path: SQLite database path (":memory:" for an ephemeral index)
+        """
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._clients: Dict[str, _ClientAssets] = {}
+        self._asset_ids = set()
+
+        rows_by_client: Dict[str, List[Dict]] = {}
+        for row in self._db.execute("SELECT * FROM assets ORDER BY created_at"):
+            rows_by_client.setdefault(row["client_id"], []).append(self._decode(row))
+        for client_id, rows in rows_by_client.items():
+            self._clients.setdefault(client_id, _ClientAssets()).extend(rows)
+            self._asset_ids.update(row["asset_id"] for row in rows)
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        decoded = dict(row)
+        decoded["histogram"] = np.frombuffer(row["histogram"], dtype=np.float32)
+        decoded["text_vector"] = (
+            np.frombuffer(row["text_vector"], dtype=np.float32)
+            if row["text_vector"] else np.zeros(VECTOR_DIM, dtype=np.float32)
+        )
+        return decoded
+
+    def __contains__(self, asset_id: str) -> bool:
+        return asset_id in self._asset_ids
+
+    def add(
+        self,
+        asset_id: str,
+        client_id: str,
+        image_data: bytes,
+        campaign: Optional[str] = None,
+        platform: Optional[str] = None,
+        file_path: Optional[str] = None,
+        file_id: Optional[str] = None,
+        web_link: Optional[str] = None,
+        prompt: Optional[str] = None,
+        brief: Optional[str] = None,
+        theme: Optional[str] = None,
+        created_at: Optional[float] = None
+    ) -> Dict:
+        """
+        Fingerprint and index one asset (replacing an entry with the same ID).
+
+        Args:
+            asset_id: Unique ID (Drive file ID or local path)
+            client_id: Owning client
+            image_data: Image bytes
+            campaign, platform: Where the asset was saved
+            file_path, file_id, web_link: How to fetch it again
+            prompt, brief, theme: Generation inputs (theme and brief are used for text matching)
+            created_at: Unix time (defaults to now)
+
+        Returns:
+            The indexed asset's metadata
+        """
+        fingerprint = image_fingerprint(image_data)
+        text = _match_text(theme, brief, prompt)
+        row = {
+            "asset_id": asset_id,
+            "client_id": client_id,
+            "campaign": campaign,
+            "platform": platform,
+            "width": fingerprint["width"],
+            "height": fingerprint["height"],
+            "file_path": file_path,
+            "file_id": file_id,
+            "web_link": web_link,
+            "prompt": prompt,
+            "brief": brief,
+            "theme": theme,
+            "created_at": created_at or time.time(),
+            "dhash": fingerprint["dhash"],
+            "histogram": fingerprint["histogram"],
+            "text_vector": vectorize(text) if text else np.zeros(VECTOR_DIM, dtype=np.float32),
+        }
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO assets VALUES "
+                "(:asset_id, :client_id, :campaign, :platform, :width, :height, :file_path, :file_id,"
+                " :web_link, :prompt, :brief, :theme, :created_at, :dhash, :histogram, :text_vector)",
+                {
+                    **row,
+                    "histogram": row["histogram"].tobytes(),
+                    "text_vector": row["text_vector"].tobytes() if text else None,
+                }
+            )
+            self._db.commit()
+            if asset_id in self._asset_ids:
+                self._reload_client(client_id)
+            else:
+                self._clients.setdefault(client_id, _ClientAssets()).extend([row])
+                self._asset_ids.add(asset_id)
+
+        return {k: row[k] for k in METADATA_FIELDS}
+
+    def get(self, asset_id: str) -> Optional[Dict]:
+        """
+        Metadata of one indexed asset.
+
+        Args:
+            asset_id: Asset ID
+
+        Returns:
+            Metadata dict, or None if not indexed
+        """
+        with self._lock:
+            row = self._db.execute("SELECT * FROM assets WHERE asset_id = ?", (asset_id,)).fetchone()
+        return {k: row[k] for k in METADATA_FIELDS} if row else None
+
+    def _reload_client(self, client_id: str):
+        rows = [
+            self._decode(row) for row in
+            self._db.execute("SELECT * FROM assets WHERE client_id = ? ORDER BY created_at", (client_id,))
+        ]
+        self._clients[client_id] = _ClientAssets()
+        if rows:
+            self._clients[client_id].extend(rows)
+
+    def scan(self, root: str = "./generated") -> int:
+        """
+        Index local assets saved as <root>/<client>/<campaign>/<platform>/*.png.
+
+        Files already in the index are skipped. Assets found this way have no
+        prompt or brief, so they only match on image similarity.
+
+        Args:
+            root: Directory the mock-mode save_image writes to
+
+        Returns:
+            Number of newly indexed assets
+        """
+        added = 0
+        for path in sorted(Path(root).glob("*/*/*/*.png")):
+            asset_id = str(path)
+            if asset_id in self:
+                continue
+            client_id, campaign, platform = path.parts[-4:-1]
+            try:
+                self.add(
+                    asset_id, client_id, path.read_bytes(),
+                    campaign=campaign, platform=platform, file_path=asset_id,
+                    created_at=path.stat().st_mtime
+                )
+                added += 1
+            except Exception as e:
+                print(f"Skipping unreadable asset {path}: {e}")
+        return added
+
+    def search(
+        self,
+        client_id: str,
+        text: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        platform: Optional[str] = None,
+        k: int = 5,
+        min_score: float = 0.0
+    ) -> List[Dict]:
+        """
+        Nearest previously generated assets for a client.
+
+        Text (theme and brief) is compared by cosine similarity, scaled by
+        how much the two briefs' details overlap; an image by perceptual-hash
+        Hamming distance and histogram intersection. The score is the
+        weighted mean of the available components.
+
+        Args:
+            client_id: Client whose assets to search
+            text: Theme and brief text
+            image_data: Image to find near-duplicates of
+            platform: Only consider assets for this platform
+            k: Number of matches
+            min_score: Drop matches scoring below this
+
+        Returns:
+            Asset metadata dicts with `score` and per-component `similarity`, best first
+        """
+        if (not text and not image_data) or k <= 0:
+            return []
+
+        query_vector = vectorize(text) if text else None
+        query_details = frozenset(brief_details(text)) if text else None
+        query = image_fingerprint(image_data) if image_data else None
+
+        with self._lock:
+            assets = self._clients.get(client_id)
+            if assets is None or not assets.metadata:
+                return []
+
+            components: Dict[str, np.ndarray] = {}
+            if query_vector is not None:
+                similarity = np.clip(assets.text_vectors @ query_vector, 0.0, 1.0)
+                for i in np.flatnonzero(similarity):
+                    similarity[i] *= _detail_overlap(query_details, assets.details[i])
+                components["text"] = similarity
+            if query is not None:
+                xor = np.bitwise_xor(assets.dhashes, np.int64(query["dhash"]))
+                distance = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+                components["dhash"] = 1.0 - distance / 64.0
+                components["color"] = np.minimum(assets.histograms, query["histogram"]).sum(axis=1)
+
+            total_weight = sum(MATCH_WEIGHTS[name] for name in components)
+            scores = sum(MATCH_WEIGHTS[name] * values for name, values in components.items()) / total_weight
+
+            if platform:
+                scores = np.where([m["platform"] == platform for m in assets.metadata], scores, -1.0)
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {
+                    **assets.metadata[i],
+                    "score": round(float(scores[i]), 4),
+                    "similarity": {name: round(float(values[i]), 4) for name, values in components.items()},
+                }
+                for i in top
+                if scores[i] >= max(min_score, 0.0)
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed assets per client."""
+        with self._lock:
+            return {client_id: len(assets.metadata) for client_id, assets in self._clients.items()}
@@ -0,0 +1,169 @@
+"""
+Disk Blob Cache - size-capped, host-wide LRU cache for downloaded images.
+
+Reference images and logos are immutable for a given Drive revision, so they
+are cached on disk keyed by file ID plus version (md5Checksum or
+modifiedTime). The cache directory is shared by every worker process on the
+host:
+- writes go to a temp file and are renamed into place (atomic)
+- reads bump the file's mtime (LRU order)
+- eviction runs under an advisory file lock
+"""
+from typing import Optional
+from pathlib import Path
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class DiskBlobCache:
+    """
+    LRU blob store on the local filesystem.
+
+    Entries live at <cache_dir>/<key[:2]>/<key>. LRU order is tracked through
+    file mtimes so it survives restarts and is shared across processes.
+    """
+
+    # Evict down to this fraction of max_bytes to avoid evicting on every put
+    EVICT_TARGET = 0.9
+
+    # Re-scan the directory after this many puts to pick up other workers' writes
+    RESCAN_EVERY = 64
+
+    def __init__(self, cache_dir: str = "./.cache/blobs", max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory shared by all workers on the host
+            max_bytes: Size cap for the whole cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._approx_bytes = self._scan_size()
+        self._puts_since_scan = 0
+
+    @staticmethod
+    def make_key(file_id: str, version: Optional[str]) -> str:
+        """Build a cache key from a Drive file ID and its md5Checksum/modifiedTime."""
+        return hashlib.sha256(f"{file_id}:{version or ''}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read a blob.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Blob content, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Mark as recently used
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        """
+        Store a blob atomically and evict old entries if over the size cap.
+
+        Args:
+            key: Cache key from make_key()
+            data: Blob content
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        with self._lock:
+            self._approx_bytes += len(data)
+            self._puts_since_scan += 1
+            needs_check = (
+                self._approx_bytes > self.max_bytes
+                or self._puts_since_scan >= self.RESCAN_EVERY
+            )
+        if needs_check:
+            self._evict()
+
+    def invalidate(self, key: str):
+        """Remove a single entry."""
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    # ==================== EVICTION ====================
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every cached blob."""
+        for shard in self.cache_dir.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard):
+                if entry.name.startswith(".tmp-") or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Delete least recently used blobs until under the target size."""
+        lock_file = open(self.cache_dir / ".lock", "w")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+
+            if total > self.max_bytes:
+                target = self.max_bytes * self.EVICT_TARGET
+                for path, size, _ in entries:
+                    if total <= target:
+                        break
+                    try:
+                        os.unlink(path)
+                        total -= size
+                    except FileNotFoundError:
+                        pass
+
+            with self._lock:
+                self._approx_bytes = total
+                self._puts_since_scan = 0
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
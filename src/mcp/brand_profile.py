@@ -0,0 +1,275 @@
+"""
+Brand Profiles - compiled, immutable brand data with versioning.
+
+Brand data arrives as loose dicts (mock literals, or colors.json and
+guidelines.md from Drive). Compiling it once into a BrandProfile gives:
+- validated, normalized hex colors with pre-parsed RGB and CIE Lab values
+- pre-rendered prompt fragments for image prompt building
+- a content hash ("version") that downstream caches can key off
+
+Profiles are cached per client and recompiled only when the source
+signature (e.g. Drive md5Checksums) changes.
+"""
+from typing import Optional, List, Dict, Any, Tuple, Callable, Union
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import threading
+
+
+_HEX_COLOR = re.compile(r"^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+
+# Fields carried through from the source data, in to_dict() order
+BRAND_FIELDS = (
+    "name", "colors", "primary_color", "secondary_color", "font_primary",
+    "font_secondary", "style", "tagline", "logo_url", "logo_placement", "guidelines",
+)
+
+
+def normalize_hex(color: str) -> Optional[str]:
+    """Normalize '#abc' / 'AABBCC' style colors to '#AABBCC', or None if invalid."""
+    match = _HEX_COLOR.match(color.strip()) if isinstance(color, str) else None
+    if not match:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    return "#" + digits.upper()
+
+
+def hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    """Convert a normalized '#RRGGBB' color to an (r, g, b) tuple."""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def rgb_to_lab(rgb: Tuple[int, int, int]) -> Tuple[float, float, float]:
+    """Convert sRGB (0-255) to CIE Lab (D65 white point)."""
+    def linearize(channel: float) -> float:
+        channel /= 255.0
+        return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+    r, g, b = (linearize(c) for c in rgb)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = (0.2126 * r + 0.7152 * g + 0.0722 * b) / 1.00000
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t: float) -> float:
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def content_hash(data: Dict) -> str:
+    """Stable short hash of a brand data dict."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class BrandProfile:
+    """
+    Immutable, pre-validated brand profile.
+
+    Build with BrandProfile.compile(); attributes cannot be changed afterwards.
+    """
+
+    __slots__ = (
+        "client_id", "name", "colors", "colors_rgb", "colors_lab",
+        "primary_color", "secondary_color", "font_primary", "font_secondary",
+        "style", "tagline", "logo_url", "logo_placement", "guidelines", "prompt_fragments",
+        "version", "warnings", "_as_dict",
+    )
+
+    def __init__(self, **fields: Any):
+        for slot in self.__slots__:
+            object.__setattr__(self, slot, fields.get(slot))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("BrandProfile is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("BrandProfile is immutable")
+
+    def __repr__(self) -> str:
+        return f"BrandProfile(client_id={self.client_id!r}, name={self.name!r}, version={self.version!r})"
+
+    @classmethod
+    def compile(cls, client_id: str, data: Dict) -> "BrandProfile":
+        """
+        Validate and compile raw brand data.
+
+        Invalid colors are dropped (and reported in `warnings`) rather than
+        failing the whole brand.
+
+        Args:
+            client_id: Client identifier
+            data: Raw brand dict (mock literal or parsed colors.json + guidelines)
+
+        Returns:
+            Compiled BrandProfile
+        """
+        warnings: List[str] = []
+
+        colors = []
+        for raw in data.get("colors") or []:
+            color = normalize_hex(raw)
+            if color is None:
+                warnings.append(f"Ignoring invalid color: {raw!r}")
+            elif color not in colors:
+                colors.append(color)
+
+        def optional_color(key: str) -> Optional[str]:
+            raw = data.get(key)
+            if raw is None:
+                return None
+            color = normalize_hex(raw)
+            if color is None:
+                warnings.append(f"Ignoring invalid {key}: {raw!r}")
+            return color
+
+        primary_color = optional_color("primary_color") or (colors[0] if colors else None)
+        secondary_color = optional_color("secondary_color")
+        colors_rgb = tuple(hex_to_rgb(c) for c in colors)
+
+        name = data.get("name") or client_id
+        style = data.get("style")
+
+        # Pre-rendered prompt fragments (see MediaMCPServer.generate_image_prompt)
+        fragments = {"identity": f"Professional marketing image for {name}"}
+        if colors:
+            fragments["colors"] = f"Brand colors: {', '.join(colors[:3])}"
+        if style:
+            fragments["style"] = f"Brand style: {style}"
+
+        source = {key: data.get(key) for key in BRAND_FIELDS if data.get(key) is not None}
+        version = content_hash(source)
+
+        as_dict = {
+            **source,
+            "name": name,
+            "colors": list(colors),
+            "primary_color": primary_color,
+            "version": version,
+        }
+        if secondary_color:
+            as_dict["secondary_color"] = secondary_color
+
+        return cls(
+            client_id=client_id,
+            name=name,
+            colors=tuple(colors),
+            colors_rgb=colors_rgb,
+            colors_lab=tuple(rgb_to_lab(rgb) for rgb in colors_rgb),
+            primary_color=primary_color,
+            secondary_color=secondary_color,
+            font_primary=data.get("font_primary") or data.get("font"),
+            font_secondary=data.get("font_secondary"),
+            style=style,
+            tagline=data.get("tagline"),
+            logo_url=data.get("logo_url"),
+            logo_placement=data.get("logo_placement"),
+            guidelines=data.get("guidelines"),
+            prompt_fragments=fragments,
+            version=version,
+            warnings=tuple(warnings),
+            _as_dict=as_dict,
+        )
+
+    def to_dict(self) -> Dict:
+        """Return the API/brand_data dict representation (includes `version`)."""
+        return {key: list(value) if isinstance(value, list) else value for key, value in self._as_dict.items()}
+
+
+class BrandProfileCache:
+    """
+    Per-client cache of compiled brand profiles.
+
+    Each entry remembers the source signature it was compiled from; a
+    different signature (e.g. a changed md5Checksum on colors.json)
+    triggers a reload and recompile.
+    """
+
+    def __init__(self):
+        self._profiles: Dict[str, Tuple[Optional[str], BrandProfile]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compile(
+        self,
+        client_id: str,
+        signature: Optional[str],
+        loader: Callable[[], Dict]
+    ) -> BrandProfile:
+        """
+        Return the cached profile, reloading it if the signature changed.
+
+        Args:
+            client_id: Client identifier
+            signature: Cheap fingerprint of the source files
+            loader: Returns raw brand data; only called on a miss
+
+        Returns:
+            Compiled BrandProfile
+        """
+        with self._lock:
+            cached = self._profiles.get(client_id)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        profile = BrandProfile.compile(client_id, loader())
+        with self._lock:
+            self._profiles[client_id] = (signature, profile)
+        return profile
+
+    def invalidate(self, client_id: Optional[str] = None):
+        """Drop one client's profile, or all of them."""
+        with self._lock:
+            if client_id is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(client_id, None)
+
+
+# Profiles compiled from brand_data dicts passed into tools, keyed by version and content hash
+_compiled_by_version: "OrderedDict[str, BrandProfile]" = OrderedDict()
+_compiled_lock = threading.Lock()
+_COMPILED_MAX = 256
+
+
+def as_brand_profile(brand_data: Union[Dict, BrandProfile, None]) -> BrandProfile:
+    """
+    Coerce brand data to a compiled profile, reusing compiled versions.
+
+    Dicts returned by get_brand_assets carry a `version`, so looking them up
+    costs a dict access and a comparison instead of a recompile. A dict
+    edited after it was returned no longer equals the profile of its
+    `version`, and is compiled (and cached) by its content instead.
+    """
+    if isinstance(brand_data, BrandProfile):
+        return brand_data
+
+    brand_data = brand_data or {}
+    version = brand_data.get("version")
+
+    with _compiled_lock:
+        profile = _compiled_by_version.get(version) if version else None
+        if profile is not None and profile._as_dict == brand_data:
+            _compiled_by_version.move_to_end(version)
+            return profile
+
+    key = content_hash(brand_data)
+    with _compiled_lock:
+        profile = _compiled_by_version.get(key)
+        if profile is not None:
+            _compiled_by_version.move_to_end(key)
+            return profile
+
+    profile = BrandProfile.compile(brand_data.get("name") or "brand", brand_data)
+    with _compiled_lock:
+        # Also under its own version, so its to_dict() is found directly
+        for cache_key in (key, profile.version):
+            _compiled_by_version[cache_key] = profile
+            _compiled_by_version.move_to_end(cache_key)
+        while len(_compiled_by_version) > _COMPILED_MAX:
+            _compiled_by_version.popitem(last=False)
+    return profile
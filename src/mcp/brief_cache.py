@@ -0,0 +1,302 @@
+"""
+Brief Cache - semantic reuse of processed campaign briefs.
+
+Briefs are highly repetitive per client and season ("Xmas promo for fusion
+burgers, festive" vs "Christmas promotion, fusion burgers, festive mood").
+Exact-match caching misses these, so briefs are vectorized locally and a
+new brief reuses the brief_data of a sufficiently similar cached one.
+
+Vectorization (no network, NumPy only):
+- lowercase, strip punctuation, map common abbreviations to one spelling
+- drop stop words and generic filler, fold plurals ("curries" -> "curry")
+- hash word unigrams and padded character 3-5-grams into a fixed number of
+  signed buckets, with sublinear term frequency, then L2-normalize
+
+Each client has its own row-matrix of vectors; a lookup is one matrix-vector
+product plus argpartition for the top k, which stays in the low milliseconds
+at tens of thousands of briefs. Similarity only finds candidates: a cached
+brief is reused only when it asks for the same things, i.e. it has the same
+content words once spelling, plurals, stop words and generic filler
+("promotion", "post") are folded (a tacos brief must not reuse a burgers
+one, nor Easter Christmas), negates the same words ("not festive" must not
+reuse a festive brief) and states the same explicit CTA, headline and offer.
+"""
+from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass
+import copy
+import re
+import threading
+import zlib
+
+import numpy as np
+
+
+# Hashed feature dimensions (row size of the index)
+VECTOR_DIM = 1024
+
+# Character n-gram sizes
+NGRAM_SIZES = (3, 4, 5)
+
+# Cosine similarity above which a cached brief is a reuse candidate
+DEFAULT_THRESHOLD = 0.9
+
+# Briefs kept per client; when full, the oldest EVICT_FRACTION are dropped at once
+DEFAULT_MAX_ENTRIES = 50_000
+EVICT_FRACTION = 0.1
+
+# Spellings folded together before hashing
+SYNONYMS = {
+    "xmas": "christmas",
+    "x-mas": "christmas",
+    "promo": "promotion",
+    "promos": "promotion",
+    "promotions": "promotion",
+    "bday": "birthday",
+    "nye": "new year",
+    "bogo": "buy one get one",
+    "valentines": "valentine",
+    "ig": "instagram",
+    "fb": "facebook",
+    "pct": "percent",
+}
+
+STOP_WORDS = frozenset("""
+    a all an and are as at be but by each every for from in into is it its of
+    on or our so that the their this to up was we with your you will mood
+    feel feeling vibe
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9'-]+")
+
+# Generic words a rephrased brief may add or drop without asking for anything else
+FILLER_WORDS = frozenset("""
+    promotion campaign post ad advert image picture photo poster banner graphic
+    social media instagram facebook design create make need want please show
+    showing feature featuring style look scene theme themed tone
+""".split())
+
+NEGATIONS = frozenset("not no without avoid never don't non".split())
+
+# Explicitly stated fields that must match exactly, by their spellings in briefs
+PINNED_FIELDS = {
+    "cta": "cta", "call to action": "cta",
+    "headline": "headline", "title": "headline",
+    "offer": "offer", "promo": "offer", "tagline": "offer", "subheadline": "offer",
+}
+_PINNED_FIELD = re.compile(
+    r"\b(" + "|".join(sorted(PINNED_FIELDS, key=len, reverse=True)) + r")\s*[:=]\s*([^,;\n]+)",
+    re.IGNORECASE
+)
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_brief(text: str) -> List[str]:
+    """Lowercased, synonym-folded, singular tokens of a brief, without stop words."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.strip("'-")
+        for word in SYNONYMS.get(token, token).split():
+            if word and word not in STOP_WORDS:
+                tokens.append(_singular(word))
+    return tokens
+
+
+def brief_details(brief: str) -> Tuple[str, ...]:
+    """
+    What a brief asks for, which a reused brief must match exactly.
+
+    Content words (occasion, products, mood, numbers; filler excluded),
+    negated words and explicit CTA/headline/offer values.
+    """
+    details = {"w:" + token for token in normalize_brief(brief) if token not in FILLER_WORDS}
+
+    words = [token.strip("'-") for token in _TOKEN.findall(brief.lower())]
+    for i, word in enumerate(words):
+        if word in NEGATIONS:
+            # The first word after the negation that is not a stop word
+            negated = next((t for following in words[i + 1:] for t in normalize_brief(following)), "")
+            details.add("not:" + negated)
+
+    for name, value in _PINNED_FIELD.findall(brief):
+        details.add(f"{PINNED_FIELDS[name.lower()]}:{' '.join(normalize_brief(value))}")
+    return tuple(sorted(details))
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    # crc32 is stable across processes (unlike hash()) and fast
+    value = zlib.crc32(feature.encode("utf-8"))
+    return value % VECTOR_DIM, 1.0 if value >> 31 else -1.0
+
+
+def vectorize(text: str) -> np.ndarray:
+    """
+    Hashed word + character n-gram vector of a brief.
+
+    Args:
+        text: Brief text
+
+    Returns:
+        L2-normalized float32 vector of length VECTOR_DIM (all zeros if empty)
+    """
+    tokens = [token for token in normalize_brief(text) if token not in FILLER_WORDS]
+    counts: Dict[str, int] = {}
+    for token in tokens:
+        counts["w:" + token] = counts.get("w:" + token, 0) + 1
+        padded = f" {token} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                gram = "c:" + padded[i:i + n]
+                counts[gram] = counts.get(gram, 0) + 1
+
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for feature, count in counts.items():
+        index, sign = _bucket(feature)
+        # Whole words weigh more than any single n-gram
+        weight = (1.0 + np.log(count)) * (3.0 if feature.startswith("w:") else 1.0)
+        vector[index] += sign * weight
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class BriefMatch:
+    """A cached brief similar to the query."""
+    brief: str
+    brief_data: Dict
+    similarity: float
+    same_details: bool = True  # Asks for the same things (see brief_details)
+
+
+class _ClientIndex:
+    """Growable row-matrix of brief vectors for one client."""
+
+    def __init__(self):
+        self.vectors = np.zeros((16, VECTOR_DIM), dtype=np.float32)
+        self.briefs: List[str] = []
+        self.data: List[Dict] = []
+        self.details: List[Tuple[str, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self.briefs)
+
+    def add(self, brief: str, vector: np.ndarray, brief_data: Dict):
+        if len(self) == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+        self.vectors[len(self)] = vector
+        self.details.append(brief_details(brief))
+        self.briefs.append(brief)
+        self.data.append(brief_data)
+
+    def evict(self, count: int):
+        keep = len(self) - count
+        self.vectors[:keep] = self.vectors[count:len(self)]
+        self.vectors[keep:] = 0
+        del self.briefs[:count], self.data[:count], self.details[:count]
+
+
+class SemanticBriefCache:
+    """
+    Per-client nearest-neighbor cache of processed briefs.
+
+    Thread-safe. Stored and returned brief_data are copies, so callers may
+    modify what they get back.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Cosine similarity needed to reuse a cached brief
+            max_entries: Briefs kept per client
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._clients: Dict[str, _ClientIndex] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, client: str, brief: str, k: int = 5) -> List[BriefMatch]:
+        """
+        Top-k most similar cached briefs for a client.
+
+        Args:
+            client: Client the brief belongs to
+            brief: Brief text
+            k: Number of neighbors
+
+        Returns:
+            Matches, most similar first
+        """
+        details = brief_details(brief)
+        query = vectorize(brief)
+        with self._lock:
+            index = self._clients.get(client)
+            if index is None or not len(index):
+                return []
+
+            scores = index.vectors[:len(index)] @ query
+            k = min(k, len(index))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                BriefMatch(
+                    index.briefs[i],
+                    copy.deepcopy(index.data[i]),
+                    float(scores[i]),
+                    index.details[i] == details
+                )
+                for i in top
+            ]
+
+    def get(self, client: str, brief: str) -> Optional[BriefMatch]:
+        """
+        Cached brief similar enough to reuse, if any.
+
+        Args:
+            client: Client the brief belongs to
+            brief: Brief text
+
+        Returns:
+            Most similar match at or above the threshold that asks for the
+            same things (see brief_details), or None
+        """
+        for match in self.search(client, brief, k=5):
+            if match.similarity < self.threshold:
+                break
+            if match.same_details:
+                self.hits += 1
+                return match
+        self.misses += 1
+        return None
+
+    def put(self, client: str, brief: str, brief_data: Dict):
+        """
+        Cache processed brief data.
+
+        Args:
+            client: Client the brief belongs to
+            brief: Brief text
+            brief_data: Structured brief returned by the model
+        """
+        vector = vectorize(brief)
+        with self._lock:
+            index = self._clients.setdefault(client, _ClientIndex())
+            if len(index) >= self.max_entries:
+                index.evict(max(1, int(self.max_entries * EVICT_FRACTION)))
+            index.add(brief, vector, copy.deepcopy(brief_data))
+
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses and cached briefs across all clients."""
+        with self._lock:
+            size = sum(len(index) for index in self._clients.values())
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
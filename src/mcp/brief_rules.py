@@ -0,0 +1,330 @@
+"""
+Brief Rules - deterministic extraction of templated briefs.
+
+Many briefs follow a house template, either as one line
+
+    Xmas promo for fusion burgers, festive, warm, CTA: Order Now
+
+or as simple YAML / key-value lines
+
+    theme: Christmas
+    products: [fusion burgers, rice bowls]
+    mood: festive
+    cta: Order Now
+
+Both are pattern-matched into the same brief_data schema process_brief gets
+from the model, in microseconds. Fields the brief does not state (headline,
+colors) are filled from fixed rules. Every extraction carries a confidence:
+the share of the important fields the brief stated explicitly, scaled by
+how much of the brief was understood. Callers use the model instead when it
+is low.
+
+The one-line template only applies when its theme is a known occasion or
+season, or a short capitalized name ("Burger Week"); the latter counts for
+less, since it may just be the start of a prose sentence. brief_data has no
+field for exclusions, so a negated segment ("not spicy") is kept out of the
+mood and lowers the confidence enough for the model to take the brief.
+"""
+from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass, field
+import re
+
+from .brief_cache import SYNONYMS, STOP_WORDS, NEGATIONS
+
+
+# Confidence at or above which the extraction replaces the model call
+DEFAULT_MIN_CONFIDENCE = 0.7
+
+# Contribution of explicitly stated fields to the confidence
+FIELD_WEIGHTS = {
+    "theme": 0.35,
+    "key_elements": 0.25,
+    "mood": 0.15,
+    "call_to_action": 0.15,
+    "headline": 0.10,
+}
+
+# Key spellings accepted in key-value briefs and "key: value" segments
+KEY_ALIASES = {
+    "theme": "theme", "occasion": "theme", "holiday": "theme", "campaign": "theme", "season": "theme",
+    "mood": "mood", "tone": "mood", "vibe": "mood", "feel": "mood",
+    "product": "key_elements", "products": "key_elements", "items": "key_elements",
+    "elements": "key_elements", "key elements": "key_elements", "featuring": "key_elements",
+    "color": "colors_suggested", "colors": "colors_suggested", "colour": "colors_suggested",
+    "colours": "colors_suggested", "palette": "colors_suggested",
+    "headline": "headline", "title": "headline",
+    "subheadline": "subheadline", "tagline": "subheadline", "offer": "subheadline", "promo": "subheadline",
+    "cta": "call_to_action", "call to action": "call_to_action", "action": "call_to_action",
+    "audience": "target_audience", "target": "target_audience", "target audience": "target_audience",
+    "style": "style_keywords", "keywords": "style_keywords", "style keywords": "style_keywords",
+}
+
+LIST_FIELDS = ("key_elements", "colors_suggested", "style_keywords")
+
+# Colors suggested for common occasions when the brief names none
+THEME_COLORS = {
+    "christmas": ["red", "green", "gold"],
+    "new year": ["gold", "black", "silver"],
+    "valentine": ["red", "pink", "white"],
+    "easter": ["pastel yellow", "lavender", "mint green"],
+    "halloween": ["orange", "black", "purple"],
+    "thanksgiving": ["burnt orange", "brown", "gold"],
+    "summer": ["sunny yellow", "turquoise", "coral"],
+    "spring": ["pastel pink", "fresh green", "white"],
+    "autumn": ["amber", "rust", "olive"],
+    "fall": ["amber", "rust", "olive"],
+    "winter": ["icy blue", "white", "silver"],
+    "lunar new year": ["red", "gold"],
+    "chinese new year": ["red", "gold"],
+}
+
+# Occasions recognized as template themes, besides the THEME_COLORS names
+OCCASIONS = frozenset(THEME_COLORS) | {
+    "black friday", "cyber monday", "mother's day", "father's day", "back to school",
+    "grand opening", "anniversary", "birthday", "holiday", "weekend", "diwali",
+    "ramadan", "eid", "mid-autumn", "oktoberfest", "super bowl", "graduation",
+}
+
+# Share of the theme weight counted for a theme that is not a known occasion
+UNRECOGNIZED_THEME_FACTOR = 0.3
+
+# Share of the confidence kept when the brief negates something
+NEGATION_FACTOR = 0.5
+
+# Longest unrecognized theme accepted, in words
+MAX_THEME_WORDS = 3
+
+# Words of a prose opener, never part of a theme ("Create a promo for ...")
+_PROSE_WORDS = {
+    "i", "we", "us", "me", "my", "our", "you", "your", "they", "a", "an", "please", "need",
+    "want", "create", "make", "design", "generate", "build", "give", "do", "can", "could", "let's",
+}
+
+DEFAULT_CALL_TO_ACTION = "Order Now"
+
+# "<theme> promo for <products>"
+_TEMPLATE_HEAD = re.compile(
+    r"^\s*(?P<theme>[\w'&/ -]+?)\s+"
+    r"(?:promo|promotion|sale|campaign|special|specials|launch|offer|deal)s?\s+"
+    r"(?:for|on|of|featuring|with)\s+(?P<products>.+?)\s*$",
+    re.IGNORECASE
+)
+_KEY_VALUE = re.compile(r"^\s*(?P<key>[A-Za-z][A-Za-z _-]{0,24}?)\s*[:=]\s*(?P<value>.*?)\s*$")
+_LIST_ITEM = re.compile(r"^\s*[-*]\s+(?P<value>.+?)\s*$")
+_OFFER = re.compile(
+    r"\b\d+\s?%\s?off\b|\bbuy one get one(?: free)?\b|\bbogo\b|\bfree [a-z]+(?: [a-z]+)?\b|[$₱€£]\s?\d+(?:[.,]\d{2})?",
+    re.IGNORECASE
+)
+_PRODUCT_SPLIT = re.compile(r"\s*(?:,|&|\band\b|\+)\s*", re.IGNORECASE)
+_LEADING_ARTICLE = re.compile(r"^(?:our|the|a|an|your|some)\s+", re.IGNORECASE)
+
+
+@dataclass
+class RuleExtraction:
+    """Brief data extracted without the model."""
+    brief_data: Dict
+    confidence: float
+    format: str  # "key_value" or "template"
+    fields: List[str] = field(default_factory=list)  # Fields stated explicitly in the brief
+
+
+def _words(text: str) -> int:
+    return len(re.findall(r"\w+", text))
+
+
+def _is_negated(text: str) -> bool:
+    """Whether text contains a negation ("not spicy", "no pork", "without nuts")."""
+    return any(word in NEGATIONS for word in re.findall(r"[\w']+", text.lower()))
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1].strip()
+    return value
+
+
+def _split_list(value: str) -> List[str]:
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    return [_unquote(item) for item in value.split(",") if _unquote(item)]
+
+
+def _normalize_theme(theme: str) -> str:
+    words = []
+    for word in _unquote(theme).split():
+        words.extend(SYNONYMS.get(word.lower(), word).split())
+    return " ".join(w if w.isupper() else w.capitalize() for w in words)
+
+
+def _is_occasion(theme: str) -> bool:
+    """Whether a (normalized) theme names a known occasion or season."""
+    theme = theme.lower()
+    return any(re.search(r"\b" + re.escape(name) + r"\b", theme) for name in OCCASIONS)
+
+
+def _is_theme(theme: str) -> bool:
+    """Whether a template head's leading words can be a theme rather than prose."""
+    words = theme.split()
+    if any(word.lower() in _PROSE_WORDS for word in words):
+        return False
+    if _is_occasion(_normalize_theme(theme)):
+        return True
+    return len(words) <= MAX_THEME_WORDS and all(
+        (word[0].isupper() or word[0].isdigit()) and word.lower() not in STOP_WORDS for word in words
+    )
+
+
+def _field_for(key: str) -> Optional[str]:
+    return KEY_ALIASES.get(re.sub(r"[\s_-]+", " ", key.strip().lower()))
+
+
+def _parse_key_value(brief: str) -> Optional[Tuple[Dict, int]]:
+    """Fields of a YAML / key-value brief and the number of words understood."""
+    lines = [line for line in brief.splitlines() if line.strip() and not line.strip().startswith("#")]
+    keyed = [_KEY_VALUE.match(line) for line in lines]
+    if sum(1 for match in keyed if match and _field_for(match.group("key"))) < 2:
+        return None
+
+    fields: Dict = {}
+    understood = 0
+    current: Optional[str] = None
+    for line, match in zip(lines, keyed):
+        item = _LIST_ITEM.match(line)
+        if item and current in LIST_FIELDS:
+            fields.setdefault(current, []).append(_unquote(item.group("value")))
+            understood += _words(line)
+            continue
+
+        name = _field_for(match.group("key")) if match else None
+        current = name
+        if not name:
+            continue
+        value = match.group("value")
+        if name in LIST_FIELDS:
+            if value:
+                fields.setdefault(name, []).extend(_split_list(value))
+        elif _unquote(value):
+            fields[name] = _unquote(value)
+        understood += _words(line)
+
+    return fields, understood
+
+
+def _parse_template(brief: str) -> Optional[Tuple[Dict, int]]:
+    """Fields of a one-line "<theme> promo for <products>, <mood>, CTA: <x>" brief."""
+    segments = [segment.strip() for segment in re.split(r"[;,\n]|\s[-–]\s", brief) if segment.strip()]
+    if not segments:
+        return None
+    head = _TEMPLATE_HEAD.match(segments[0])
+    if not head or not _is_theme(head.group("theme")):
+        return None
+
+    fields: Dict = {
+        "theme": head.group("theme"),
+        "key_elements": [p for p in _PRODUCT_SPLIT.split(head.group("products")) if p],
+    }
+    understood = _words(segments[0])
+    moods = []
+    for segment in segments[1:]:
+        match = _KEY_VALUE.match(segment)
+        name = _field_for(match.group("key")) if match else None
+        if name:
+            value = _unquote(match.group("value"))
+            if name in LIST_FIELDS:
+                fields.setdefault(name, []).extend(_split_list(value))
+            elif value:
+                fields[name] = value
+            understood += _words(segment)
+        elif match:
+            # Unknown key; leave it to the model
+            continue
+        elif _OFFER.fullmatch(segment):
+            fields.setdefault("subheadline", segment)
+            understood += _words(segment)
+        elif segment.lower().startswith(("and ", "with ")) and _words(segment) <= 5:
+            fields["key_elements"] += [p for p in _PRODUCT_SPLIT.split(segment.split(" ", 1)[1]) if p]
+            understood += _words(segment)
+        elif _is_negated(segment):
+            # An exclusion, not a mood; brief_data cannot express it
+            continue
+        elif _words(segment) <= 3 and not _OFFER.search(segment):
+            # Short bare segments are mood words ("festive", "warm and cozy")
+            moods.append(segment.lower())
+            understood += _words(segment)
+
+    if moods and "mood" not in fields:
+        fields["mood"] = ", ".join(moods)
+    return fields, understood
+
+
+def extract_brief(brief: str) -> Optional[RuleExtraction]:
+    """
+    Extract brief_data from a templated or key-value brief.
+
+    Args:
+        brief: Campaign brief text
+
+    Returns:
+        RuleExtraction with the full brief_data schema and a confidence in
+        [0, 1], or None if the brief follows neither format
+    """
+    parsed, format_name = _parse_key_value(brief), "key_value"
+    if parsed is None:
+        parsed, format_name = _parse_template(brief), "template"
+    if parsed is None:
+        return None
+    found, understood = parsed
+
+    if found.get("key_elements"):
+        found["key_elements"] = [_LEADING_ARTICLE.sub("", item).strip() for item in found["key_elements"]]
+    stated = [name for name in FIELD_WEIGHTS if found.get(name)]
+
+    theme = _normalize_theme(found.get("theme", "")) or None
+    products = found.get("key_elements") or []
+    mood = found.get("mood")
+    offer = _OFFER.search(brief)
+
+    headline = found.get("headline")
+    if not headline:
+        if len(products) == 1 and _words(products[0]) <= 4:
+            headline = " ".join(filter(None, [theme, products[0].title()]))
+        elif theme:
+            headline = f"{theme} Specials"
+    subheadline = found.get("subheadline") or (offer.group(0) if offer else None)
+    call_to_action = found.get("call_to_action") or DEFAULT_CALL_TO_ACTION
+
+    colors = found.get("colors_suggested")
+    if not colors and theme:
+        # Longest name first, so "lunar new year" wins over "new year"
+        names = sorted(THEME_COLORS, key=len, reverse=True)
+        colors = next((THEME_COLORS[name] for name in names if name in theme.lower()), [])
+
+    keywords = found.get("style_keywords") or []
+    if not keywords:
+        keywords = [word.strip() for word in re.split(r",|\band\b", mood or "") if word.strip()]
+        keywords += [theme.lower()] if theme else []
+
+    brief_data = {
+        "theme": theme,
+        "mood": mood,
+        "key_elements": products,
+        "colors_suggested": list(colors or []),
+        "headline": headline,
+        "subheadline": subheadline,
+        "text_overlay": " - ".join(filter(None, [headline, subheadline, call_to_action])),
+        "style_keywords": keywords,
+        "target_audience": found.get("target_audience"),
+        "call_to_action": call_to_action,
+    }
+
+    weights = dict(FIELD_WEIGHTS)
+    if format_name == "template" and not _is_occasion(theme or ""):
+        weights["theme"] *= UNRECOGNIZED_THEME_FACTOR
+
+    coverage = min(understood / max(_words(brief), 1), 1.0)
+    confidence = sum(weights[name] for name in stated) * coverage
+    if _is_negated(brief):
+        confidence *= NEGATION_FACTOR
+    return RuleExtraction(brief_data, round(confidence, 3), format_name, stated)
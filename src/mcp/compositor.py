@@ -0,0 +1,553 @@
+"""
+Compositor - renders marketing copy onto generated backgrounds locally.
+
+In local text mode the model generates a text-free background and the
+headline, subheadline and call-to-action are drawn here with PIL in the
+brand's fonts and colors. A copy tweak or translation then re-renders in
+milliseconds instead of costing another image generation, and the text is
+always spelled exactly as written.
+
+Everything reusable is cached:
+- font file lookup (by family name) and loaded FreeType fonts (by size)
+- decoded backgrounds (by content hash), so variants skip the PNG decode
+- legibility scrims (by canvas size and layout)
+
+Brand logos are placed the same way: deterministically, from pre-scaled
+premultiplied copies, instead of asking the model to draw them.
+"""
+from typing import Optional, Dict, List, Tuple, Union
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import io
+import os
+import re
+import threading
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from .brand_profile import BrandProfile, as_brand_profile, hex_to_rgb
+
+
+# Directories searched for brand fonts, in order
+FONT_DIRS = (
+    os.getenv("BRAND_FONTS_DIR", "./assets/fonts"),
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+)
+
+# Used when a brand font is not installed
+FALLBACK_FONTS = {
+    "bold": ("DejaVuSans-Bold", "Arial Bold", "Helvetica"),
+    "regular": ("DejaVuSans", "Arial", "Helvetica"),
+}
+
+# Layout templates. Boxes are fractions of the canvas (left, top, right, bottom);
+# sizes are fractions of the shorter canvas side.
+LAYOUTS = {
+    "square": {
+        "box": (0.08, 0.58, 0.92, 0.92),
+        "align": "center",
+        "scrim": "bottom",
+        "headline_size": 0.085,
+        "subheadline_size": 0.042,
+        "cta_size": 0.038,
+    },
+    "tall": {
+        "box": (0.08, 0.62, 0.92, 0.88),
+        "align": "center",
+        "scrim": "bottom",
+        "headline_size": 0.10,
+        "subheadline_size": 0.05,
+        "cta_size": 0.045,
+    },
+    "wide": {
+        "box": (0.06, 0.14, 0.56, 0.86),
+        "align": "left",
+        "scrim": "left",
+        "headline_size": 0.12,
+        "subheadline_size": 0.058,
+        "cta_size": 0.052,
+    },
+    "banner": {
+        "box": (0.05, 0.18, 0.60, 0.82),
+        "align": "left",
+        "scrim": "left",
+        "headline_size": 0.16,
+        "subheadline_size": 0.075,
+        "cta_size": 0.07,
+    },
+}
+
+# Platform -> layout template (unknown platforms are picked by aspect ratio)
+PLATFORM_LAYOUTS = {
+    "instagram_post": "square",
+    "instagram_story": "tall",
+    "facebook_post": "wide",
+    "linkedin_post": "wide",
+    "twitter_post": "wide",
+    "facebook_cover": "banner",
+}
+
+# Where the image prompt should leave room for copy, per layout
+NEGATIVE_SPACE_HINTS = {
+    "square": "the lower third",
+    "tall": "the lower third",
+    "wide": "the left half",
+    "banner": "the left half",
+}
+
+_MAX_HEADLINE_LINES = 3
+_MIN_FONT_PX = 12
+_SCRIM_MAX_ALPHA = 170
+
+
+def layout_for(platform: str, width: int, height: int) -> Tuple[str, Dict]:
+    """
+    Pick the layout template for a platform.
+
+    Args:
+        platform: Platform key from PLATFORM_SIZES
+        width: Canvas width
+        height: Canvas height
+
+    Returns:
+        (layout name, layout template)
+    """
+    name = PLATFORM_LAYOUTS.get(platform)
+    if name is None:
+        ratio = width / height
+        name = "tall" if ratio < 0.8 else "square" if ratio < 1.3 else "banner" if ratio > 2.2 else "wide"
+    return name, LAYOUTS[name]
+
+
+# ==================== FONTS ====================
+
+def _normalize_font_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+@lru_cache(maxsize=1)
+def _font_index() -> Dict[str, str]:
+    """Map normalized font file stems to paths (built once per process)."""
+    index: Dict[str, str] = {}
+    for directory in FONT_DIRS:
+        root = Path(directory)
+        if not root.is_dir():
+            continue
+        for path in root.rglob("*"):
+            if path.suffix.lower() in (".ttf", ".otf", ".ttc"):
+                index.setdefault(_normalize_font_name(path.stem), str(path))
+    return index
+
+
+@lru_cache(maxsize=64)
+def _resolve_font_path(family: Optional[str], weight: str) -> Optional[str]:
+    """Find a font file for a family name, preferring the requested weight."""
+    index = _font_index()
+    candidates: List[str] = []
+    if family:
+        base = _normalize_font_name(family)
+        if weight == "bold":
+            candidates += [base + "bold", base + "extrabold", base + "semibold", base + "black"]
+        candidates += [base + "regular", base]
+    candidates += [_normalize_font_name(name) for name in FALLBACK_FONTS[weight]]
+
+    for candidate in candidates:
+        if candidate in index:
+            return index[candidate]
+    return None
+
+
+@lru_cache(maxsize=256)
+def get_font(family: Optional[str], weight: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Load a font (cached per family, weight and pixel size).
+
+    Args:
+        family: Brand font family (e.g. "Poppins"), or None for the fallback
+        weight: "bold" or "regular"
+        size: Pixel size
+
+    Returns:
+        Loaded font
+    """
+    path = _resolve_font_path(family, weight)
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size)
+
+
+# ==================== COMPOSITOR ====================
+
+class TextCompositor:
+    """
+    Renders headline, subheadline and call-to-action onto a background.
+
+    Thread-safe; rendering is CPU-bound, so async callers should use
+    asyncio.to_thread.
+    """
+
+    def __init__(self, background_cache_size: int = 16):
+        """
+        Initialize the compositor.
+
+        Args:
+            background_cache_size: Number of decoded backgrounds kept for re-rendering
+        """
+        self.background_cache_size = background_cache_size
+        self._backgrounds: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        background: bytes,
+        copy: Dict,
+        brand_data: Union[Dict, BrandProfile, None],
+        platform: str = "instagram_post"
+    ) -> bytes:
+        """
+        Draw marketing copy onto a background image.
+
+        Args:
+            background: Background image bytes (any format PIL reads)
+            copy: Dict with headline, subheadline and call_to_action (all optional)
+            brand_data: Brand dict or compiled BrandProfile (fonts and colors)
+            platform: Platform key used to pick the layout template
+
+        Returns:
+            PNG image bytes
+        """
+        brand = as_brand_profile(brand_data)
+        canvas = self._background(background).copy()
+        width, height = canvas.size
+        layout_name, layout = layout_for(platform, width, height)
+
+        scrim = _scrim(width, height, layout_name)
+        canvas.alpha_composite(scrim)
+
+        draw = ImageDraw.Draw(canvas)
+        unit = min(width, height)
+        left, top, right, bottom = (
+            int(layout["box"][0] * width), int(layout["box"][1] * height),
+            int(layout["box"][2] * width), int(layout["box"][3] * height),
+        )
+        box_width = right - left
+
+        # Shrink everything together until the stack fits the box height
+        scale = 1.0
+        while True:
+            blocks, total = _layout_blocks(copy, brand, layout, unit * scale, box_width)
+            if total <= bottom - top or scale < 0.4:
+                break
+            scale *= 0.9
+        y = top + max(0, (bottom - top - total) // 2)
+
+        accent = brand.primary_color or "#E94560"
+        accent_rgb = hex_to_rgb(accent)
+        for kind, font, lines, gap in blocks:
+            if kind == "call_to_action":
+                pad_x, pad_y = _cta_padding(font)
+                text_width = int(font.getlength(lines[0]))
+                button_width = text_width + 2 * pad_x
+                button_height = _line_height(font) + 2 * pad_y
+                x = _aligned_x(layout["align"], left, right, button_width)
+                draw.rounded_rectangle(
+                    [x, y, x + button_width, y + button_height],
+                    radius=button_height // 2, fill=accent_rgb + (255,)
+                )
+                draw.text(
+                    (x + button_width // 2, y + button_height // 2), lines[0],
+                    font=font, fill=_contrast_text(accent_rgb), anchor="mm"
+                )
+                y += button_height + gap
+                continue
+
+            fill = (255, 255, 255, 255) if kind == "headline" else (255, 255, 255, 225)
+            for line in lines:
+                x = _aligned_x(layout["align"], left, right, int(font.getlength(line)))
+                draw.text((x, y), line, font=font, fill=fill)
+                y += _line_height(font)
+            y += gap
+
+        output = io.BytesIO()
+        canvas.convert("RGB").save(output, format="PNG")
+        return output.getvalue()
+
+    def _background(self, data: bytes) -> Image.Image:
+        """Decode a background once; variants of the same image reuse it."""
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            cached = self._backgrounds.get(key)
+            if cached is not None:
+                self._backgrounds.move_to_end(key)
+                return cached
+
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        with self._lock:
+            self._backgrounds[key] = image
+            while len(self._backgrounds) > self.background_cache_size:
+                self._backgrounds.popitem(last=False)
+        return image
+
+
+# ==================== HELPERS ====================
+
+def _line_height(font: ImageFont.FreeTypeFont) -> int:
+    return int(font.size * 1.15)
+
+
+def _cta_padding(font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
+    return int(font.size * 0.9), int(font.size * 0.55)
+
+
+def _layout_blocks(
+    copy: Dict,
+    brand: BrandProfile,
+    layout: Dict,
+    unit: float,
+    box_width: int
+) -> Tuple[List[Tuple[str, ImageFont.FreeTypeFont, List[str], int]], int]:
+    """
+    Fit each copy element into the box width.
+
+    Returns:
+        ([(kind, font, lines, gap after)], total stack height in px)
+    """
+    blocks = []
+    if copy.get("headline"):
+        font, lines = _fit_text(
+            copy["headline"], brand.font_primary, "bold",
+            int(layout["headline_size"] * unit), box_width, _MAX_HEADLINE_LINES
+        )
+        blocks.append(("headline", font, lines, int(font.size * 0.35)))
+    if copy.get("subheadline"):
+        font, lines = _fit_text(
+            copy["subheadline"], brand.font_secondary or brand.font_primary, "regular",
+            int(layout["subheadline_size"] * unit), box_width, 2
+        )
+        blocks.append(("subheadline", font, lines, int(font.size * 0.9)))
+    if copy.get("call_to_action"):
+        font = get_font(brand.font_primary, "bold", max(_MIN_FONT_PX, int(layout["cta_size"] * unit)))
+        blocks.append(("call_to_action", font, [copy["call_to_action"]], 0))
+
+    total = 0
+    for kind, font, lines, gap in blocks:
+        if kind == "call_to_action":
+            total += _line_height(font) + 2 * _cta_padding(font)[1]
+        else:
+            total += _line_height(font) * len(lines)
+        total += gap
+    return blocks, total
+
+
+def _wrap(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    """Greedy word wrap to a pixel width."""
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and font.getlength(candidate) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _fit_text(
+    text: str,
+    family: Optional[str],
+    weight: str,
+    size: int,
+    max_width: int,
+    max_lines: int
+) -> Tuple[ImageFont.FreeTypeFont, List[str]]:
+    """Shrink the font until the text wraps into max_lines within max_width."""
+    while True:
+        font = get_font(family, weight, size)
+        lines = _wrap(text, font, max_width)
+        fits = len(lines) <= max_lines and all(font.getlength(line) <= max_width for line in lines)
+        if fits or size <= _MIN_FONT_PX:
+            return font, lines[:max_lines]
+        size = max(_MIN_FONT_PX, int(size * 0.9))
+
+
+def _aligned_x(align: str, left: int, right: int, width: int) -> int:
+    if align == "center":
+        return left + (right - left - width) // 2
+    return left
+
+
+def _contrast_text(rgb: Tuple[int, int, int]) -> Tuple[int, int, int, int]:
+    """Black or white, whichever reads better on the given fill."""
+    luminance = 0.2126 * rgb[0] + 0.7152 * rgb[1] + 0.0722 * rgb[2]
+    return (17, 17, 17, 255) if luminance > 150 else (255, 255, 255, 255)
+
+
+@lru_cache(maxsize=32)
+def _scrim(width: int, height: int, layout_name: str) -> Image.Image:
+    """Dark gradient behind the text area so copy stays legible on any background."""
+    alpha = Image.new("L", (width, height), 0)
+    # 0 at the top edge, 255 at the bottom edge
+    ramp = Image.linear_gradient("L").point(lambda v: v * _SCRIM_MAX_ALPHA // 255)
+
+    if LAYOUTS[layout_name]["scrim"] == "bottom":
+        start = int(height * 0.4)
+        alpha.paste(ramp.resize((width, height - start)), (0, start))
+    else:
+        # Opaque side on the left, fading out towards the middle
+        end = int(width * 0.65)
+        ramp = ramp.rotate(-90, expand=True)
+        alpha.paste(ramp.resize((end, height)), (0, 0))
+
+    scrim = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    scrim.putalpha(alpha)
+    return scrim
+
+
+# ==================== LOGOS ====================
+
+# Logo box per placement: anchor corner, size as a fraction of the shorter side
+LOGO_PLACEMENTS = {
+    "top_left": {"anchor": ("left", "top"), "size": 0.16},
+    "top_right": {"anchor": ("right", "top"), "size": 0.16},
+    "bottom_left": {"anchor": ("left", "bottom"), "size": 0.16},
+    "bottom_right": {"anchor": ("right", "bottom"), "size": 0.16},
+}
+
+# Default placement per text layout, away from where the copy goes
+DEFAULT_LOGO_PLACEMENT = {
+    "square": "top_right",
+    "tall": "top_right",
+    "wide": "top_right",
+    "banner": "bottom_right",
+}
+
+_LOGO_MARGIN = 0.04
+
+
+class LogoCompositor:
+    """
+    Places brand logos onto finished assets.
+
+    Each distinct logo is decoded once. For every canvas size (all platform
+    sizes up front when given) and placement, a scaled copy is kept as
+    premultiplied color plus an inverted alpha mask, so placing it is one
+    multiply and one add over the logo's box:
+
+        out = logo * alpha + background * (1 - alpha)
+    """
+
+    def __init__(self, platform_sizes: Optional[Dict[str, Dict]] = None, max_logos: int = 32):
+        """
+        Initialize the compositor.
+
+        Args:
+            platform_sizes: PLATFORM_SIZES; variants for all of them are built
+                when a logo is first seen
+            max_logos: Number of distinct logos kept
+        """
+        self.sizes = [(s["width"], s["height"]) for s in (platform_sizes or {}).values()]
+        self.max_logos = max_logos
+        # logo hash -> {(width, height, placement): (premultiplied RGB, inverse alpha RGB, offset)}
+        self._logos: "OrderedDict[str, Dict[Tuple[int, int, str], Tuple]]" = OrderedDict()
+        self._sources: Dict[str, Image.Image] = {}
+        self._lock = threading.Lock()
+
+    def composite(
+        self,
+        image_data: bytes,
+        logo_data: bytes,
+        platform: str = "instagram_post",
+        placement: Optional[str] = None
+    ) -> bytes:
+        """
+        Paste a logo onto an image.
+
+        Args:
+            image_data: Finished asset bytes
+            logo_data: Logo bytes (PNG with transparency recommended)
+            platform: Platform key (selects the default placement)
+            placement: One of LOGO_PLACEMENTS (defaults per layout)
+
+        Returns:
+            PNG image bytes
+        """
+        canvas = Image.open(io.BytesIO(image_data)).convert("RGB")
+        width, height = canvas.size
+        if placement not in LOGO_PLACEMENTS:
+            layout_name, _ = layout_for(platform, width, height)
+            placement = DEFAULT_LOGO_PLACEMENT[layout_name]
+
+        premultiplied, inverse_alpha, offset = self._variant(logo_data, width, height, placement)
+        box = (offset[0], offset[1], offset[0] + premultiplied.width, offset[1] + premultiplied.height)
+        region = canvas.crop(box)
+        blended = ImageChops.add(ImageChops.multiply(region, inverse_alpha), premultiplied)
+        canvas.paste(blended, box)
+
+        output = io.BytesIO()
+        canvas.save(output, format="PNG")
+        return output.getvalue()
+
+    def _variant(self, logo_data: bytes, width: int, height: int, placement: str) -> Tuple:
+        """Get (building if needed) the scaled, premultiplied logo for a canvas."""
+        key = hashlib.sha256(logo_data).hexdigest()
+        with self._lock:
+            variants = self._logos.get(key)
+            if variants is not None:
+                self._logos.move_to_end(key)
+                variant = variants.get((width, height, placement))
+                if variant is not None:
+                    return variant
+
+        if variants is None:
+            source = Image.open(io.BytesIO(logo_data)).convert("RGBA")
+            # Build every platform size and placement up front
+            variants = {
+                (w, h, name): _scale_logo(source, w, h, name)
+                for w, h in self.sizes for name in LOGO_PLACEMENTS
+            }
+            with self._lock:
+                self._sources[key] = source
+                self._logos[key] = variants
+                while len(self._logos) > self.max_logos:
+                    evicted, _ = self._logos.popitem(last=False)
+                    self._sources.pop(evicted, None)
+
+        variant = variants.get((width, height, placement))
+        if variant is None:
+            with self._lock:
+                source = self._sources.get(key)
+            if source is None:
+                source = Image.open(io.BytesIO(logo_data)).convert("RGBA")
+            variant = _scale_logo(source, width, height, placement)
+            with self._lock:
+                variants[(width, height, placement)] = variant
+        return variant
+
+
+def _scale_logo(source: Image.Image, width: int, height: int, placement: str) -> Tuple:
+    """Scale a logo for a canvas; returns (premultiplied RGB, inverse alpha RGB, offset)."""
+    spec = LOGO_PLACEMENTS[placement]
+    unit = min(width, height)
+    box = max(1, int(unit * spec["size"]))
+    margin = int(unit * _LOGO_MARGIN)
+
+    # Resample in premultiplied space so transparent edges don't bleed dark fringes
+    logo = source.convert("RGBa")
+    logo.thumbnail((box, box), Image.Resampling.LANCZOS)
+    # RGBa channels already hold color * alpha
+    red, green, blue, alpha = logo.split()
+    premultiplied = Image.merge("RGB", (red, green, blue))
+    inverse_alpha = Image.merge("RGB", (ImageChops.invert(alpha),) * 3)
+
+    horizontal, vertical = spec["anchor"]
+    x = margin if horizontal == "left" else width - margin - logo.width
+    y = margin if vertical == "top" else height - margin - logo.height
+    return premultiplied, inverse_alpha, (x, y)
@@ -0,0 +1,153 @@
+"""
+Drive Folder Index - cached logical-path to folder-ID resolution.
+
+Google Drive addresses folders by ID, not by path. Resolving a logical path
+such as ``clients/<client>/generated/<campaign>/<platform>`` means one lookup
+per segment. This index remembers every folder it has resolved so that
+repeated saves and brand reads skip the folder walk entirely.
+
+Layout under the root folder:
+- clients/<client>/brand-assets
+- clients/<client>/past-campaigns
+- clients/<client>/generated/<campaign>/<platform>
+"""
+from typing import Optional, Dict, List
+from dataclasses import dataclass
+import threading
+import time
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+
+@dataclass
+class _IndexEntry:
+    """Cached folder ID with its expiry time."""
+    folder_id: str
+    expires_at: float
+
+
+class DriveFolderIndex:
+    """
+    In-process map of logical Drive paths to folder IDs.
+
+    Entries are populated lazily on first resolve, expire after a TTL and can
+    be invalidated explicitly (e.g. after a folder is moved or deleted).
+    Missing folders can be created on demand; creation looks the folder up
+    first, so repeated calls never create duplicates.
+    """
+
+    def __init__(self, service, root_folder_id: str, ttl_seconds: float = 600.0):
+        """
+        Initialize the folder index.
+
+        Args:
+            service: Google Drive v3 API service
+            root_folder_id: ID of the root folder that logical paths are relative to
+            ttl_seconds: How long a resolved folder ID stays valid
+        """
+        self.service = service
+        self.root_folder_id = root_folder_id
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, _IndexEntry] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _split(path: str) -> List[str]:
+        """Split a logical path into its non-empty segments."""
+        return [segment for segment in path.strip("/").split("/") if segment]
+
+    def resolve(self, path: str, create: bool = False) -> Optional[str]:
+        """
+        Resolve a logical path to a Drive folder ID.
+
+        Only the segments below the deepest cached ancestor are looked up, so
+        a warm index answers without any API call.
+
+        Args:
+            path: Logical path relative to the root folder
+            create: Create missing folders instead of returning None
+
+        Returns:
+            Folder ID, or None if the path does not exist and create is False
+        """
+        segments = self._split(path)
+
+        with self._lock:
+            now = time.monotonic()
+
+            # Find the deepest ancestor we already know
+            parent_id = self.root_folder_id
+            start = 0
+            for depth in range(len(segments), 0, -1):
+                entry = self._entries.get("/".join(segments[:depth]))
+                if entry and entry.expires_at > now:
+                    parent_id = entry.folder_id
+                    start = depth
+                    break
+
+            # Walk (and optionally create) the remaining segments
+            for depth in range(start, len(segments)):
+                name = segments[depth]
+                folder_id = self._find_child_folder(parent_id, name)
+                if folder_id is None:
+                    if not create:
+                        return None
+                    folder_id = self._create_folder(parent_id, name)
+                self.prime("/".join(segments[:depth + 1]), folder_id)
+                parent_id = folder_id
+
+            return parent_id
+
+    def prime(self, path: str, folder_id: str):
+        """Record a known path -> folder ID mapping (e.g. from a listing)."""
+        key = "/".join(self._split(path))
+        with self._lock:
+            self._entries[key] = _IndexEntry(
+                folder_id=folder_id,
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Drop cached entries for a path and everything below it.
+
+        Args:
+            path: Logical path to invalidate, or None to clear the whole index
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+
+            key = "/".join(self._split(path))
+            prefix = key + "/"
+            for cached in list(self._entries):
+                if cached == key or cached.startswith(prefix):
+                    del self._entries[cached]
+
+    # ==================== DRIVE LOOKUPS ====================
+
+    def _find_child_folder(self, parent_id: str, name: str) -> Optional[str]:
+        """Look up a folder by name directly under a parent folder."""
+        escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+        results = self.service.files().list(
+            q=(
+                f"'{parent_id}' in parents and name = '{escaped}' "
+                f"and mimeType = '{FOLDER_MIME_TYPE}' and trashed = false"
+            ),
+            fields="files(id, name)",
+            orderBy="createdTime",
+            pageSize=1
+        ).execute()
+
+        files = results.get("files", [])
+        return files[0]["id"] if files else None
+
+    def _create_folder(self, parent_id: str, name: str) -> str:
+        """Create a folder under a parent folder."""
+        folder = self.service.files().create(
+            body={"name": name, "mimeType": FOLDER_MIME_TYPE, "parents": [parent_id]},
+            fields="id"
+        ).execute()
+        return folder["id"]
@@ -0,0 +1,476 @@
+"""
+Drive Metadata Mirror - local SQLite copy of the client folder tree.
+
+The read tools (list_clients, get_brand_assets, get_past_campaigns) sit on the
+UI's critical path. Instead of hitting Drive on every call, the mirror keeps
+folder/file metadata (plus the small brand files) in SQLite and stays current
+by replaying the Drive change feed (changes.getStartPageToken / changes.list).
+
+A sync works on a private copy of the database, so the Drive calls it makes
+never hold the lock readers take; the result is copied back in one step.
+
+Mirrored layout under the root folder:
+- clients/<client>/brand-assets/{colors.json, guidelines.md}
+- clients/<client>/past-campaigns/<campaign>/<images>
+
+Generated output (clients/<client>/generated/...) is write-only and is not
+mirrored.
+"""
+from typing import Optional, List, Dict
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+from .drive_index import FOLDER_MIME_TYPE
+
+
+# Folders whose contents are never mirrored
+EXCLUDED_FOLDERS = {"generated"}
+
+# Brand files whose content is mirrored alongside metadata
+BRAND_CONTENT_FILES = {"colors.json", "guidelines.md"}
+
+# Logo files picked up from brand-assets/ (first match wins); exposed as drive://<file_id>
+LOGO_FILES = ("logo.png", "logo.webp", "logo.jpg")
+
+FILE_FIELDS = "id, name, mimeType, parents, description, modifiedTime, md5Checksum, trashed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    mime_type TEXT,
+    parent_id TEXT,
+    description TEXT,
+    modified_time TEXT,
+    md5_checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_parent ON files(parent_id, name);
+CREATE TABLE IF NOT EXISTS contents (
+    file_id TEXT PRIMARY KEY,
+    md5_checksum TEXT,
+    data BLOB
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class DriveMetadataMirror:
+    """
+    SQLite mirror of Drive client/brand/campaign metadata.
+
+    The first sync crawls the tree; later syncs only apply the change feed
+    since the stored page token. Reads never touch the network.
+    """
+
+    def __init__(
+        self,
+        service,
+        root_folder_id: str,
+        db_path: str = "./.cache/drive_mirror.sqlite3",
+        sync_interval: float = 60.0
+    ):
+        """
+        Initialize the mirror.
+
+        Args:
+            service: Google Drive v3 API service (or FakeDriveService)
+            root_folder_id: ID of the root folder to mirror
+            db_path: SQLite database path (":memory:" for an ephemeral mirror)
+            sync_interval: Seconds between background syncs
+        """
+        self.service = service
+        self.root_folder_id = root_folder_id
+        self.sync_interval = sync_interval
+
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.RLock()  # Guards self._db (reads, and publishing a sync)
+        self._sync_lock = threading.Lock()  # One sync at a time
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    # ==================== SYNC ====================
+
+    def sync(self, force_full: bool = False):
+        """
+        Bring the mirror up to date.
+
+        Args:
+            force_full: Discard the change token and re-crawl the whole tree
+        """
+        with self._sync_lock:
+            staging = sqlite3.connect(":memory:")
+            staging.row_factory = sqlite3.Row
+            try:
+                with self._lock:
+                    self._db.backup(staging)
+
+                # Drive calls run against the copy; a failed sync is simply discarded
+                token = None if force_full else self._get_state("page_token", staging)
+                if token is None:
+                    self._full_sync(staging)
+                else:
+                    self._apply_changes(staging, token)
+                self._set_state("synced_at", str(time.time()), staging)
+                staging.commit()
+
+                with self._lock:
+                    staging.backup(self._db)
+            finally:
+                staging.close()
+
+    def _full_sync(self, db: sqlite3.Connection):
+        """Crawl the tree from the root and record a fresh change token."""
+        # Take the token first so changes made during the crawl are replayed
+        token = self.service.changes().getStartPageToken().execute()["startPageToken"]
+
+        db.execute("DELETE FROM files")
+        db.execute("DELETE FROM contents")
+        db.execute(
+            "INSERT INTO files (id, name, mime_type, parent_id) VALUES (?, ?, ?, NULL)",
+            (self.root_folder_id, "", FOLDER_MIME_TYPE)
+        )
+
+        self._crawl(db, self.root_folder_id)
+        self._set_state("page_token", token, db)
+
+    def _crawl(self, db: sqlite3.Connection, folder_id: str):
+        """Mirror everything below a tracked folder."""
+        pending = [folder_id]
+        while pending:
+            parent_id = pending.pop()
+            page_token = None
+            while True:
+                results = self.service.files().list(
+                    q=f"'{parent_id}' in parents and trashed = false",
+                    fields=f"nextPageToken, files({FILE_FIELDS})",
+                    pageSize=1000,
+                    pageToken=page_token
+                ).execute()
+
+                for file in results.get("files", []):
+                    self._upsert(db, file, parent_id)
+                    if file.get("mimeType") == FOLDER_MIME_TYPE and file["name"] not in EXCLUDED_FOLDERS:
+                        pending.append(file["id"])
+
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+
+    def _apply_changes(self, db: sqlite3.Connection, token: str):
+        """
+        Replay the Drive change feed from a stored page token.
+
+        The feed lists each file once, at its latest change, so a file can
+        arrive before the folder that makes it part of the tree, and a folder
+        moved into the tree arrives without its descendants. Files whose
+        parent is not tracked yet are held until the end of the replay, and
+        folders that become tracked are crawled.
+        """
+        unresolved: Dict[str, Dict] = {}
+        while token:
+            results = self.service.changes().list(
+                pageToken=token,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+                pageSize=1000
+            ).execute()
+
+            for change in results.get("changes", []):
+                file = change.get("file")
+                if change.get("removed") or not file or file.get("trashed"):
+                    self._delete_subtree(db, change["fileId"])
+                    continue
+
+                parent_id = next(
+                    (p for p in file.get("parents", []) if self._is_tracked_folder(db, p)),
+                    None
+                )
+                if parent_id is None:
+                    unresolved[file["id"]] = file
+                else:
+                    unresolved.pop(file["id"], None)
+                    self._upsert_tracking(db, file, parent_id)
+
+            if "newStartPageToken" in results:
+                self._set_state("page_token", results["newStartPageToken"], db)
+                break
+            token = results.get("nextPageToken")
+
+        # Place held files whose parent has since become tracked; repeat, as
+        # placing a folder can resolve its held children
+        progress = True
+        while unresolved and progress:
+            progress = False
+            for file_id, file in list(unresolved.items()):
+                parent_id = next(
+                    (p for p in file.get("parents", []) if self._is_tracked_folder(db, p)),
+                    None
+                )
+                if parent_id is not None:
+                    del unresolved[file_id]
+                    self._upsert_tracking(db, file, parent_id)
+                    progress = True
+
+        for file_id in unresolved:
+            # Moved out of (or never inside) the mirrored tree
+            self._delete_subtree(db, file_id)
+
+    def _upsert_tracking(self, db: sqlite3.Connection, file: Dict, parent_id: str):
+        """Upsert a changed file; a folder whose contents were not mirrored yet is crawled."""
+        newly_tracked = False
+        if file.get("mimeType") == FOLDER_MIME_TYPE and file["name"] not in EXCLUDED_FOLDERS:
+            row = db.execute("SELECT name FROM files WHERE id = ?", (file["id"],)).fetchone()
+            newly_tracked = row is None or row["name"] in EXCLUDED_FOLDERS
+        self._upsert(db, file, parent_id)
+        if newly_tracked:
+            self._crawl(db, file["id"])
+
+    @staticmethod
+    def _is_tracked_folder(db: sqlite3.Connection, folder_id: str) -> bool:
+        """Whether children of this folder belong in the mirror."""
+        row = db.execute(
+            "SELECT name, mime_type FROM files WHERE id = ?", (folder_id,)
+        ).fetchone()
+        return (
+            row is not None
+            and row["mime_type"] == FOLDER_MIME_TYPE
+            and row["name"] not in EXCLUDED_FOLDERS
+        )
+
+    def _upsert(self, db: sqlite3.Connection, file: Dict, parent_id: str):
+        """Insert or update one file row, refreshing mirrored content if needed."""
+        db.execute(
+            """
+            INSERT INTO files (id, name, mime_type, parent_id, description, modified_time, md5_checksum)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                mime_type = excluded.mime_type,
+                parent_id = excluded.parent_id,
+                description = excluded.description,
+                modified_time = excluded.modified_time,
+                md5_checksum = excluded.md5_checksum
+            """,
+            (
+                file["id"], file["name"], file.get("mimeType"), parent_id,
+                file.get("description", ""), file.get("modifiedTime"), file.get("md5Checksum")
+            )
+        )
+
+        if file["name"] in BRAND_CONTENT_FILES:
+            parent = db.execute("SELECT name FROM files WHERE id = ?", (parent_id,)).fetchone()
+            cached = db.execute(
+                "SELECT md5_checksum FROM contents WHERE file_id = ?", (file["id"],)
+            ).fetchone()
+            if parent and parent["name"] == "brand-assets" and (
+                cached is None or cached["md5_checksum"] != file.get("md5Checksum")
+            ):
+                data = self.service.files().get_media(fileId=file["id"]).execute()
+                db.execute(
+                    "INSERT OR REPLACE INTO contents (file_id, md5_checksum, data) VALUES (?, ?, ?)",
+                    (file["id"], file.get("md5Checksum"), data)
+                )
+
+    @staticmethod
+    def _delete_subtree(db: sqlite3.Connection, file_id: str):
+        """Remove a file and, for folders, everything below it."""
+        pending = [file_id]
+        while pending:
+            current = pending.pop()
+            pending.extend(
+                row["id"] for row in
+                db.execute("SELECT id FROM files WHERE parent_id = ?", (current,))
+            )
+            db.execute("DELETE FROM files WHERE id = ?", (current,))
+            db.execute("DELETE FROM contents WHERE file_id = ?", (current,))
+
+    # ==================== BACKGROUND SYNC ====================
+
+    def start(self):
+        """Start periodic background syncing (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sync_loop, name="drive-mirror-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop background syncing."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _sync_loop(self):
+        """Sync immediately, then every sync_interval seconds until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Drive mirror sync failed: {e}")
+            self._stop_event.wait(self.sync_interval)
+
+    # ==================== READS ====================
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        """Epoch time of the last successful sync, or None if never synced."""
+        with self._lock:
+            value = self._get_state("synced_at")
+        return float(value) if value else None
+
+    def freshness(self) -> Dict:
+        """Describe how current the mirror is."""
+        synced_at = self.synced_at
+        age = time.time() - synced_at if synced_at else None
+        return {
+            "synced_at": synced_at,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stale": age is None or age > 2 * self.sync_interval,
+            "background_sync": bool(self._thread and self._thread.is_alive()),
+            "last_error": self.last_error,
+        }
+
+    def list_clients(self) -> List[Dict]:
+        """List client folders."""
+        clients_id = self._child_id(self.root_folder_id, "clients")
+        if clients_id is None:
+            return []
+        return [
+            {"id": row["name"], "name": row["name"], "description": row["description"] or "", "folder_id": row["id"]}
+            for row in self._children(clients_id, folders_only=True)
+        ]
+
+    def get_brand_assets(self, client_id: str) -> Optional[Dict]:
+        """Build brand data from mirrored brand files, or None if the client is unknown."""
+        folder_id = self._client_folder(client_id, "brand-assets")
+        if folder_id is None:
+            return None
+
+        brand = {"name": client_id}
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT f.name, c.data FROM files f JOIN contents c ON c.file_id = f.id
+                WHERE f.parent_id = ?
+                """,
+                (folder_id,)
+            ).fetchall()
+        contents = {row["name"]: row["data"] for row in rows}
+
+        if "colors.json" in contents:
+            brand.update(json.loads(contents["colors.json"]))
+        if "guidelines.md" in contents:
+            brand["guidelines"] = contents["guidelines.md"].decode("utf-8")
+        if not brand.get("logo_url"):
+            logos = {row["name"]: row["id"] for row in self._children(folder_id) if row["name"] in LOGO_FILES}
+            for name in LOGO_FILES:
+                if name in logos:
+                    brand["logo_url"] = f"drive://{logos[name]}"
+                    break
+        return brand
+
+    def brand_signature(self, client_id: str) -> Optional[str]:
+        """Fingerprint of a client's brand files, or None if the client is unknown."""
+        folder_id = self._client_folder(client_id, "brand-assets")
+        if folder_id is None:
+            return None
+        return ",".join(
+            f"{row['name']}:{row['md5_checksum']}"
+            for row in self._children(folder_id)
+            if row["name"] in BRAND_CONTENT_FILES or row["name"] in LOGO_FILES
+        )
+
+    def get_past_campaigns(self, client_id: str) -> List[Dict]:
+        """List past campaign folders with their images."""
+        folder_id = self._client_folder(client_id, "past-campaigns")
+        if folder_id is None:
+            return []
+
+        campaigns = []
+        for campaign in self._children(folder_id, folders_only=True):
+            images = [
+                {"id": row["id"], "name": row["name"], "thumbnail": None}
+                for row in self._children(campaign["id"])
+                if (row["mime_type"] or "").startswith("image/")
+            ]
+            campaigns.append({
+                "id": campaign["id"],
+                "name": campaign["name"],
+                "date": (campaign["modified_time"] or "")[:10],
+                "images": images,
+            })
+        return campaigns
+
+    def file_version(self, file_id: str) -> Optional[str]:
+        """Return a mirrored file's md5Checksum (or modifiedTime), if known."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT md5_checksum, modified_time FROM files WHERE id = ?", (file_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["md5_checksum"] or row["modified_time"]
+
+    def folder_paths(self) -> Dict[str, str]:
+        """Map logical folder paths to IDs (used to warm DriveFolderIndex)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, name, parent_id FROM files WHERE mime_type = ?", (FOLDER_MIME_TYPE,)
+            ).fetchall()
+
+        by_id = {row["id"]: row for row in rows}
+        paths = {}
+        for row in rows:
+            parts = []
+            current = row
+            while current is not None and current["id"] != self.root_folder_id:
+                parts.append(current["name"])
+                current = by_id.get(current["parent_id"])
+            if current is not None and parts:
+                paths["/".join(reversed(parts))] = row["id"]
+        return paths
+
+    # ==================== HELPERS ====================
+
+    def _client_folder(self, client_id: str, name: str) -> Optional[str]:
+        """Resolve clients/<client_id>/<name> from the mirror."""
+        clients_id = self._child_id(self.root_folder_id, "clients")
+        client_folder = self._child_id(clients_id, client_id) if clients_id else None
+        return self._child_id(client_folder, name) if client_folder else None
+
+    def _child_id(self, parent_id: str, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM files WHERE parent_id = ? AND name = ? LIMIT 1", (parent_id, name)
+            ).fetchone()
+        return row["id"] if row else None
+
+    def _children(self, parent_id: str, folders_only: bool = False) -> List[sqlite3.Row]:
+        query = "SELECT * FROM files WHERE parent_id = ?"
+        params = [parent_id]
+        if folders_only:
+            query += " AND mime_type = ?"
+            params.append(FOLDER_MIME_TYPE)
+        with self._lock:
+            return self._db.execute(query + " ORDER BY name", params).fetchall()
+
+    def _get_state(self, key: str, db: Optional[sqlite3.Connection] = None) -> Optional[str]:
+        row = (db or self._db).execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: str, db: sqlite3.Connection):
+        db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
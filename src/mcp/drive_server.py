@@ -6,13 +6,73 @@ Provides standardized tool interface for:
 - Getting brand assets
 - Getting past campaign references
 - Saving generated images
+- Finding previously generated assets similar to a new request
+
+Read tools are served from a local metadata mirror (see drive_mirror.py)
+when connected to Drive.
 """
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 import json
 from pathlib import Path
+import asyncio
 import io
 
+from .asset_index import AssetIndex
+from .blob_cache import DiskBlobCache
+from .brand_profile import BrandProfile, BrandProfileCache
+from .drive_index import DriveFolderIndex, FOLDER_MIME_TYPE
+from .drive_mirror import DriveMetadataMirror, LOGO_FILES
+
+
+# Mock brand data used in mock mode
+MOCK_BRANDS = {
+    "burgers-and-curries": {
+        "name": "Burgers & Curries",
+        "colors": ["#FF5733", "#FFC300", "#2E4053"],
+        "primary_color": "#FF5733",
+        "secondary_color": "#FFC300",
+        "font_primary": "Poppins",
+        "font_secondary": "Open Sans",
+        "style": "Warm, inviting, fusion cuisine. Bold colors, appetizing food photography.",
+        "tagline": "Where East Meets West",
+        "logo_url": None,
+        "guidelines": "Always show food prominently. Use warm lighting. Include brand colors in composition."
+    },
+    "tech-startup-xyz": {
+        "name": "Tech Startup XYZ",
+        "colors": ["#3498DB", "#2ECC71", "#FFFFFF", "#1A1A2E"],
+        "primary_color": "#3498DB",
+        "secondary_color": "#2ECC71",
+        "font_primary": "Inter",
+        "font_secondary": "Roboto Mono",
+        "style": "Modern, clean, professional. Minimalist design with tech aesthetics.",
+        "tagline": "Innovate. Scale. Succeed.",
+        "logo_url": None,
+        "guidelines": "Clean backgrounds, geometric shapes, modern gradients acceptable."
+    },
+    "fashion-brand-abc": {
+        "name": "Fashion Brand ABC",
+        "colors": ["#000000", "#FFFFFF", "#C9A962"],
+        "primary_color": "#000000",
+        "secondary_color": "#C9A962",
+        "font_primary": "Playfair Display",
+        "font_secondary": "Montserrat",
+        "style": "Luxury, elegant, sophisticated. High contrast, editorial feel.",
+        "tagline": "Timeless Elegance",
+        "logo_url": None,
+        "guidelines": "High-end aesthetic, clean compositions, luxury feel."
+    }
+}
+
+# Fallback for unknown clients ("name" is filled in with the client ID)
+DEFAULT_MOCK_BRAND = {
+    "colors": ["#333333", "#666666"],
+    "primary_color": "#333333",
+    "style": "Professional",
+    "guidelines": "Standard professional marketing."
+}
+
 
 @dataclass
 class MCPToolResult:
@@ -34,7 +94,13 @@ class DriveMCPServer:
         self,
         service_account_json: Optional[str] = None,
         root_folder_id: Optional[str] = None,
-        mock_mode: bool = True
+        mock_mode: bool = True,
+        index_ttl_seconds: float = 600.0,
+        service=None,
+        mirror_db_path: Optional[str] = "./.cache/drive_mirror.sqlite3",
+        mirror_sync_interval: float = 60.0,
+        blob_cache: Optional[DiskBlobCache] = None,
+        asset_index_path: Optional[str] = "./.cache/asset_index.sqlite3"
     ):
         """
         Initialize Drive MCP Server.
@@ -43,12 +109,33 @@ class DriveMCPServer:
             service_account_json: Path to service account JSON
             root_folder_id: Root folder ID in Google Drive
             mock_mode: Use mock data for development
+            index_ttl_seconds: How long resolved folder IDs are cached
+            service: Pre-built Drive service (e.g. FakeDriveService), bypasses credentials
+            mirror_db_path: SQLite path for the metadata mirror (None disables it)
+            mirror_sync_interval: Seconds between background mirror syncs
+            blob_cache: Shared on-disk cache for downloaded images
+            asset_index_path: SQLite path for the generated-asset similarity
+                index (None disables it)
         """
         self.root_folder_id = root_folder_id
         self.mock_mode = mock_mode
+        self.index_ttl_seconds = index_ttl_seconds
+        self.mirror_db_path = mirror_db_path
+        self.mirror_sync_interval = mirror_sync_interval
         self.service = None
-
-        if not mock_mode and service_account_json:
+        self.folder_index: Optional[DriveFolderIndex] = None
+        self.mirror: Optional[DriveMetadataMirror] = None
+        self.blob_cache = blob_cache
+        self.brand_profiles = BrandProfileCache()
+        # Logos fetched from URLs or local paths, by logo_url
+        self._logos: Dict[str, bytes] = {}
+        self.asset_index = AssetIndex(asset_index_path) if asset_index_path else None
+        # Assets saved locally before the index existed are picked up on first search
+        self._assets_scanned = False
+
+        if not mock_mode and service is not None:
+            self._attach_service(service)
+        elif not mock_mode and service_account_json:
             self._init_drive_service(service_account_json)
 
     def _init_drive_service(self, service_account_json: str):
@@ -61,12 +148,40 @@ class DriveMCPServer:
                 service_account_json,
                 scopes=['https://www.googleapis.com/auth/drive']
             )
-            self.service = build('drive', 'v3', credentials=credentials)
-            self.mock_mode = False
+            self._attach_service(build('drive', 'v3', credentials=credentials))
         except Exception as e:
             print(f"Drive service init failed, using mock mode: {e}")
             self.mock_mode = True
 
+    def _attach_service(self, service):
+        """Wire a Drive service to the folder index and metadata mirror."""
+        self.service = service
+        self.folder_index = DriveFolderIndex(
+            self.service,
+            self.root_folder_id,
+            ttl_seconds=self.index_ttl_seconds
+        )
+        if self.mirror_db_path:
+            self.mirror = DriveMetadataMirror(
+                self.service,
+                self.root_folder_id,
+                db_path=self.mirror_db_path,
+                sync_interval=self.mirror_sync_interval
+            )
+        if self.blob_cache is None:
+            self.blob_cache = DiskBlobCache()
+        self.mock_mode = False
+
+    def start_background_sync(self):
+        """Start keeping the metadata mirror in sync (no-op in mock mode)."""
+        if self.mirror:
+            self.mirror.start()
+
+    def stop_background_sync(self):
+        """Stop the metadata mirror's background sync."""
+        if self.mirror:
+            self.mirror.stop()
+
     # ==================== MCP TOOLS ====================
 
     def get_tools(self) -> List[Dict]:
@@ -80,22 +195,31 @@ class DriveMCPServer:
             {
                 "name": "list_clients",
                 "description": "List all available clients from Google Drive",
-                "parameters": {}
+                "parameters": {
+                    "force_refresh": {"type": "boolean", "required": False}
+                }
             },
             {
                 "name": "get_brand_assets",
                 "description": "Get brand assets (colors, logo, fonts) for a client",
                 "parameters": {
-                    "client_id": {"type": "string", "required": True}
+                    "client_id": {"type": "string", "required": True},
+                    "force_refresh": {"type": "boolean", "required": False}
                 }
             },
             {
                 "name": "get_past_campaigns",
                 "description": "Get list of past campaigns for reference images",
                 "parameters": {
-                    "client_id": {"type": "string", "required": True}
+                    "client_id": {"type": "string", "required": True},
+                    "force_refresh": {"type": "boolean", "required": False}
                 }
             },
+            {
+                "name": "get_sync_status",
+                "description": "Report how fresh the local Drive metadata mirror is",
+                "parameters": {}
+            },
             {
                 "name": "save_image",
                 "description": "Save generated image to Google Drive",
@@ -104,7 +228,29 @@ class DriveMCPServer:
                     "campaign_name": {"type": "string", "required": True},
                     "platform": {"type": "string", "required": True},
                     "image_data": {"type": "bytes", "required": True},
-                    "filename": {"type": "string", "required": True}
+                    "filename": {"type": "string", "required": True},
+                    "prompt": {"type": "string", "required": False},
+                    "brief": {"type": "string", "required": False},
+                    "theme": {"type": "string", "required": False}
+                }
+            },
+            {
+                "name": "find_similar_assets",
+                "description": "Find previously generated assets similar to a brief or an image",
+                "parameters": {
+                    "client_id": {"type": "string", "required": True},
+                    "text": {"type": "string", "required": False},
+                    "image_data": {"type": "bytes", "required": False},
+                    "platform": {"type": "string", "required": False},
+                    "k": {"type": "integer", "required": False},
+                    "min_score": {"type": "number", "required": False}
+                }
+            },
+            {
+                "name": "load_asset",
+                "description": "Load the image bytes of an indexed generated asset",
+                "parameters": {
+                    "asset_id": {"type": "string", "required": True}
                 }
             },
             {
@@ -113,6 +259,14 @@ class DriveMCPServer:
                 "parameters": {
                     "file_id": {"type": "string", "required": True}
                 }
+            },
+            {
+                "name": "get_logo",
+                "description": "Get a client's logo image (None if the brand has no logo)",
+                "parameters": {
+                    "client_id": {"type": "string", "required": True},
+                    "force_refresh": {"type": "boolean", "required": False}
+                }
             }
         ]
 
@@ -131,8 +285,12 @@ class DriveMCPServer:
             "list_clients": self.list_clients,
             "get_brand_assets": self.get_brand_assets,
             "get_past_campaigns": self.get_past_campaigns,
+            "get_sync_status": self.get_sync_status,
             "save_image": self.save_image,
-            "download_reference": self.download_reference
+            "find_similar_assets": self.find_similar_assets,
+            "load_asset": self.load_asset,
+            "download_reference": self.download_reference,
+            "get_logo": self.get_logo
         }
 
         if tool_name not in tool_map:
@@ -150,7 +308,7 @@ class DriveMCPServer:
 
     # ==================== TOOL IMPLEMENTATIONS ====================
 
-    async def list_clients(self) -> List[Dict]:
+    async def list_clients(self, force_refresh: bool = False) -> List[Dict]:
         """List all clients from Drive folder structure."""
         if self.mock_mode:
             return [
@@ -171,78 +329,102 @@ class DriveMCPServer:
                 }
             ]
 
+        if self.mirror:
+            await self._ensure_mirror(force_refresh)
+            return await asyncio.to_thread(self.mirror.list_clients)
+
         # Real Drive implementation
         try:
-            results = self.service.files().list(
-                q=f"'{self.root_folder_id}/clients' in parents and mimeType='application/vnd.google-apps.folder'",
-                fields="files(id, name, description)"
-            ).execute()
+            clients_folder_id = await asyncio.to_thread(self.folder_index.resolve, "clients", True)
+            results = await asyncio.to_thread(
+                self.service.files().list(
+                    q=f"'{clients_folder_id}' in parents and mimeType='{FOLDER_MIME_TYPE}' and trashed = false",
+                    fields="files(id, name, description)"
+                ).execute
+            )
 
-            return [
-                {"id": f["id"], "name": f["name"], "description": f.get("description", "")}
-                for f in results.get("files", [])
-            ]
+            clients = []
+            for f in results.get("files", []):
+                # Warm the index so the next brand/campaign access skips the lookup
+                self.folder_index.prime(self._client_path(f["name"]), f["id"])
+                clients.append({
+                    "id": f["name"],
+                    "name": f["name"],
+                    "description": f.get("description", ""),
+                    "folder_id": f["id"]
+                })
+            return clients
         except Exception as e:
             raise Exception(f"Failed to list clients: {e}")
 
-    async def get_brand_assets(self, client_id: str) -> Dict:
+    async def get_brand_assets(self, client_id: str, force_refresh: bool = False) -> Dict:
         """Get brand assets for a specific client."""
+        profile = await self.get_brand_profile(client_id, force_refresh)
+        return profile.to_dict()
+
+    async def get_brand_profile(self, client_id: str, force_refresh: bool = False) -> BrandProfile:
+        """
+        Get the compiled brand profile for a client.
+
+        Profiles are cached per client and only reloaded when the source
+        files' checksums change.
+        """
         if self.mock_mode:
-            mock_brands = {
-                "burgers-and-curries": {
-                    "name": "Burgers & Curries",
-                    "colors": ["#FF5733", "#FFC300", "#2E4053"],
-                    "primary_color": "#FF5733",
-                    "secondary_color": "#FFC300",
-                    "font_primary": "Poppins",
-                    "font_secondary": "Open Sans",
-                    "style": "Warm, inviting, fusion cuisine. Bold colors, appetizing food photography.",
-                    "tagline": "Where East Meets West",
-                    "logo_url": None,
-                    "guidelines": "Always show food prominently. Use warm lighting. Include brand colors in composition."
-                },
-                "tech-startup-xyz": {
-                    "name": "Tech Startup XYZ",
-                    "colors": ["#3498DB", "#2ECC71", "#FFFFFF", "#1A1A2E"],
-                    "primary_color": "#3498DB",
-                    "secondary_color": "#2ECC71",
-                    "font_primary": "Inter",
-                    "font_secondary": "Roboto Mono",
-                    "style": "Modern, clean, professional. Minimalist design with tech aesthetics.",
-                    "tagline": "Innovate. Scale. Succeed.",
-                    "logo_url": None,
-                    "guidelines": "Clean backgrounds, geometric shapes, modern gradients acceptable."
-                },
-                "fashion-brand-abc": {
-                    "name": "Fashion Brand ABC",
-                    "colors": ["#000000", "#FFFFFF", "#C9A962"],
-                    "primary_color": "#000000",
-                    "secondary_color": "#C9A962",
-                    "font_primary": "Playfair Display",
-                    "font_secondary": "Montserrat",
-                    "style": "Luxury, elegant, sophisticated. High contrast, editorial feel.",
-                    "tagline": "Timeless Elegance",
-                    "logo_url": None,
-                    "guidelines": "High-end aesthetic, clean compositions, luxury feel."
-                }
-            }
-            return mock_brands.get(client_id, {
-                "name": client_id,
-                "colors": ["#333333", "#666666"],
-                "primary_color": "#333333",
-                "style": "Professional",
-                "guidelines": "Standard professional marketing."
-            })
+            return self.brand_profiles.get_or_compile(
+                client_id,
+                "mock",
+                lambda: MOCK_BRANDS.get(client_id, {"name": client_id, **DEFAULT_MOCK_BRAND})
+            )
+
+        if self.mirror:
+            await self._ensure_mirror(force_refresh)
+            signature = await asyncio.to_thread(self.mirror.brand_signature, client_id)
+            if signature is not None:
+                return await asyncio.to_thread(
+                    self.brand_profiles.get_or_compile,
+                    client_id,
+                    signature,
+                    lambda: self.mirror.get_brand_assets(client_id)
+                )
 
         # Real Drive implementation - read colors.json from brand-assets folder
         try:
-            # Find brand-assets folder for client
-            # Read colors.json, guidelines.md, etc.
-            pass
+            folder_id = await asyncio.to_thread(
+                self.folder_index.resolve, self._client_path(client_id, "brand-assets")
+            )
+            if folder_id is None:
+                return self.brand_profiles.get_or_compile(client_id, None, lambda: {"name": client_id})
+
+            results = await asyncio.to_thread(
+                self.service.files().list(
+                    q=f"'{folder_id}' in parents and trashed = false",
+                    fields="files(id, name, mimeType, md5Checksum)"
+                ).execute
+            )
+            files = {f["name"]: f for f in results.get("files", [])}
+            signature = ",".join(
+                f"{name}:{files[name].get('md5Checksum')}"
+                for name in ("colors.json", "guidelines.md") + LOGO_FILES if name in files
+            )
+
+            def load_brand() -> Dict:
+                brand = {"name": client_id}
+                if "colors.json" in files:
+                    brand.update(json.loads(self._read_file(files["colors.json"]["id"])))
+                if "guidelines.md" in files:
+                    brand["guidelines"] = self._read_file(files["guidelines.md"]["id"]).decode("utf-8")
+                if not brand.get("logo_url"):
+                    logo = next((files[name] for name in LOGO_FILES if name in files), None)
+                    if logo:
+                        brand["logo_url"] = f"drive://{logo['id']}"
+                return brand
+
+            # load_brand downloads the source files, so compile off the event loop
+            return await asyncio.to_thread(self.brand_profiles.get_or_compile, client_id, signature, load_brand)
         except Exception as e:
             raise Exception(f"Failed to get brand assets: {e}")
 
-    async def get_past_campaigns(self, client_id: str) -> List[Dict]:
+    async def get_past_campaigns(self, client_id: str, force_refresh: bool = False) -> List[Dict]:
         """Get list of past campaigns for reference."""
         if self.mock_mode:
             return [
@@ -267,18 +449,37 @@ class DriveMCPServer:
                 }
             ]
 
-        # Real Drive implementation
+        if self.mirror:
+            await self._ensure_mirror(force_refresh)
+            return await asyncio.to_thread(self.mirror.get_past_campaigns, client_id)
+
         return []
 
+    async def get_sync_status(self) -> Dict:
+        """Report the metadata mirror's freshness."""
+        if self.mock_mode:
+            return {"mode": "mock", "mirror": False}
+        if not self.mirror:
+            return {"mode": "drive", "mirror": False}
+        return {"mode": "drive", "mirror": True, **self.mirror.freshness()}
+
     async def save_image(
         self,
         client_id: str,
         campaign_name: str,
         platform: str,
         image_data: bytes,
-        filename: str
+        filename: str,
+        prompt: Optional[str] = None,
+        brief: Optional[str] = None,
+        theme: Optional[str] = None
     ) -> Dict:
-        """Save generated image to Google Drive."""
+        """
+        Save generated image to Google Drive and add it to the asset index.
+
+        prompt, brief and theme are stored with the asset's fingerprint so
+        later requests can find it by text.
+        """
         if self.mock_mode:
             # Save locally for development
             local_path = Path(f"./generated/{client_id}/{campaign_name}/{platform}")
@@ -288,29 +489,41 @@ class DriveMCPServer:
             with open(file_path, 'wb') as f:
                 f.write(image_data)
 
-            return {
+            saved = {
                 "success": True,
                 "file_path": str(file_path),
                 "file_id": None,
                 "web_link": None
             }
+            await self._index_asset(client_id, campaign_name, platform, image_data, saved, prompt, brief, theme)
+            return saved
 
         # Real Drive implementation
         try:
             from googleapiclient.http import MediaIoBaseUpload
 
-            # Create folder structure: /clients/{client_id}/generated/{campaign}/{platform}/
-            # Upload file
-            file_metadata = {'name': filename}
-            media = MediaIoBaseUpload(io.BytesIO(image_data), mimetype='image/png')
-
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, webViewLink'
-            ).execute()
-
-            return {
+            # Folder structure: /clients/{client_id}/generated/{campaign}/{platform}/
+            folder_path = self._client_path(client_id, "generated", campaign_name, platform)
+            folder_id = await asyncio.to_thread(self.folder_index.resolve, folder_path, True)
+
+            def upload(parent_id: str) -> Dict:
+                return self.service.files().create(
+                    body={'name': filename, 'parents': [parent_id]},
+                    media_body=MediaIoBaseUpload(io.BytesIO(image_data), mimetype='image/png'),
+                    fields='id, webViewLink'
+                ).execute()
+
+            try:
+                file = await asyncio.to_thread(upload, folder_id)
+            except Exception as e:
+                if not self._is_not_found(e):
+                    raise
+                # Cached folder was moved or deleted - re-resolve once
+                self.folder_index.invalidate(folder_path)
+                folder_id = await asyncio.to_thread(self.folder_index.resolve, folder_path, True)
+                file = await asyncio.to_thread(upload, folder_id)
+
+            saved = {
                 "success": True,
                 "file_path": None,
                 "file_id": file.get('id'),
@@ -319,14 +532,180 @@ class DriveMCPServer:
         except Exception as e:
             raise Exception(f"Failed to save image: {e}")
 
+        await self._index_asset(client_id, campaign_name, platform, image_data, saved, prompt, brief, theme)
+        return saved
+
+    async def _index_asset(
+        self,
+        client_id: str,
+        campaign_name: str,
+        platform: str,
+        image_data: bytes,
+        saved: Dict,
+        prompt: Optional[str],
+        brief: Optional[str],
+        theme: Optional[str]
+    ):
+        """Fingerprint a saved asset; indexing failures never fail the save."""
+        if not self.asset_index:
+            return
+        try:
+            await asyncio.to_thread(
+                self.asset_index.add,
+                saved["file_id"] or saved["file_path"],
+                client_id,
+                image_data,
+                campaign=campaign_name,
+                platform=platform,
+                file_path=saved["file_path"],
+                file_id=saved["file_id"],
+                web_link=saved["web_link"],
+                prompt=prompt,
+                brief=brief,
+                theme=theme
+            )
+        except Exception as e:
+            print(f"Asset indexing failed: {e}")
+
+    async def find_similar_assets(
+        self,
+        client_id: str,
+        text: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        platform: Optional[str] = None,
+        k: int = 5,
+        min_score: float = 0.0
+    ) -> List[Dict]:
+        """
+        Find previously generated assets close to a brief or an image.
+
+        Args:
+            client_id: Client whose assets to search
+            text: Theme and brief text
+            image_data: Image to find near-duplicates of
+            platform: Only consider assets for this platform
+            k: Number of matches
+            min_score: Drop matches scoring below this (0-1)
+
+        Returns:
+            Asset metadata with `score` and per-component `similarity`, best first
+        """
+        if not self.asset_index:
+            return []
+        if self.mock_mode and not self._assets_scanned:
+            self._assets_scanned = True
+            added = await asyncio.to_thread(self.asset_index.scan)
+            if added:
+                print(f"Indexed {added} previously generated assets")
+
+        return await asyncio.to_thread(
+            self.asset_index.search, client_id, text, image_data, platform, k, min_score
+        )
+
+    async def load_asset(self, asset_id: str) -> Optional[bytes]:
+        """
+        Load an indexed asset's image bytes (local file or Drive download).
+
+        Args:
+            asset_id: ID returned by find_similar_assets
+
+        Returns:
+            Image bytes, or None if the asset is unknown
+        """
+        asset = self.asset_index.get(asset_id) if self.asset_index else None
+        if asset is None:
+            return None
+        if asset["file_path"]:
+            return await asyncio.to_thread(Path(asset["file_path"]).read_bytes)
+        return await self.download_reference(asset["file_id"])
+
     async def download_reference(self, file_id: str) -> Optional[bytes]:
-        """Download a reference image from Drive."""
+        """
+        Download a reference image from Drive.
+
+        Unchanged files are served from the local blob cache; only misses
+        hit the network.
+        """
         if self.mock_mode:
             return None
 
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            # Download and return bytes
-            return None
+            key = DiskBlobCache.make_key(file_id, await self._file_version(file_id))
+            cached = self.blob_cache.get(key)
+            if cached is not None:
+                return cached
+
+            data = await asyncio.to_thread(self._read_file, file_id)
+            self.blob_cache.put(key, data)
+            return data
         except Exception as e:
             raise Exception(f"Failed to download reference: {e}")
+
+    async def get_logo(self, client_id: str, force_refresh: bool = False) -> Optional[bytes]:
+        """
+        Get a client's logo from its brand `logo_url`.
+
+        drive://<file_id> logos go through the blob cache (keyed by file
+        version); URLs and local paths are fetched once per process.
+        """
+        profile = await self.get_brand_profile(client_id, force_refresh)
+        logo_url = profile.logo_url
+        if not logo_url:
+            return None
+
+        try:
+            if logo_url.startswith("drive://"):
+                return await self.download_reference(logo_url[len("drive://"):])
+
+            if not force_refresh and logo_url in self._logos:
+                return self._logos[logo_url]
+
+            if logo_url.startswith(("http://", "https://")):
+                import httpx
+
+                async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+                    response = await client.get(logo_url)
+                    response.raise_for_status()
+                    data = response.content
+            else:
+                data = await asyncio.to_thread(Path(logo_url).read_bytes)
+
+            self._logos[logo_url] = data
+            return data
+        except Exception as e:
+            raise Exception(f"Failed to get logo: {e}")
+
+    # ==================== HELPERS ====================
+
+    async def _ensure_mirror(self, force_refresh: bool = False):
+        """Sync the mirror if it has never synced or a refresh was requested."""
+        if force_refresh or self.mirror.synced_at is None:
+            await asyncio.to_thread(self.mirror.sync)
+            for path, folder_id in (await asyncio.to_thread(self.mirror.folder_paths)).items():
+                self.folder_index.prime(path, folder_id)
+
+    @staticmethod
+    def _client_path(client_id: str, *parts: str) -> str:
+        """Build a logical folder path under clients/<client_id>/."""
+        return "/".join(("clients", client_id) + parts)
+
+    async def _file_version(self, file_id: str) -> Optional[str]:
+        """Get a file's md5Checksum/modifiedTime, from the mirror when possible."""
+        if self.mirror:
+            version = await asyncio.to_thread(self.mirror.file_version, file_id)
+            if version:
+                return version
+
+        meta = await asyncio.to_thread(
+            self.service.files().get(fileId=file_id, fields="md5Checksum, modifiedTime").execute
+        )
+        return meta.get("md5Checksum") or meta.get("modifiedTime")
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        """Whether a Drive API error is a 404 (googleapiclient HttpError or the fake's equivalent)."""
+        return getattr(getattr(error, "resp", None), "status", None) == 404
+
+    def _read_file(self, file_id: str) -> bytes:
+        """Read the raw content of a small Drive file."""
+        return self.service.files().get_media(fileId=file_id).execute()
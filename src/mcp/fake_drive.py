@@ -0,0 +1,283 @@
+"""
+Fake Google Drive service for local development and tests.
+
+Implements the small subset of the Drive v3 API used by the Drive MCP
+server (files.list/get/get_media/create, changes.getStartPageToken/list)
+against an in-memory tree, including a change log so the metadata mirror
+can be exercised without network access.
+
+Usage:
+    fake = FakeDriveService.seeded()
+    drive = DriveMCPServer(service=fake, root_folder_id=fake.root_id, mock_mode=False)
+"""
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import hashlib
+import json
+import re
+
+from .drive_index import FOLDER_MIME_TYPE
+
+
+_QUOTED = r"'((?:[^'\\]|\\.)*)'"
+
+
+def _unescape(value: str) -> str:
+    """Undo Drive query string escaping."""
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+class FakeHttpError(Exception):
+    """Drive API error shaped like googleapiclient's HttpError (status in resp.status)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.resp = SimpleNamespace(status=status)
+
+
+class _Request:
+    """Deferred API call, mirroring googleapiclient's HttpRequest.execute()."""
+
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+
+    def execute(self) -> Any:
+        return self._fn()
+
+
+class _FilesResource:
+    """files() collection of the fake service."""
+
+    def __init__(self, drive: "FakeDriveService"):
+        self._drive = drive
+
+    def list(self, q: str = "", fields: str = "", pageSize: int = 100, pageToken: Optional[str] = None,
+             **kwargs) -> _Request:
+        def _list():
+            files = self._drive.query(q)
+            start = int(pageToken or 0)
+            end = start + min(pageSize, self._drive.max_page_size)
+            result = {"files": files[start:end]}
+            if end < len(files):
+                result["nextPageToken"] = str(end)
+            return result
+        return _Request(_list)
+
+    def get(self, fileId: str, fields: str = "", **kwargs) -> _Request:
+        return _Request(lambda: self._drive.metadata(fileId))
+
+    def get_media(self, fileId: str, **kwargs) -> _Request:
+        return _Request(lambda: self._drive.content(fileId))
+
+    def create(self, body: Dict, media_body=None, fields: str = "", **kwargs) -> _Request:
+        def _create():
+            data = None
+            if media_body is not None:
+                data = media_body.getbytes(0, media_body.size())
+            parents = body.get("parents") or [self._drive.root_id]
+            if parents[0] not in self._drive.files_by_id:
+                raise FakeHttpError(404, f"File not found: {parents[0]}")
+            return self._drive.add_file(
+                parents[0],
+                body["name"],
+                data=data,
+                mime_type=body.get("mimeType", getattr(media_body, "mimetype", lambda: None)()),
+            )
+        return _Request(_create)
+
+
+class _ChangesResource:
+    """changes() collection of the fake service."""
+
+    def __init__(self, drive: "FakeDriveService"):
+        self._drive = drive
+
+    def getStartPageToken(self, **kwargs) -> _Request:
+        return _Request(lambda: {"startPageToken": str(len(self._drive.change_log))})
+
+    def list(self, pageToken: str, pageSize: int = 100, **kwargs) -> _Request:
+        def _list():
+            start = int(pageToken)
+            end = min(start + pageSize, len(self._drive.change_log))
+            # Like Drive, list each file once, at the position of its latest change
+            latest = {file_id: i for i, file_id in enumerate(self._drive.change_log[start:], start)}
+            changes = []
+            for i in range(start, end):
+                file_id = self._drive.change_log[i]
+                if latest[file_id] != i:
+                    continue
+                file = self._drive.files_by_id.get(file_id)
+                if file is None:
+                    changes.append({"fileId": file_id, "removed": True})
+                else:
+                    changes.append({"fileId": file_id, "removed": False, "file": self._drive.metadata(file_id)})
+
+            result = {"changes": changes}
+            if end < len(self._drive.change_log):
+                result["nextPageToken"] = str(end)
+            else:
+                result["newStartPageToken"] = str(end)
+            return result
+        return _Request(_list)
+
+
+class FakeDriveService:
+    """
+    In-memory stand-in for the Drive v3 service object.
+
+    Every mutation is appended to a change log, so change tokens and
+    changes.list behave like the real API.
+    """
+
+    def __init__(self, root_id: str = "root", max_page_size: int = 1000):
+        self.root_id = root_id
+        self.max_page_size = max_page_size  # Drive caps files.list pages at 1000
+        self.files_by_id: Dict[str, Dict] = {
+            root_id: {"id": root_id, "name": "ATC-Marketing", "mimeType": FOLDER_MIME_TYPE, "parents": []}
+        }
+        self.contents: Dict[str, bytes] = {}
+        self.change_log: List[str] = []
+        self._next_id = 1
+
+    # ==================== API RESOURCES ====================
+
+    def files(self) -> _FilesResource:
+        return _FilesResource(self)
+
+    def changes(self) -> _ChangesResource:
+        return _ChangesResource(self)
+
+    # ==================== TREE MUTATION ====================
+
+    def add_folder(self, parent_id: str, name: str, description: str = "") -> str:
+        """Create a folder and return its ID."""
+        return self.add_file(parent_id, name, mime_type=FOLDER_MIME_TYPE, description=description)["id"]
+
+    def add_file(
+        self,
+        parent_id: str,
+        name: str,
+        data: Optional[bytes] = None,
+        mime_type: Optional[str] = None,
+        description: str = ""
+    ) -> Dict:
+        """Create a file (or folder) and return its metadata."""
+        file_id = f"fake-{self._next_id}"
+        self._next_id += 1
+        self.files_by_id[file_id] = {
+            "id": file_id,
+            "name": name,
+            "mimeType": mime_type or "application/octet-stream",
+            "parents": [parent_id],
+            "description": description,
+            "webViewLink": f"https://drive.fake/{file_id}",
+        }
+        self._touch(file_id, data)
+        return self.metadata(file_id)
+
+    def update_content(self, file_id: str, data: bytes):
+        """Replace a file's content."""
+        self._touch(file_id, data)
+
+    def rename(self, file_id: str, name: str):
+        """Rename a file or folder."""
+        self.files_by_id[file_id]["name"] = name
+        self._touch(file_id)
+
+    def move(self, file_id: str, parent_id: str):
+        """Move a file or folder under another folder (its children do not change)."""
+        self.files_by_id[file_id]["parents"] = [parent_id]
+        self._touch(file_id)
+
+    def delete(self, file_id: str):
+        """Permanently delete a file or folder (and its children)."""
+        for child in [f["id"] for f in self.files_by_id.values() if file_id in f["parents"]]:
+            self.delete(child)
+        self.files_by_id.pop(file_id, None)
+        self.contents.pop(file_id, None)
+        self.change_log.append(file_id)
+
+    def _touch(self, file_id: str, data: Optional[bytes] = None):
+        """Bump modifiedTime/checksum and record a change."""
+        file = self.files_by_id[file_id]
+        if data is not None:
+            self.contents[file_id] = data
+            file["md5Checksum"] = hashlib.md5(data).hexdigest()
+            file["size"] = str(len(data))
+        file["modifiedTime"] = datetime.now(timezone.utc).isoformat()
+        self.change_log.append(file_id)
+
+    # ==================== QUERIES ====================
+
+    def metadata(self, file_id: str) -> Dict:
+        """Return a copy of a file's metadata."""
+        if file_id not in self.files_by_id:
+            raise KeyError(f"File not found: {file_id}")
+        file = dict(self.files_by_id[file_id])
+        file["parents"] = list(file["parents"])
+        file["trashed"] = False
+        return file
+
+    def content(self, file_id: str) -> bytes:
+        """Return a file's content."""
+        if file_id not in self.contents:
+            raise KeyError(f"File has no content: {file_id}")
+        return self.contents[file_id]
+
+    def query(self, q: str) -> List[Dict]:
+        """Evaluate the subset of the Drive query language the servers use."""
+        parent = re.search(_QUOTED + r"\s+in\s+parents", q)
+        name = re.search(r"name\s*=\s*" + _QUOTED, q)
+        mime = re.search(r"mimeType\s*=\s*" + _QUOTED, q)
+
+        results = []
+        for file in self.files_by_id.values():
+            if parent and _unescape(parent.group(1)) not in file["parents"]:
+                continue
+            if name and file["name"] != _unescape(name.group(1)):
+                continue
+            if mime and file["mimeType"] != _unescape(mime.group(1)):
+                continue
+            results.append(self.metadata(file["id"]))
+        return results
+
+    # ==================== FIXTURES ====================
+
+    @classmethod
+    def seeded(cls) -> "FakeDriveService":
+        """Build a fake populated with the same clients as mock mode."""
+        fake = cls()
+        clients_id = fake.add_folder(fake.root_id, "clients")
+
+        brands = {
+            "burgers-and-curries": ("Fusion restaurant chain", {
+                "name": "Burgers & Curries",
+                "colors": ["#FF5733", "#FFC300", "#2E4053"],
+                "primary_color": "#FF5733",
+                "secondary_color": "#FFC300",
+                "style": "Warm, inviting, fusion cuisine. Bold colors, appetizing food photography.",
+                "tagline": "Where East Meets West",
+            }),
+            "tech-startup-xyz": ("B2B SaaS company", {
+                "name": "Tech Startup XYZ",
+                "colors": ["#3498DB", "#2ECC71", "#FFFFFF", "#1A1A2E"],
+                "primary_color": "#3498DB",
+                "secondary_color": "#2ECC71",
+                "style": "Modern, clean, professional. Minimalist design with tech aesthetics.",
+                "tagline": "Innovate. Scale. Succeed.",
+            }),
+        }
+
+        for client_id, (description, brand) in brands.items():
+            client_folder = fake.add_folder(clients_id, client_id, description=description)
+            brand_folder = fake.add_folder(client_folder, "brand-assets")
+            fake.add_file(brand_folder, "colors.json", json.dumps(brand).encode(), "application/json")
+            fake.add_file(brand_folder, "guidelines.md", b"Use brand colors prominently.", "text/markdown")
+
+            campaigns_folder = fake.add_folder(client_folder, "past-campaigns")
+            campaign = fake.add_folder(campaigns_folder, "summer-2024")
+            fake.add_file(campaign, "summer-01.png", b"\x89PNG\r\n\x1a\n", "image/png")
+            fake.add_folder(client_folder, "generated")
+
+        return fake
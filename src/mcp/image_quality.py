@@ -0,0 +1,269 @@
+"""
+Image Quality - cheap, vectorized metrics for generated images.
+
+All metrics run with NumPy on a downsampled copy, so scoring an image
+costs little more than decoding it. They are used to rank generation
+candidates:
+- brand-color proximity (CIE Lab distance to the brand palette)
+- sharpness (variance of the Laplacian)
+- text-region contrast: overall contrast when the model draws the copy,
+  or a calm (low-contrast) copy area when copy is rendered locally on top
+- blank-image detection (luminance spread and histogram entropy)
+
+The same metrics back a pass/fail quality gate (quality_gate), which flags
+blank frames, upscaled low-resolution output, placeholder images and
+off-brand palettes before an image is returned.
+"""
+from typing import Optional, Dict, Sequence, Tuple
+import io
+
+import numpy as np
+from PIL import Image
+
+from .brand_profile import BrandProfile, as_brand_profile
+
+
+# Longest side of the copy the metrics are computed on
+ANALYSIS_EDGE = 256
+
+# Score weights (sum to 1)
+SCORE_WEIGHTS = {
+    "brand_proximity": 0.4,
+    "sharpness": 0.3,
+    "text_contrast": 0.3,
+}
+
+# Below these an image is treated as blank
+BLANK_STD = 6.0
+BLANK_ENTROPY = 2.0
+
+# Delta E (CIE76) under which a pixel counts as "on brand"
+BRAND_DELTA_E = 20.0
+
+# Quality gate: the model's native output may be upscaled by at most
+# 1 / MIN_SOURCE_SCALE per side, and at least MIN_BRAND_COVERAGE of the
+# pixels must be near a brand color (only checked when the brand has colors)
+MIN_SOURCE_SCALE = 0.5
+MIN_BRAND_COVERAGE = 0.01
+
+# Prompt additions for a regeneration, by failed check
+GATE_RETRY_HINTS = {
+    "blank": "The image must be a fully rendered, detailed scene, not a blank or flat frame.",
+    "brand_coverage": "Feature the brand colors {colors} prominently in the scene.",
+}
+
+
+def load_rgb(image_data: bytes, edge: int = ANALYSIS_EDGE) -> np.ndarray:
+    """
+    Decode and downsample an image for analysis.
+
+    Args:
+        image_data: Image bytes
+        edge: Longest side of the analysis copy
+
+    Returns:
+        float32 array of shape (h, w, 3) with values 0-255
+    """
+    img = Image.open(io.BytesIO(image_data))
+    img.draft("RGB", (edge, edge))
+    img = img.convert("RGB")
+    img.thumbnail((edge, edge), Image.Resampling.BILINEAR)
+    return np.asarray(img, dtype=np.float32)
+
+
+def rgb_to_lab_array(rgb: np.ndarray) -> np.ndarray:
+    """Vectorized sRGB (0-255) to CIE Lab (D65), same formula as brand_profile.rgb_to_lab."""
+    c = rgb / 255.0
+    c = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    r, g, b = c[..., 0], c[..., 1], c[..., 2]
+
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = (0.2126 * r + 0.7152 * g + 0.0722 * b) / 1.00000
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    xyz = np.stack([x, y, z], axis=-1)
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return np.stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)], axis=-1)
+
+
+def luminance(rgb: np.ndarray) -> np.ndarray:
+    """Rec. 709 luma (0-255)."""
+    return rgb @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def entropy(gray: np.ndarray) -> float:
+    """Shannon entropy (bits) of the 256-bin luminance histogram."""
+    hist = np.bincount(np.clip(gray, 0, 255).astype(np.uint8).ravel(), minlength=256)
+    p = hist[hist > 0] / hist.sum()
+    return float(-(p * np.log2(p)).sum())
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian; higher means sharper."""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    lap = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4 * gray[1:-1, 1:-1]
+    )
+    return float(lap.var())
+
+
+def brand_color_stats(lab: np.ndarray, brand_lab: Sequence[Tuple[float, float, float]]) -> Tuple[float, float]:
+    """
+    Distance from every pixel to its nearest brand color.
+
+    Returns:
+        (mean nearest delta E, fraction of pixels within BRAND_DELTA_E)
+    """
+    if not brand_lab:
+        return 0.0, 0.0
+    pixels = lab.reshape(-1, 3)
+    palette = np.asarray(brand_lab, dtype=np.float32)
+    # (pixels, colors) distance matrix; palettes are small so this stays cheap
+    distances = np.sqrt(((pixels[:, None, :] - palette[None, :, :]) ** 2).sum(axis=-1)).min(axis=1)
+    return float(distances.mean()), float((distances < BRAND_DELTA_E).mean())
+
+
+def score_image(
+    image_data: bytes,
+    brand_data=None,
+    copy_box: Optional[Tuple[float, float, float, float]] = None
+) -> Dict:
+    """
+    Compute quality metrics and an overall 0-1 score for one image.
+
+    Args:
+        image_data: Image bytes
+        brand_data: Brand dict or BrandProfile (palette for proximity)
+        copy_box: (left, top, right, bottom) fractions where copy will be
+            rendered locally; that area should be calm. Without it, overall
+            contrast is rewarded (copy drawn by the model must stand out).
+
+    Returns:
+        Dict with the individual metrics, `blank` and `score`
+    """
+    brand: BrandProfile = as_brand_profile(brand_data)
+    rgb = load_rgb(image_data)
+    gray = luminance(rgb)
+
+    std = float(gray.std())
+    bits = entropy(gray)
+    blank = std < BLANK_STD or bits < BLANK_ENTROPY
+
+    mean_delta_e, coverage = brand_color_stats(rgb_to_lab_array(rgb), brand.colors_lab)
+    sharpness = laplacian_variance(gray)
+
+    region = gray
+    if copy_box:
+        h, w = gray.shape
+        left, top, right, bottom = copy_box
+        region = gray[int(top * h):max(int(bottom * h), int(top * h) + 1),
+                      int(left * w):max(int(right * w), int(left * w) + 1)]
+    text_contrast = float(region.std())
+    contrast_score = min(text_contrast / 64.0, 1.0)
+
+    components = {
+        # 0 at delta E >= 100 (opposite ends of the gamut), 1 on palette
+        "brand_proximity": 1.0 - min(mean_delta_e / 100.0, 1.0) if brand.colors_lab else 0.5,
+        # Saturates around a variance of a few hundred (crisp photography)
+        "sharpness": sharpness / (sharpness + 200.0),
+        "text_contrast": 1.0 - contrast_score if copy_box else contrast_score,
+    }
+    score = 0.0 if blank else sum(SCORE_WEIGHTS[k] * v for k, v in components.items())
+
+    return {
+        "score": round(score, 4),
+        "blank": blank,
+        "luminance_std": round(std, 2),
+        "entropy": round(bits, 3),
+        "brand_delta_e": round(mean_delta_e, 2),
+        "brand_coverage": round(coverage, 4),
+        "sharpness": round(sharpness, 2),
+        "text_contrast": round(text_contrast, 2),
+        "components": {k: round(v, 4) for k, v in components.items()},
+    }
+
+
+def quality_gate(
+    image_data: bytes,
+    width: int,
+    height: int,
+    brand_data=None,
+    source_size: Optional[Tuple[int, int]] = None,
+    placeholder: bool = False
+) -> Dict:
+    """
+    Pass/fail checks for a generated image.
+
+    Checks, each named in `failures` when it fails:
+    - placeholder: the bytes are the local fallback image, not a generation
+    - resolution: wrong final size, or the model's native output was
+      upscaled by more than 1 / MIN_SOURCE_SCALE
+    - blank: luminance spread or histogram entropy too low
+    - brand_coverage: under MIN_BRAND_COVERAGE of pixels near a brand color
+
+    Args:
+        image_data: Final image bytes
+        width: Expected width
+        height: Expected height
+        brand_data: Brand dict or BrandProfile (palette for coverage)
+        source_size: (width, height) of the model output before resizing
+        placeholder: Whether the bytes are a known placeholder
+
+    Returns:
+        Dict with `passed`, `failures` and the metrics behind them
+    """
+    brand: BrandProfile = as_brand_profile(brand_data)
+    failures = []
+    if placeholder:
+        failures.append("placeholder")
+
+    image = Image.open(io.BytesIO(image_data))
+    source_scale = 1.0
+    if source_size:
+        source_scale = min(source_size[0] / width, source_size[1] / height, 1.0)
+    if image.size != (width, height) or source_scale < MIN_SOURCE_SCALE:
+        failures.append("resolution")
+
+    rgb = load_rgb(image_data)
+    gray = luminance(rgb)
+    std = float(gray.std())
+    bits = entropy(gray)
+    if std < BLANK_STD or bits < BLANK_ENTROPY:
+        failures.append("blank")
+
+    coverage = None
+    if brand.colors_lab:
+        _, coverage = brand_color_stats(rgb_to_lab_array(rgb), brand.colors_lab)
+        if coverage < MIN_BRAND_COVERAGE:
+            failures.append("brand_coverage")
+
+    return {
+        "passed": not failures,
+        "failures": failures,
+        "size": list(image.size),
+        "source_size": list(source_size) if source_size else None,
+        "source_scale": round(source_scale, 3),
+        "luminance_std": round(std, 2),
+        "entropy": round(bits, 3),
+        "brand_coverage": round(coverage, 4) if coverage is not None else None,
+    }
+
+
+def retry_prompt(prompt: str, failures: Sequence[str], brand_data=None) -> str:
+    """
+    Prompt for regenerating an image that failed the quality gate.
+
+    Args:
+        prompt: Original image prompt
+        failures: Failed checks from quality_gate()
+        brand_data: Brand dict or BrandProfile (colors for the coverage hint)
+
+    Returns:
+        The prompt with a hint appended per addressable failure
+    """
+    colors = ", ".join(as_brand_profile(brand_data).colors)
+    hints = [GATE_RETRY_HINTS[f].format(colors=colors) for f in failures if f in GATE_RETRY_HINTS]
+    return "\n".join([prompt, *hints]) if hints else prompt
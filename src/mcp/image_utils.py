@@ -0,0 +1,294 @@
+"""
+Image Utilities - format sniffing and reference image preprocessing.
+
+Reference uploads arrive in whatever format the user had (phone JPEGs with
+EXIF, large PNG screenshots, WebP). Before a vision call they are:
+- identified by their magic bytes (not by the client-supplied MIME type)
+- decoded, EXIF-rotated and downscaled to a configured max edge
+- re-encoded as a compact JPEG, which drops all metadata
+
+Prepared images are cached by content hash so repeated uploads of the same
+reference skip the decode/encode work.
+
+Generated images coming back from the model are decoded without copying:
+format and dimensions are read from the headers through a memoryview, and
+the bytes are passed through untouched when they already match the target.
+"""
+from typing import Optional, Union, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import base64
+import binascii
+import hashlib
+import io
+import re
+import struct
+import threading
+
+from PIL import Image, ImageOps
+
+
+# Format name (as used by PIL) -> MIME type
+MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+    "BMP": "image/bmp",
+}
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def sniff_format(data: BytesLike) -> Optional[str]:
+    """
+    Identify an image format from its magic bytes.
+
+    Args:
+        data: Image bytes (only the first 12 bytes are inspected)
+
+    Returns:
+        PIL format name ("PNG", "JPEG", ...) or None if unrecognized
+    """
+    head = bytes(memoryview(data)[:12])
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF"
+    if head[:2] == b"BM":
+        return "BMP"
+    return None
+
+
+_BASE64_PREFIX = re.compile(rb"[A-Za-z0-9+/=\r\n]*")
+
+# JPEG start-of-frame markers (SOF0-SOF15 except DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_dimensions(data: BytesLike) -> Optional[Tuple[str, int, int]]:
+    """
+    Read format and size from image headers without decoding pixels.
+
+    Args:
+        data: Image bytes
+
+    Returns:
+        (format, width, height), or None if the headers cannot be parsed
+    """
+    view = memoryview(data)
+    image_format = sniff_format(view)
+    try:
+        if image_format == "PNG":
+            # IHDR is always the first chunk
+            width, height = struct.unpack_from(">II", view, 16)
+            return image_format, width, height
+
+        if image_format == "JPEG":
+            offset = 2
+            while offset + 9 <= len(view):
+                if view[offset] != 0xFF:
+                    return None
+                marker = view[offset + 1]
+                if marker == 0xFF:  # Fill byte
+                    offset += 1
+                    continue
+                if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # No length field
+                    offset += 2
+                    continue
+                (segment_length,) = struct.unpack_from(">H", view, offset + 2)
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack_from(">HH", view, offset + 5)
+                    return image_format, width, height
+                offset += 2 + segment_length
+            return None
+
+        if image_format == "WEBP":
+            chunk = bytes(view[12:16])
+            if chunk == b"VP8 ":
+                width, height = struct.unpack_from("<HH", view, 26)
+                return image_format, width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                (bits,) = struct.unpack_from("<I", view, 21)
+                return image_format, (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(view[24:27], "little") + 1
+                height = int.from_bytes(view[27:30], "little") + 1
+                return image_format, width, height
+            return None
+
+        if image_format == "GIF":
+            width, height = struct.unpack_from("<HH", view, 6)
+            return image_format, width, height
+    except struct.error:
+        return None
+    return None
+
+
+def decode_inline_data(raw: Union[str, BytesLike]) -> bytes:
+    """
+    Turn a model response's inline_data payload into raw image bytes.
+
+    The SDK returns either raw bytes or base64 (as str or bytes). Raw image
+    bytes are recognized by their magic number and returned as-is.
+
+    Args:
+        raw: inline_data.data from the response
+
+    Returns:
+        Raw image bytes
+    """
+    if isinstance(raw, str):
+        return base64.b64decode(raw)
+
+    view = memoryview(raw)
+    if sniff_format(view) is not None:
+        return raw if isinstance(raw, bytes) else view.tobytes()
+
+    # Looks like base64 if the first 100 bytes are all base64 alphabet
+    prefix = view[:100]
+    if _BASE64_PREFIX.fullmatch(prefix):
+        try:
+            return base64.b64decode(view)
+        except (binascii.Error, ValueError):
+            pass
+    return raw if isinstance(raw, bytes) else view.tobytes()
+
+
+def to_png(data: BytesLike, width: int, height: int) -> bytes:
+    """
+    Return PNG bytes at exactly width x height.
+
+    PNGs that already have the requested size are passed through without a
+    decode/encode cycle.
+
+    Args:
+        data: Image bytes in any format PIL can read
+        width: Target width
+        height: Target height
+
+    Returns:
+        PNG image bytes
+
+    Raises:
+        ValueError: If the bytes cannot be decoded as an image
+    """
+    header = image_dimensions(data)
+    if header == ("PNG", width, height):
+        return data if isinstance(data, bytes) else bytes(data)
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format="PNG")
+    except Exception as e:
+        raise ValueError(f"Could not decode image: {e}")
+    return output.getvalue()
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """A reference image ready to send to a vision model."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    source_format: str
+    content_hash: str
+
+
+class ReferencePreprocessor:
+    """
+    Downscales and re-encodes reference images before vision calls.
+
+    Thread-safe; intended to be called via asyncio.to_thread since the work
+    is CPU-bound.
+    """
+
+    def __init__(self, max_edge: int = 1024, jpeg_quality: int = 85, cache_size: int = 64):
+        """
+        Initialize the preprocessor.
+
+        Args:
+            max_edge: Longest side (px) of the prepared image
+            jpeg_quality: Quality for the re-encoded JPEG
+            cache_size: Number of prepared images kept in memory
+        """
+        self.max_edge = max_edge
+        self.jpeg_quality = jpeg_quality
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, PreparedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, image_data: bytes) -> PreparedImage:
+        """
+        Prepare a reference image, reusing a cached result for identical bytes.
+
+        Args:
+            image_data: Raw uploaded bytes
+
+        Returns:
+            PreparedImage with compact JPEG bytes and the correct MIME type
+
+        Raises:
+            ValueError: If the bytes are not a supported image
+        """
+        digest = hashlib.sha256(image_data).hexdigest()
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                return cached
+
+        prepared = self._process(image_data, digest)
+
+        with self._lock:
+            self._cache[digest] = prepared
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return prepared
+
+    def _process(self, image_data: bytes, digest: str) -> PreparedImage:
+        source_format = sniff_format(image_data)
+        if source_format is None:
+            raise ValueError("Unsupported reference image format")
+
+        try:
+            img = Image.open(io.BytesIO(image_data))
+            # JPEG can decode at 1/2, 1/4 or 1/8 scale directly
+            img.draft("RGB", (self.max_edge, self.max_edge))
+            img = ImageOps.exif_transpose(img)
+        except Exception as e:
+            raise ValueError(f"Could not decode reference image: {e}")
+
+        if max(img.size) > self.max_edge:
+            img.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+
+        # Flatten transparency onto white; the vision model gains nothing from alpha
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Saving without exif/icc_profile/info strips all metadata
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=self.jpeg_quality, optimize=True)
+
+        return PreparedImage(
+            data=output.getvalue(),
+            mime_type=MIME_TYPES["JPEG"],
+            width=img.width,
+            height=img.height,
+            source_format=source_format,
+            content_hash=digest,
+        )
@@ -6,14 +6,48 @@ Provides standardized tool interface for:
 - Generating marketing images
 - Resizing images for different platforms
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union, Tuple, Callable
+from collections import OrderedDict
 from dataclasses import dataclass
-import base64
+import asyncio
+import hashlib
 import io
+import json
+import time
 from PIL import Image
 
 import google.generativeai as genai
 
+from .brand_profile import BrandProfile, as_brand_profile
+from .image_utils import ReferencePreprocessor, decode_inline_data, image_dimensions, to_png
+from .compositor import TextCompositor, LogoCompositor, NEGATIVE_SPACE_HINTS, PLATFORM_LAYOUTS, layout_for
+from .image_quality import score_image, quality_gate, retry_prompt
+from .style_analysis import STYLE_MODES, extract_style, describe_locally
+from .single_flight import SingleFlight, call_key
+from .brief_cache import SemanticBriefCache, DEFAULT_THRESHOLD
+from .stream_json import IncrementalJSONParser
+from .model_router import MODEL_TIERS, ModelRouter, brief_complexity, reference_complexity
+from .brief_rules import DEFAULT_MIN_CONFIDENCE, extract_brief
+
+
+# Brief fields requested from the model, shared by process_brief and the
+# fused brief/reference analysis
+BRIEF_FIELDS = """\
+            "theme": "main theme (e.g., Christmas, Summer Sale, Product Launch)",
+            "mood": "overall mood (e.g., festive, warm, energetic, professional)",
+            "key_elements": ["list", "of", "visual", "elements", "to include"],
+            "colors_suggested": ["color suggestions based on theme"],
+            "headline": "catchy headline text to display prominently on the image (ALWAYS provide one based on campaign)",
+            "subheadline": "secondary text like tagline or offer details (can be null)",
+            "text_overlay": "combined marketing text for the image",
+            "style_keywords": ["keywords", "for", "image", "generation"],
+            "target_audience": "who this is for",
+            "call_to_action": "what action should viewers take (e.g., Order Now, Shop Today)\""""
+
+BRIEF_GUIDANCE = """\
+        IMPORTANT: Always generate compelling marketing text (headline + call_to_action) based on the campaign description.
+        For food/restaurant campaigns, suggest appetizing headlines like "Taste the Fusion" or "Fresh & Flavorful"."""
+
 
 @dataclass
 class MCPToolResult:
@@ -31,19 +65,81 @@ class MediaMCPServer:
     Uses Gemini for reasoning and Imagen for image generation.
     """
 
-    def __init__(self, api_key: str):
+    # Tools whose concurrent identical calls share one execution. Candidate
+    # generation is left out: asking twice is how callers get more variety.
+    SINGLE_FLIGHT_TOOLS = frozenset({
+        "analyze_reference_image",
+        "process_brief",
+        "analyze_brief_and_reference",
+        "generate_image_prompt",
+        "generate_image",
+        "generate_image_gated",
+        "render_text_overlay",
+        "composite_logo",
+        "resize_image",
+    })
+
+    def __init__(
+        self,
+        api_key: str,
+        reference_max_edge: int = 1024,
+        platform_sizes: Optional[Dict[str, Dict]] = None,
+        style_mode: str = "hybrid",
+        gate_retries: int = 1,
+        single_flight: Optional[Dict[str, bool]] = None,
+        brief_cache_threshold: Optional[float] = DEFAULT_THRESHOLD,
+        model_tiers: Optional[List[str]] = None,
+        brief_rules_confidence: Optional[float] = DEFAULT_MIN_CONFIDENCE
+    ):
         """
         Initialize Media MCP Server.
 
         Args:
             api_key: Google AI API key
+            reference_max_edge: Longest side (px) reference images are downscaled to
+                before vision calls
+            platform_sizes: PLATFORM_SIZES, used to pre-scale logos for every platform
+            style_mode: Default reference analysis mode: "hybrid" (local measurements,
+                model only for the description) or "local" (no model call)
+            gate_retries: Regenerations allowed when an image fails the quality gate
+            single_flight: Per-tool overrides of SINGLE_FLIGHT_TOOLS, e.g.
+                {"generate_image": False} for distinct images on identical calls
+            brief_cache_threshold: Similarity at which process_brief reuses the
+                result of a similar earlier brief for the same client (None disables)
+            model_tiers: Models for brief and reference analysis, smallest first;
+                each call is routed by input complexity and latency budget
+            brief_rules_confidence: Confidence at which a templated or key-value brief
+                is extracted locally instead of by the model (None disables)
         """
         self.api_key = api_key
         genai.configure(api_key=api_key)
-
-        # Models
-        self.vision_model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        self.text_model = genai.GenerativeModel("gemini-2.0-flash-exp")
+        self.reference_preprocessor = ReferencePreprocessor(max_edge=reference_max_edge)
+        self.compositor = TextCompositor()
+        self.logo_compositor = LogoCompositor(platform_sizes)
+        self.style_mode = style_mode
+        self.gate_retries = gate_retries
+
+        # Coalescing of concurrent identical calls
+        self.single_flight = SingleFlight()
+        overrides = single_flight or {}
+        self.single_flight_tools = frozenset(
+            {tool for tool in self.SINGLE_FLIGHT_TOOLS if overrides.get(tool, True)}
+            | {tool for tool, enabled in overrides.items() if enabled}
+        )
+
+        # Local extraction of templated briefs and semantic cache in front of process_brief
+        self.brief_rules_confidence = brief_rules_confidence
+        self.brief_cache = (
+            SemanticBriefCache(threshold=brief_cache_threshold)
+            if brief_cache_threshold is not None else None
+        )
+
+        # Hashes of recently created placeholder images, for the quality gate
+        self._placeholder_hashes: "OrderedDict[str, None]" = OrderedDict()
+
+        # Tiered models for brief and reference analysis
+        self.router = ModelRouter(model_tiers or MODEL_TIERS)
+        self.tier_models = [genai.GenerativeModel(name) for name in self.router.tiers]
 
     # ==================== MCP TOOLS ====================
 
@@ -59,7 +155,9 @@ class MediaMCPServer:
                 "name": "analyze_reference_image",
                 "description": "Analyze a reference image to extract visual style information",
                 "parameters": {
-                    "image_data": {"type": "bytes", "required": True}
+                    "image_data": {"type": "bytes", "required": True},
+                    "mode": {"type": "string", "required": False, "enum": list(STYLE_MODES)},
+                    "latency_budget": {"type": "number", "required": False}
                 }
             },
             {
@@ -67,7 +165,23 @@ class MediaMCPServer:
                 "description": "Process a campaign brief and extract structured information",
                 "parameters": {
                     "brief": {"type": "string", "required": True},
-                    "client_name": {"type": "string", "required": True}
+                    "client_name": {"type": "string", "required": True},
+                    "use_cache": {"type": "boolean", "required": False},
+                    "latency_budget": {"type": "number", "required": False},
+                    "on_field": {"type": "callable", "required": False}
+                }
+            },
+            {
+                "name": "analyze_brief_and_reference",
+                "description": "Process a campaign brief and analyze its reference image in one multimodal call",
+                "parameters": {
+                    "brief": {"type": "string", "required": True},
+                    "client_name": {"type": "string", "required": True},
+                    "image_data": {"type": "bytes", "required": True},
+                    "mode": {"type": "string", "required": False, "enum": list(STYLE_MODES)},
+                    "use_cache": {"type": "boolean", "required": False},
+                    "latency_budget": {"type": "number", "required": False},
+                    "on_field": {"type": "callable", "required": False}
                 }
             },
             {
@@ -77,7 +191,8 @@ class MediaMCPServer:
                     "brief_data": {"type": "object", "required": True},
                     "brand_data": {"type": "object", "required": True},
                     "style_data": {"type": "object", "required": False},
-                    "platform": {"type": "string", "required": False}
+                    "platform": {"type": "string", "required": False},
+                    "text_mode": {"type": "string", "required": False}
                 }
             },
             {
@@ -89,6 +204,50 @@ class MediaMCPServer:
                     "height": {"type": "integer", "required": False}
                 }
             },
+            {
+                "name": "generate_image_gated",
+                "description": "Generate an image, check it with the local quality gate and regenerate on failure",
+                "parameters": {
+                    "prompt": {"type": "string", "required": True},
+                    "width": {"type": "integer", "required": False},
+                    "height": {"type": "integer", "required": False},
+                    "brand_data": {"type": "object", "required": False},
+                    "max_retries": {"type": "integer", "required": False}
+                }
+            },
+            {
+                "name": "generate_image_candidates",
+                "description": "Generate several images concurrently and rank them with local quality metrics",
+                "parameters": {
+                    "prompt": {"type": "string", "required": True},
+                    "width": {"type": "integer", "required": False},
+                    "height": {"type": "integer", "required": False},
+                    "count": {"type": "integer", "required": False},
+                    "brand_data": {"type": "object", "required": False},
+                    "platform": {"type": "string", "required": False},
+                    "text_mode": {"type": "string", "required": False}
+                }
+            },
+            {
+                "name": "render_text_overlay",
+                "description": "Render headline, subheadline and call-to-action onto a text-free image locally",
+                "parameters": {
+                    "image_data": {"type": "bytes", "required": True},
+                    "copy": {"type": "object", "required": True},
+                    "brand_data": {"type": "object", "required": False},
+                    "platform": {"type": "string", "required": False}
+                }
+            },
+            {
+                "name": "composite_logo",
+                "description": "Place the brand logo onto a finished image",
+                "parameters": {
+                    "image_data": {"type": "bytes", "required": True},
+                    "logo_data": {"type": "bytes", "required": True},
+                    "platform": {"type": "string", "required": False},
+                    "placement": {"type": "string", "required": False}
+                }
+            },
             {
                 "name": "resize_image",
                 "description": "Resize an image for a specific platform",
@@ -114,8 +273,13 @@ class MediaMCPServer:
         tool_map = {
             "analyze_reference_image": self.analyze_reference_image,
             "process_brief": self.process_brief,
+            "analyze_brief_and_reference": self.analyze_brief_and_reference,
             "generate_image_prompt": self.generate_image_prompt,
             "generate_image": self.generate_image,
+            "generate_image_gated": self.generate_image_gated,
+            "generate_image_candidates": self.generate_image_candidates,
+            "render_text_overlay": self.render_text_overlay,
+            "composite_logo": self.composite_logo,
             "resize_image": self.resize_image
         }
 
@@ -127,70 +291,126 @@ class MediaMCPServer:
             )
 
         try:
-            result = await tool_map[tool_name](**kwargs)
+            if tool_name in self.single_flight_tools:
+                result = await self.single_flight.do(
+                    call_key(tool_name, kwargs),
+                    lambda: tool_map[tool_name](**kwargs)
+                )
+            else:
+                result = await tool_map[tool_name](**kwargs)
             return MCPToolResult(success=True, data=result)
         except Exception as e:
             return MCPToolResult(success=False, data=None, error=str(e))
 
     # ==================== TOOL IMPLEMENTATIONS ====================
 
-    async def analyze_reference_image(self, image_data: bytes) -> Dict:
+    async def analyze_reference_image(
+        self,
+        image_data: bytes,
+        mode: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> Dict:
         """
         Analyze a reference image to extract visual style.
 
+        Palette, lighting, texture and composition are measured locally; the
+        vision model is only asked for the mood, keywords and description,
+        on a model tier chosen from the image's measured complexity.
+
         Args:
-            image_data: Raw image bytes
+            image_data: Raw image bytes (any common format; downscaled and
+                re-encoded before upload)
+            mode: "hybrid" or "local" (skip the model); defaults to the server's mode
+            latency_budget: Seconds the model call should take (prefers smaller tiers)
 
         Returns:
-            Style information dictionary
+            Style information dictionary (`analysis` records which mode ran)
         """
-        prompt = """
-        Analyze this reference image and extract its visual style for use in generating similar marketing content.
+        mode = mode or self.style_mode
+        if mode not in STYLE_MODES:
+            raise ValueError(f"Unknown style analysis mode: {mode}")
+
+        # Sniff, downscale and strip the upload (CPU-bound, cached by content hash)
+        prepared = await asyncio.to_thread(self.reference_preprocessor.prepare, image_data)
+        style = await asyncio.to_thread(extract_style, prepared.data)
+
+        if mode == "local":
+            return {**style, **describe_locally(style), "analysis": "local"}
+
+        prompt = f"""
+        Describe the visual style of this reference image for use in generating similar marketing content.
+        Measured already: lighting is {style['lighting']}; composition is {style['composition']}.
 
         Return a JSON object with:
-        {
-            "color_palette": ["list of dominant colors as hex codes"],
-            "lighting": "description of lighting style",
-            "composition": "composition style description",
+        {{
             "mood": "overall mood/atmosphere",
-            "texture": "texture quality description",
             "style_keywords": ["keyword1", "keyword2", "keyword3"],
             "style_description": "2-3 sentence description of the visual style that can be used in image generation"
-        }
+        }}
 
         Return ONLY valid JSON, no markdown code blocks or explanation.
         """
 
         # Create image part for multimodal input
         image_part = {
-            "mime_type": "image/jpeg",
-            "data": base64.b64encode(image_data).decode("utf-8")
+            "mime_type": prepared.mime_type,
+            "data": prepared.data
         }
 
-        response = await self.vision_model.generate_content_async([prompt, image_part])
-        text = response.text.strip()
-
-        # Clean up response if wrapped in markdown
-        if text.startswith("```"):
-            lines = text.split("\n")
-            text = "\n".join(lines[1:-1])
-        if text.startswith("json"):
-            text = text[4:].strip()
+        try:
+            described = await self._routed_json(
+                "reference",
+                reference_complexity(style),
+                [prompt, image_part],
+                latency_budget,
+                required=("mood", "style_description")
+            )
+        except Exception as e:
+            print(f"Style description failed, using local description: {e}")
+            return {**style, **describe_locally(style), "analysis": "local"}
 
-        import json
-        return json.loads(text)
+        return {**style, **describe_locally(style), **described, "analysis": "hybrid"}
 
-    async def process_brief(self, brief: str, client_name: str) -> Dict:
+    async def process_brief(
+        self,
+        brief: str,
+        client_name: str,
+        use_cache: bool = True,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        latency_budget: Optional[float] = None
+    ) -> Dict:
         """
         Process a campaign brief and extract structured information.
 
+        A templated or key-value brief ("Xmas promo for burgers, festive,
+        CTA: Order Now") is extracted locally when the rules are confident
+        enough, and a brief similar enough to one already processed for the
+        same client reuses that result; neither makes a model call. Otherwise
+        the response is
+        streamed and parsed incrementally, and each top-level field is passed
+        to `on_field` as soon as it is complete, so callers can start work
+        that needs e.g. only the theme before the whole response arrives.
+
+        The model tier is chosen from the brief's complexity; a response that
+        does not parse is retried on the next larger tier, in which case
+        `on_field` may see fields a second time.
+
         Args:
             brief: Campaign brief text
             client_name: Name of the client
+            use_cache: Consult and fill the semantic brief cache
+            on_field: Called with (field, value) for each field as it completes;
+                must not block
+            latency_budget: Seconds the model call should take (prefers smaller tiers)
 
         Returns:
-            Structured brief data
+            Structured brief data (with `brief_rules` describing the format and
+            confidence of a local extraction, or `brief_cache` the match on a cache hit)
         """
+        local = self._local_brief(brief, client_name, use_cache, on_field)
+        if local:
+            return local
+
         prompt = f"""
         Analyze this marketing campaign brief for {client_name} and extract structured information.
 
@@ -198,60 +418,288 @@ class MediaMCPServer:
 
         Return a JSON object with:
         {{
-            "theme": "main theme (e.g., Christmas, Summer Sale, Product Launch)",
-            "mood": "overall mood (e.g., festive, warm, energetic, professional)",
-            "key_elements": ["list", "of", "visual", "elements", "to include"],
-            "colors_suggested": ["color suggestions based on theme"],
-            "headline": "catchy headline text to display prominently on the image (ALWAYS provide one based on campaign)",
-            "subheadline": "secondary text like tagline or offer details (can be null)",
-            "text_overlay": "combined marketing text for the image",
-            "style_keywords": ["keywords", "for", "image", "generation"],
-            "target_audience": "who this is for",
-            "call_to_action": "what action should viewers take (e.g., Order Now, Shop Today)"
+{BRIEF_FIELDS}
         }}
 
-        IMPORTANT: Always generate compelling marketing text (headline + call_to_action) based on the campaign description.
-        For food/restaurant campaigns, suggest appetizing headlines like "Taste the Fusion" or "Fresh & Flavorful".
+{BRIEF_GUIDANCE}
 
         Return ONLY valid JSON, no markdown code blocks or explanation.
         """
 
-        response = await self.text_model.generate_content_async(prompt)
-        text = response.text.strip()
+        brief_data = await self._routed_json(
+            "brief", brief_complexity(brief), prompt, latency_budget, on_field, required=("theme",)
+        )
+        if use_cache and self.brief_cache:
+            self.brief_cache.put(client_name, brief, brief_data)
+        return brief_data
+
+    async def analyze_brief_and_reference(
+        self,
+        brief: str,
+        client_name: str,
+        image_data: bytes,
+        mode: Optional[str] = None,
+        use_cache: bool = True,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        latency_budget: Optional[float] = None
+    ) -> Dict:
+        """
+        Process a brief and analyze its reference image in one multimodal call.
+
+        The brief fields and the reference style descriptors share one
+        response schema, so the prompt preamble is sent and the image is
+        uploaded once instead of running process_brief and
+        analyze_reference_image side by side. The brief fields are streamed
+        to `on_field` as in process_brief.
+
+        The separate calls are used instead when they are cheaper or the
+        fused response is unusable: in "local" style mode (no style call to
+        fuse with), when the brief is extracted locally or found in the cache
+        (only the style call remains), and
+        when the fused response does not parse on any model tier. In the last
+        case `on_field` may see fields a second time.
+
+        Args:
+            brief: Campaign brief text
+            client_name: Name of the client
+            image_data: Raw reference image bytes
+            mode: Style analysis mode ("hybrid" or "local"); defaults to the server's mode
+            use_cache: Consult and fill the semantic brief cache
+            on_field: Called with (field, value) for each brief field as it completes;
+                must not block
+            latency_budget: Seconds the model call should take (prefers smaller tiers)
+
+        Returns:
+            Dict with brief_data, style_data (None if only the style analysis
+            failed, with the reason in style_error) and `path`: "fused" or "split"
+        """
+        mode = mode or self.style_mode
+        if mode not in STYLE_MODES:
+            raise ValueError(f"Unknown style analysis mode: {mode}")
+
+        local = self._local_brief(brief, client_name, use_cache, on_field)
+        if mode == "local" or local:
+            return await self._split_analysis(
+                brief, client_name, image_data, mode, use_cache, on_field, latency_budget, local
+            )
+
+        prepared = await asyncio.to_thread(self.reference_preprocessor.prepare, image_data)
+        style = await asyncio.to_thread(extract_style, prepared.data)
+
+        prompt = f"""
+        Analyze this marketing campaign brief for {client_name} and extract structured information,
+        and describe the visual style of the attached reference image for use in generating similar
+        marketing content.
 
-        # Clean up response
+        Brief: {brief}
+
+        Measured from the reference image already: lighting is {style['lighting']}; composition is {style['composition']}.
+
+        Return a JSON object with:
+        {{
+{BRIEF_FIELDS},
+            "reference_style": {{
+                "mood": "overall mood/atmosphere of the reference image",
+                "style_keywords": ["keyword1", "keyword2", "keyword3"],
+                "style_description": "2-3 sentence description of the visual style that can be used in image generation"
+            }}
+        }}
+
+        The brief fields describe the campaign; "reference_style" describes only the image.
+{BRIEF_GUIDANCE}
+
+        Return ONLY valid JSON, no markdown code blocks or explanation.
+        """
+
+        def on_brief_field(field: str, value: Any):
+            if on_field and field != "reference_style":
+                on_field(field, value)
+
+        try:
+            fused = await self._routed_json(
+                "brief_and_reference",
+                max(brief_complexity(brief), reference_complexity(style)),
+                [prompt, {"mime_type": prepared.mime_type, "data": prepared.data}],
+                latency_budget,
+                on_brief_field,
+                required=("theme", "reference_style")
+            )
+            described = fused.pop("reference_style")
+            if not isinstance(described, dict):
+                raise ValueError("reference_style is not an object")
+        except Exception as e:
+            print(f"Fused brief/reference analysis failed, using separate calls: {e}")
+            return await self._split_analysis(
+                brief, client_name, image_data, mode, use_cache, on_field, latency_budget
+            )
+
+        if use_cache and self.brief_cache:
+            self.brief_cache.put(client_name, brief, fused)
+        return {
+            "brief_data": fused,
+            "style_data": {**style, **describe_locally(style), **described, "analysis": "hybrid"},
+            "path": "fused",
+        }
+
+    async def _split_analysis(
+        self,
+        brief: str,
+        client_name: str,
+        image_data: bytes,
+        mode: str,
+        use_cache: bool,
+        on_field: Optional[Callable[[str, Any], None]],
+        latency_budget: Optional[float],
+        brief_data: Optional[Dict] = None
+    ) -> Dict:
+        if brief_data is None:
+            brief_data, style_data = await asyncio.gather(
+                self.process_brief(
+                    brief, client_name, use_cache=use_cache, on_field=on_field, latency_budget=latency_budget
+                ),
+                self.analyze_reference_image(image_data, mode, latency_budget),
+                return_exceptions=True
+            )
+            if isinstance(brief_data, BaseException):
+                raise brief_data
+        else:
+            try:
+                style_data = await self.analyze_reference_image(image_data, mode, latency_budget)
+            except Exception as e:
+                style_data = e
+
+        result = {"brief_data": brief_data, "style_data": style_data, "path": "split"}
+        if isinstance(style_data, BaseException):
+            result["style_data"] = None
+            result["style_error"] = str(style_data)
+        return result
+
+    def _local_brief(
+        self,
+        brief: str,
+        client_name: str,
+        use_cache: bool,
+        on_field: Optional[Callable[[str, Any], None]]
+    ) -> Optional[Dict]:
+        """Brief data available without a model call: a confident rule extraction or a cache hit."""
+        brief_data, source = None, None
+        if self.brief_rules_confidence is not None:
+            extraction = extract_brief(brief)
+            if extraction and extraction.confidence >= self.brief_rules_confidence:
+                brief_data = extraction.brief_data
+                source = {"brief_rules": {"format": extraction.format, "confidence": extraction.confidence}}
+            elif extraction:
+                print(
+                    f"Brief looks {extraction.format} but rule confidence {extraction.confidence:.2f} "
+                    f"is below {self.brief_rules_confidence:.2f}; using the model"
+                )
+
+        if brief_data is None and use_cache and self.brief_cache:
+            match = self.brief_cache.get(client_name, brief)
+            if match:
+                brief_data = match.brief_data
+                source = {"brief_cache": {"similarity": round(match.similarity, 3), "matched_brief": match.brief}}
+
+        if brief_data is None:
+            return None
+        if on_field:
+            for field, value in brief_data.items():
+                on_field(field, value)
+        return {**brief_data, **source}
+
+    async def _stream_json(
+        self,
+        model: "genai.GenerativeModel",
+        contents: Any,
+        on_field: Optional[Callable[[str, Any], None]]
+    ) -> Dict:
+        """Stream a JSON-object response, passing top-level fields to on_field as they complete."""
+        parser = IncrementalJSONParser()
+        response = await model.generate_content_async(contents, stream=True)
+        async for chunk in response:
+            for field, value in parser.feed(chunk.text):
+                if on_field:
+                    on_field(field, value)
+
+        if parser.done and not parser.failed:
+            return parser.fields
+
+        # Not a single well-formed object; parse the full text the old way
+        text = parser.text.strip()
         if text.startswith("```"):
             lines = text.split("\n")
             text = "\n".join(lines[1:-1])
         if text.startswith("json"):
             text = text[4:].strip()
 
-        import json
         return json.loads(text)
 
+    async def _routed_json(
+        self,
+        stage: str,
+        complexity: float,
+        contents: Any,
+        latency_budget: Optional[float],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        required: Tuple[str, ...] = ()
+    ) -> Dict:
+        """
+        Stream a JSON-object response from the model tier the router picks.
+
+        A response that does not parse, or lacks a required field, is recorded
+        against its tier and retried on the next larger one.
+        """
+        tier = self.router.route(stage, complexity, latency_budget)
+        while True:
+            start = time.perf_counter()
+            try:
+                result = await self._stream_json(self.tier_models[tier], contents, on_field)
+                missing = [field for field in required if not isinstance(result, dict) or field not in result]
+                if missing:
+                    raise ValueError(f"response is missing {', '.join(missing)}")
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError
+                self.router.record(stage, tier, time.perf_counter() - start, parsed=False)
+                larger = self.router.escalate(tier)
+                if larger is None:
+                    raise
+                print(
+                    f"{self.router.tiers[tier]} returned unusable JSON for {stage}, "
+                    f"retrying on {self.router.tiers[larger]}: {e}"
+                )
+                tier = larger
+                continue
+
+            self.router.record(stage, tier, time.perf_counter() - start, parsed=True)
+            return result
+
     async def generate_image_prompt(
         self,
         brief_data: Dict,
-        brand_data: Dict,
+        brand_data: Union[Dict, BrandProfile],
         style_data: Optional[Dict] = None,
-        platform: str = "instagram_post"
+        platform: str = "instagram_post",
+        text_mode: str = "model"
     ) -> str:
         """
         Generate an optimized prompt for image generation.
 
         Args:
             brief_data: Processed brief information
-            brand_data: Brand guidelines
+            brand_data: Brand guidelines (dict with `version`, or a compiled BrandProfile)
             style_data: Optional style from reference image
             platform: Target platform
+            text_mode: "model" to have the model render the copy, or "local" for a
+                text-free background (copy is added by render_text_overlay)
 
         Returns:
             Optimized image generation prompt
         """
+        brand = as_brand_profile(brand_data)
         prompt_parts = []
 
         # Core description
-        prompt_parts.append(f"Professional marketing image for {brand_data.get('name', 'brand')}")
+        prompt_parts.append(brand.prompt_fragments["identity"])
 
         # Theme and mood
         if brief_data.get("theme"):
@@ -264,14 +712,17 @@ class MediaMCPServer:
             elements = ", ".join(brief_data["key_elements"][:5])  # Limit to 5
             prompt_parts.append(f"Include: {elements}")
 
-        # Brand colors (important for consistency)
-        if brand_data.get("colors"):
-            colors = ", ".join(brand_data["colors"][:3])  # Top 3 colors
-            prompt_parts.append(f"Brand colors: {colors}")
+        # Brand colors (important for consistency) - top 3, pre-rendered
+        if "colors" in brand.prompt_fragments:
+            prompt_parts.append(brand.prompt_fragments["colors"])
 
         # Brand style guidelines
-        if brand_data.get("style"):
-            prompt_parts.append(f"Brand style: {brand_data['style']}")
+        if "style" in brand.prompt_fragments:
+            prompt_parts.append(brand.prompt_fragments["style"])
+
+        # The real logo is composited afterwards (composite_logo)
+        if brand.logo_url:
+            prompt_parts.append("Do not draw any logo or watermark; keep the corners free of important detail")
 
         # Reference style (if provided)
         if style_data:
@@ -280,6 +731,16 @@ class MediaMCPServer:
             if style_data.get("style_description"):
                 prompt_parts.append(f"Visual style: {style_data['style_description']}")
 
+        if text_mode == "local":
+            layout_name = PLATFORM_LAYOUTS.get(platform, "square")
+            prompt_parts.append("No text, letters, numbers, logos or typography anywhere in the image")
+            prompt_parts.append(
+                f"Keep {NEGATIVE_SPACE_HINTS[layout_name]} calm and uncluttered as space for copy added later"
+            )
+            prompt_parts.append("High quality, professional photography, marketing-ready")
+            prompt_parts.append("Clean composition, visually appealing")
+            return ". ".join(prompt_parts)
+
         # Marketing text (IMPORTANT for ads)
         text_elements = []
         if brief_data.get("headline"):
@@ -318,6 +779,16 @@ class MediaMCPServer:
         Returns:
             Generated image bytes or None if failed
         """
+        image, _ = await self._generate_with_source(prompt, width, height)
+        return image
+
+    async def _generate_with_source(
+        self,
+        prompt: str,
+        width: int,
+        height: int
+    ) -> Tuple[Optional[bytes], Optional[Tuple[int, int]]]:
+        """Generate an image; also returns the model's native (width, height), if any."""
         try:
             # Use Gemini 2.0 Flash with image generation capability
             # Configure model with image output modality
@@ -365,73 +836,16 @@ Create this image now."""
             # Extract image from response
             if response.candidates:
                 for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'inline_data') and part.inline_data:
-                        # Get image data from response
-                        raw_data = part.inline_data.data
-                        mime_type = getattr(part.inline_data, 'mime_type', 'unknown')
-
-                        print(f"Raw data type: {type(raw_data)}, Length: {len(raw_data) if raw_data else 0}")
-                        print(f"MIME type: {mime_type}")
-
-                        # Determine if data is already raw bytes or needs base64 decoding
-                        if isinstance(raw_data, str):
-                            # String data is definitely base64 encoded
-                            image_data = base64.b64decode(raw_data)
-                        elif isinstance(raw_data, bytes):
-                            # Check if first bytes match known image magic bytes
-                            # PNG: \x89PNG, JPEG: \xff\xd8\xff, WebP: RIFF
-                            if raw_data[:4] == b'\x89PNG' or raw_data[:3] == b'\xff\xd8\xff' or raw_data[:4] == b'RIFF':
-                                # Already raw image bytes
-                                image_data = raw_data
-                                print("Data is already raw image bytes")
-                            else:
-                                # Might be base64 bytes - check if ASCII printable
-                                try:
-                                    # Check first 100 bytes for base64 chars
-                                    test_chunk = raw_data[:100]
-                                    if all(c < 128 and chr(c) in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=' for c in test_chunk):
-                                        image_data = base64.b64decode(raw_data)
-                                        print("Decoded base64 bytes")
-                                    else:
-                                        # Assume raw bytes
-                                        image_data = raw_data
-                                        print("Using raw bytes (not base64)")
-                                except Exception as e:
-                                    image_data = raw_data
-                                    print(f"Base64 check failed, using raw: {e}")
-                        else:
-                            image_data = raw_data
-
-                        # Debug: print first bytes
-                        if image_data:
-                            png_magic = b'\x89PNG'
-                            jpeg_magic = b'\xff\xd8\xff'
-                            print(f"First 20 bytes after processing: {image_data[:20]}")
-                            print(f"Looks like PNG: {image_data[:4] == png_magic}")
-                            print(f"Looks like JPEG: {image_data[:3] == jpeg_magic}")
-
-                        # Try to open the image
+                    if hasattr(part, 'inline_data') and part.inline_data and part.inline_data.data:
+                        image_data = decode_inline_data(part.inline_data.data)
+                        header = image_dimensions(image_data)
+                        source_size = header[1:] if header else None
                         try:
-                            img = Image.open(io.BytesIO(image_data))
-                            print(f"Successfully opened image: {img.format} {img.size}")
-                            if img.size != (width, height):
-                                img = img.resize((width, height), Image.Resampling.LANCZOS)
-
-                            img_byte_arr = io.BytesIO()
-                            img.save(img_byte_arr, format='PNG')
-                            return img_byte_arr.getvalue()
-                        except Exception as img_err:
-                            print(f"Failed to open image: {img_err}")
-
-                            # Save raw data for debugging
-                            try:
-                                with open("/tmp/gemini_raw_debug.bin", "wb") as f:
-                                    f.write(raw_data if isinstance(raw_data, bytes) else raw_data.encode())
-                                with open("/tmp/gemini_processed_debug.bin", "wb") as f:
-                                    f.write(image_data)
-                                print("Saved debug files to /tmp/gemini_*_debug.bin")
-                            except Exception as save_err:
-                                print(f"Could not save debug: {save_err}")
+                            # Passes through untouched if already a PNG of the right size
+                            return await asyncio.to_thread(to_png, image_data, width, height), source_size
+                        except ValueError as img_err:
+                            mime_type = getattr(part.inline_data, 'mime_type', 'unknown')
+                            print(f"Failed to open image ({mime_type}, {len(image_data)} bytes): {img_err}")
                             continue
 
             # If no image found, log what we got and return placeholder
@@ -439,12 +853,110 @@ Create this image now."""
                 print(f"Response parts: {[type(p).__name__ for p in response.candidates[0].content.parts]}")
 
             print("No valid image in response, using placeholder")
-            return self._create_placeholder_image(prompt, width, height)
+            return self._create_placeholder_image(prompt, width, height), None
 
         except Exception as e:
             print(f"Image generation error: {e}")
             # Return a placeholder image with the prompt
-            return self._create_placeholder_image(prompt, width, height)
+            return self._create_placeholder_image(prompt, width, height), None
+
+    async def generate_image_gated(
+        self,
+        prompt: str,
+        width: int = 1080,
+        height: int = 1080,
+        brand_data: Union[Dict, BrandProfile, None] = None,
+        max_retries: Optional[int] = None
+    ) -> Dict:
+        """
+        Generate an image and regenerate it while it fails the quality gate.
+
+        Only the image call is repeated; the prompt gets a hint per failed
+        check (e.g. a blank frame or missing brand colors). If every attempt
+        fails, the attempt with the fewest failures is returned.
+
+        Args:
+            prompt: Image generation prompt
+            width: Target width
+            height: Target height
+            brand_data: Brand guidelines, for the brand-color coverage check
+            max_retries: Regenerations allowed (defaults to the server's gate_retries)
+
+        Returns:
+            Dict with `image`, its `gate` result and the gate result of every attempt
+        """
+        max_retries = self.gate_retries if max_retries is None else max(0, max_retries)
+
+        attempts = []
+        best = None
+        attempt_prompt = prompt
+        for _ in range(max_retries + 1):
+            image, source_size = await self._generate_with_source(attempt_prompt, width, height)
+            gate = await asyncio.to_thread(
+                quality_gate, image, width, height, brand_data, source_size, self._is_placeholder(image)
+            )
+            attempts.append(gate)
+            if best is None or len(gate["failures"]) <= len(best[1]["failures"]):
+                best = (image, gate)
+            if gate["passed"]:
+                break
+            print(f"Quality gate failed ({', '.join(gate['failures'])}), regenerating image")
+            attempt_prompt = retry_prompt(prompt, gate["failures"], brand_data)
+
+        image, gate = best
+        return {"image": image, "gate": gate, "attempts": attempts}
+
+    async def generate_image_candidates(
+        self,
+        prompt: str,
+        width: int = 1080,
+        height: int = 1080,
+        count: int = 3,
+        brand_data: Union[Dict, BrandProfile, None] = None,
+        platform: str = "instagram_post",
+        text_mode: str = "model"
+    ) -> List[Dict]:
+        """
+        Generate several candidates concurrently and rank them locally.
+
+        Each candidate is scored with NumPy metrics (brand-color proximity,
+        sharpness, text-region contrast, blank detection) in a worker thread.
+
+        Args:
+            prompt: Image generation prompt
+            width: Target width
+            height: Target height
+            count: Number of candidates (1-8)
+            brand_data: Brand guidelines, for palette proximity
+            platform: Target platform (locates the copy area in local text mode)
+            text_mode: "local" scores the copy area for calmness instead of contrast
+
+        Returns:
+            Candidates as {"image": bytes, "score": float, "metrics": dict, "gate": dict},
+            best first
+        """
+        count = max(1, min(count, 8))
+        results = await asyncio.gather(*[self._generate_with_source(prompt, width, height) for _ in range(count)])
+
+        copy_box = None
+        if text_mode == "local":
+            _, layout = layout_for(platform, width, height)
+            copy_box = layout["box"]
+
+        async def rank(image: bytes, source_size: Optional[Tuple[int, int]]) -> Dict:
+            metrics = await asyncio.to_thread(score_image, image, brand_data, copy_box)
+            gate = await asyncio.to_thread(
+                quality_gate, image, width, height, brand_data, source_size, self._is_placeholder(image)
+            )
+            return {"image": image, "score": metrics["score"], "metrics": metrics, "gate": gate}
+
+        candidates = await asyncio.gather(*[rank(image, source) for image, source in results if image])
+        # Candidates that pass the quality gate always rank above those that fail
+        return sorted(candidates, key=lambda c: (c["gate"]["passed"], c["score"]), reverse=True)
+
+    def _is_placeholder(self, image_data: bytes) -> bool:
+        """Whether the bytes are a placeholder created by this server."""
+        return hashlib.sha256(image_data).hexdigest() in self._placeholder_hashes
 
     def _create_placeholder_image(
         self,
@@ -530,7 +1042,61 @@ Create this image now."""
         # Save to bytes
         img_byte_arr = io.BytesIO()
         img.save(img_byte_arr, format='PNG')
-        return img_byte_arr.getvalue()
+        placeholder = img_byte_arr.getvalue()
+
+        # Remembered so the quality gate can reject it
+        self._placeholder_hashes[hashlib.sha256(placeholder).hexdigest()] = None
+        while len(self._placeholder_hashes) > 256:
+            self._placeholder_hashes.popitem(last=False)
+        return placeholder
+
+    async def render_text_overlay(
+        self,
+        image_data: bytes,
+        copy: Dict,
+        brand_data: Union[Dict, BrandProfile, None] = None,
+        platform: str = "instagram_post"
+    ) -> bytes:
+        """
+        Render marketing copy onto a text-free image with the brand's fonts and colors.
+
+        Re-rendering the same background with different copy (variants,
+        translations) reuses the decoded image and loaded fonts.
+
+        Args:
+            image_data: Background image bytes
+            copy: Dict with headline, subheadline and call_to_action
+                (processed brief data works as-is)
+            brand_data: Brand guidelines (dict or compiled BrandProfile)
+            platform: Target platform (selects the layout template)
+
+        Returns:
+            PNG image bytes
+        """
+        return await asyncio.to_thread(self.compositor.render, image_data, copy, brand_data, platform)
+
+    async def composite_logo(
+        self,
+        image_data: bytes,
+        logo_data: bytes,
+        platform: str = "instagram_post",
+        placement: Optional[str] = None
+    ) -> bytes:
+        """
+        Place a brand logo onto a finished image.
+
+        Args:
+            image_data: Asset image bytes
+            logo_data: Logo image bytes (transparent PNG recommended)
+            platform: Target platform (selects the default corner)
+            placement: top_left, top_right, bottom_left or bottom_right
+
+        Returns:
+            PNG image bytes
+        """
+        return await asyncio.to_thread(
+            self.logo_compositor.composite, image_data, logo_data, platform, placement
+        )
 
     async def resize_image(
         self,
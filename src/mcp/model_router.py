@@ -0,0 +1,210 @@
+"""
+Model Router - picks a model tier for each analysis call.
+
+Most briefs are a line or two ("Xmas promo, festive, burgers") and most
+reference images are simple; a small, fast model structures them as well as
+the large one. Tiers are configured smallest first, and each call is routed:
+- by input complexity: a score in [0, 1] maps evenly onto the tiers
+- past tiers that keep failing to return valid JSON for that stage
+- down to a smaller tier when the chosen one is observed to exceed the
+  request's latency budget
+
+Per stage and tier the router keeps exponentially weighted latency and
+JSON-failure rates, so routing adapts as models speed up, slow down or start
+returning malformed output. A tier skipped as unreliable is still probed
+every PROBE_EVERY skips, so it can recover.
+"""
+from typing import Optional, Dict, List, Sequence, Tuple
+from dataclasses import dataclass
+import re
+
+
+# Smallest first
+MODEL_TIERS = ("gemini-2.0-flash-lite", "gemini-2.0-flash-exp")
+
+# Weight of the newest observation in the moving averages
+EWMA_ALPHA = 0.2
+
+# A tier is skipped once it has at least MIN_SAMPLES calls and a failure
+# rate above MAX_FAILURE_RATE for the stage
+MIN_SAMPLES = 5
+MAX_FAILURE_RATE = 0.2
+PROBE_EVERY = 20
+
+_SENTENCE_BREAK = re.compile(r"[.;!?\n]+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?%?")
+_CONSTRAINT = re.compile(
+    r"\b(must|should|need|needs|include|including|avoid|without|only|not|don't|no|but|also|except|versus|vs)\b",
+    re.IGNORECASE
+)
+
+
+def brief_complexity(brief: str) -> float:
+    """
+    Complexity of a brief, from its length, structure and constraints.
+
+    Args:
+        brief: Campaign brief text
+
+    Returns:
+        Score in [0, 1]; short single-idea briefs score near 0
+    """
+    words = len(brief.split())
+    sentences = len([part for part in _SENTENCE_BREAK.split(brief) if part.strip()])
+    numbers = len(_NUMBER.findall(brief))
+    constraints = len(_CONSTRAINT.findall(brief))
+
+    score = (
+        0.5 * min(words / 120, 1.0)
+        + 0.2 * min(max(sentences - 1, 0) / 6, 1.0)
+        + 0.15 * min(numbers / 4, 1.0)
+        + 0.15 * min(constraints / 5, 1.0)
+    )
+    return round(score, 3)
+
+
+def reference_complexity(style: Dict) -> float:
+    """
+    Complexity of a reference image, from its local style measurements.
+
+    Busy, detailed images with an even spread of colors are harder to
+    describe than flat ones dominated by a single color.
+
+    Args:
+        style: Output of style_analysis.extract_style()
+
+    Returns:
+        Score in [0, 1]
+    """
+    metrics = style["metrics"]
+    weights = style.get("palette_weights") or [1.0]
+    score = 0.6 * min(metrics["edge_density"] / 0.2, 1.0) + 0.4 * (1.0 - max(weights))
+    return round(score, 3)
+
+
+@dataclass
+class TierStats:
+    """Observed behaviour of one tier for one stage."""
+    calls: int = 0
+    failures: int = 0
+    latency: Optional[float] = None  # Moving average, seconds
+    failure_rate: float = 0.0  # Moving average of JSON failures
+    skipped: int = 0
+
+
+class ModelRouter:
+    """
+    Routes analysis calls across model tiers and learns from their outcomes.
+
+    Intended for use from a single event loop; route() and record() do not
+    await, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[str] = MODEL_TIERS,
+        max_failure_rate: float = MAX_FAILURE_RATE,
+        min_samples: int = MIN_SAMPLES
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            tiers: Model names, smallest (fastest, cheapest) first
+            max_failure_rate: JSON failure rate above which a tier is skipped
+            min_samples: Calls observed before a tier can be skipped
+        """
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = list(tiers)
+        self.max_failure_rate = max_failure_rate
+        self.min_samples = min_samples
+        self._stats: Dict[Tuple[str, int], TierStats] = {}
+
+    def _tier_stats(self, stage: str, tier: int) -> TierStats:
+        return self._stats.setdefault((stage, tier), TierStats())
+
+    def _unreliable(self, stage: str, tier: int) -> bool:
+        stats = self._tier_stats(stage, tier)
+        return stats.calls >= self.min_samples and stats.failure_rate > self.max_failure_rate
+
+    def _skip(self, stage: str, tier: int) -> bool:
+        """Whether to pass over a tier, letting every PROBE_EVERY-th call through."""
+        if not self._unreliable(stage, tier):
+            return False
+        stats = self._tier_stats(stage, tier)
+        stats.skipped += 1
+        return stats.skipped % PROBE_EVERY != 0
+
+    def route(self, stage: str, complexity: float, latency_budget: Optional[float] = None) -> int:
+        """
+        Pick the tier for a call.
+
+        Args:
+            stage: Call type, e.g. "brief" or "reference"
+            complexity: Input complexity in [0, 1]
+            latency_budget: Seconds the call should take at most (None: no limit)
+
+        Returns:
+            Index into `tiers`
+        """
+        last = len(self.tiers) - 1
+        tier = min(int(max(complexity, 0.0) * len(self.tiers)), last)
+
+        while tier < last and self._skip(stage, tier):
+            tier += 1
+
+        if latency_budget is not None:
+            # Trade size for speed only while the observed latency is over budget
+            while tier > 0:
+                latency = self._tier_stats(stage, tier).latency
+                if latency is None or latency <= latency_budget or self._unreliable(stage, tier - 1):
+                    break
+                tier -= 1
+
+        return tier
+
+    def escalate(self, tier: int) -> Optional[int]:
+        """
+        Next larger tier, for retrying a call whose response did not parse.
+
+        Args:
+            tier: Tier that failed
+
+        Returns:
+            Index of the next tier, or None if `tier` is the largest
+        """
+        return tier + 1 if tier + 1 < len(self.tiers) else None
+
+    def record(self, stage: str, tier: int, latency: float, parsed: bool):
+        """
+        Record the outcome of a routed call.
+
+        Args:
+            stage: Call type passed to route()
+            tier: Tier that handled the call
+            latency: Seconds the call took
+            parsed: Whether the response was valid JSON of the expected shape
+        """
+        stats = self._tier_stats(stage, tier)
+        stats.calls += 1
+        stats.failures += 0 if parsed else 1
+        stats.latency = latency if stats.latency is None else (
+            EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats.latency
+        )
+        stats.failure_rate = EWMA_ALPHA * (0.0 if parsed else 1.0) + (1 - EWMA_ALPHA) * stats.failure_rate
+
+    def stats(self) -> List[Dict]:
+        """Calls, failures, average latency and failure rate per stage and tier."""
+        return [
+            {
+                "stage": stage,
+                "model": self.tiers[tier],
+                "calls": stats.calls,
+                "failures": stats.failures,
+                "latency": round(stats.latency, 3) if stats.latency is not None else None,
+                "failure_rate": round(stats.failure_rate, 3),
+                "skipped": self._unreliable(stage, tier),
+            }
+            for (stage, tier), stats in sorted(self._stats.items())
+        ]
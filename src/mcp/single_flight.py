@@ -0,0 +1,91 @@
+"""
+Single Flight - coalescing of concurrent identical tool calls.
+
+When several users hit Generate with the same brief within seconds, each
+request would otherwise pay for its own model calls. Calls are keyed by
+tool name and a canonical hash of their arguments; while one is in flight,
+identical calls await the same task instead of starting another.
+
+Nothing is cached: once the shared call finishes its key is released, and
+the next identical call runs again.
+"""
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import copy
+import hashlib
+import json
+
+from .brand_profile import BrandProfile
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-serializable form of a tool argument; binary data is reduced to its hash."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, BrandProfile):
+        return {"brand_version": value.version}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def call_key(tool_name: str, kwargs: Dict[str, Any]) -> str:
+    """
+    Canonical key for a tool call.
+
+    Callables (progress callbacks such as process_brief's on_field) are
+    not part of the key; a call that joins another only gets the result.
+
+    Args:
+        tool_name: Tool being called
+        kwargs: Tool arguments
+
+    Returns:
+        Hex digest identifying the tool and its arguments
+    """
+    arguments = {name: value for name, value in kwargs.items() if not callable(value)}
+    payload = json.dumps([tool_name, _canonical(arguments)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Shares one in-flight task between concurrent calls with the same key."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn(), or join the identical call already in flight.
+
+        Every caller gets its own deep copy of the result, so a caller
+        mutating its result cannot affect the others (bytes are shared, not
+        copied). Cancelling one caller does not cancel the shared task.
+
+        Args:
+            key: Call key (see call_key)
+            fn: Coroutine function performing the call
+
+        Returns:
+            The call's result (exceptions propagate to every caller)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        self.calls += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, int]:
+        """Calls executed, calls coalesced and calls currently in flight."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
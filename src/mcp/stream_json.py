@@ -0,0 +1,97 @@
+"""
+Stream JSON - incremental parsing of a streamed JSON object.
+
+Model responses are streamed in arbitrary chunks. The parser scans each
+chunk once, tracking string/escape state and nesting depth, and emits every
+top-level member of the object as soon as its value is complete, e.g.
+`theme` and `mood` long before `call_to_action` has been generated.
+
+Anything before the opening brace (a markdown fence, "json", prose) and
+after the closing brace is ignored.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+
+class IncrementalJSONParser:
+    """Emits (key, value) pairs of a top-level JSON object as they complete."""
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start: Optional[int] = None
+        self._length = 0
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        # Set when a member could not be parsed; `fields` is then incomplete
+        self.failed = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Text as received from the stream
+
+        Returns:
+            Top-level members completed by this chunk, in order
+        """
+        completed = []
+        if self.done:
+            return completed
+
+        for char in chunk:
+            self._buffer.append(char)
+            position = self._length
+            self._length += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = position + 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._close_member(position)
+                    self.done = True
+                    break
+            elif char == "," and self._depth == 1:
+                completed += self._close_member(position)
+                self._member_start = position + 1
+
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = "".join(self._buffer[self._member_start:end]).strip()
+        if not member:
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            # Malformed member; the caller falls back to parsing the full text
+            self.failed = True
+            return []
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._buffer)
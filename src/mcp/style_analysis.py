@@ -0,0 +1,223 @@
+"""
+Style Analysis - local extraction of reference-image style fields.
+
+Most of what a vision model reports about a reference image is measurable
+directly from the pixels, in milliseconds, on a downsampled copy:
+- color_palette: k-means in CIE Lab over a pixel sample
+- lighting: luminance level, spread and warmth
+- texture: edge density and Laplacian sharpness
+- composition: where the detail sits relative to the frame
+
+Only the descriptive fields (mood, style keywords, style_description) need
+the model. In "local" mode those are also derived from the measurements, so
+no model call is made at all.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .image_quality import load_rgb, rgb_to_lab_array, luminance, laplacian_variance
+
+
+# Style analysis modes
+STYLE_MODES = ("hybrid", "local")
+
+# Palette extraction
+PALETTE_SIZE = 5
+PALETTE_SAMPLE = 4096
+KMEANS_ITERATIONS = 12
+
+# Gradient magnitude (0-255 luminance units) above which a pixel is an edge
+EDGE_THRESHOLD = 24.0
+
+
+def kmeans_palette(rgb: np.ndarray, k: int = PALETTE_SIZE) -> List[Tuple[str, float]]:
+    """
+    Dominant colors by k-means clustering in Lab space.
+
+    Args:
+        rgb: float array (h, w, 3), values 0-255
+        k: Number of clusters
+
+    Returns:
+        (hex color, pixel share) pairs, largest cluster first
+    """
+    pixels = rgb.reshape(-1, 3)
+    if len(pixels) > PALETTE_SAMPLE:
+        # Evenly strided sample keeps the result deterministic
+        pixels = pixels[:: len(pixels) // PALETTE_SAMPLE][:PALETTE_SAMPLE]
+    lab = rgb_to_lab_array(pixels)
+    k = min(k, len(np.unique(pixels, axis=0)))
+
+    # k-means++ seeding with a fixed seed
+    rng = np.random.default_rng(0)
+    centers = [lab[rng.integers(len(lab))]]
+    for _ in range(1, k):
+        distances = ((lab[:, None, :] - np.asarray(centers)[None, :, :]) ** 2).sum(axis=-1).min(axis=1)
+        centers.append(lab[rng.choice(len(lab), p=distances / distances.sum())])
+    centers = np.asarray(centers)
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = ((lab[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1).argmin(axis=1)
+        updated = np.asarray([
+            lab[labels == i].mean(axis=0) if np.any(labels == i) else centers[i]
+            for i in range(k)
+        ])
+        if np.allclose(updated, centers, atol=0.5):
+            break
+        centers = updated
+
+    counts = np.bincount(labels, minlength=k)
+    palette = []
+    for i in np.argsort(-counts):
+        if counts[i] == 0:
+            continue
+        # Report the mean sRGB of the members; avoids a Lab -> sRGB round trip
+        r, g, b = np.clip(pixels[labels == i].mean(axis=0).round(), 0, 255).astype(int)
+        palette.append((f"#{r:02X}{g:02X}{b:02X}", float(counts[i] / counts.sum())))
+    return palette
+
+
+def _describe_lighting(gray: np.ndarray, rgb: np.ndarray) -> Tuple[str, Dict]:
+    level = float(gray.mean())
+    spread = float(gray.std())
+    warmth = float((rgb[..., 0] - rgb[..., 2]).mean())
+
+    key = "bright high-key" if level > 170 else "dark low-key" if level < 85 else "balanced mid-tone"
+    contrast = "dramatic high contrast" if spread > 70 else "soft, low contrast" if spread < 35 else "moderate contrast"
+    tone = "warm" if warmth > 15 else "cool" if warmth < -15 else "neutral"
+
+    metrics = {"mean_luminance": round(level, 1), "luminance_std": round(spread, 1), "warmth": round(warmth, 1)}
+    return f"{tone} {key} lighting, {contrast}", metrics
+
+
+def _edge_map(gray: np.ndarray) -> np.ndarray:
+    gx = np.abs(np.diff(gray, axis=1))[:-1, :]
+    gy = np.abs(np.diff(gray, axis=0))[:, :-1]
+    return np.hypot(gx, gy)
+
+
+def _describe_texture(gray: np.ndarray, edges: np.ndarray) -> Tuple[str, Dict]:
+    density = float((edges > EDGE_THRESHOLD).mean()) if edges.size else 0.0
+    sharpness = laplacian_variance(gray)
+
+    if density < 0.04:
+        texture = "clean, smooth surfaces"
+    elif density < 0.12:
+        texture = "moderate, natural detail"
+    else:
+        texture = "rich, highly detailed texture"
+    if sharpness < 50:
+        texture += " with a soft focus"
+
+    return texture, {"edge_density": round(density, 4), "sharpness": round(sharpness, 1)}
+
+
+def _describe_composition(edges: np.ndarray) -> Tuple[str, Dict]:
+    total = float(edges.sum())
+    if not edges.size or total == 0:
+        return "minimal, uniform frame", {"detail_center": [0.5, 0.5]}
+
+    h, w = edges.shape
+    cx = float((edges.sum(axis=0) * np.arange(w)).sum() / total / w)
+    cy = float((edges.sum(axis=1) * np.arange(h)).sum() / total / h)
+
+    if abs(cx - 0.5) < 0.08 and abs(cy - 0.5) < 0.08:
+        composition = "centered subject"
+    elif min(abs(cx - 1 / 3), abs(cx - 2 / 3)) < 0.08 or min(abs(cy - 1 / 3), abs(cy - 2 / 3)) < 0.08:
+        composition = "rule-of-thirds placement"
+    else:
+        horizontal = "left" if cx < 0.5 else "right"
+        vertical = "upper" if cy < 0.5 else "lower"
+        composition = f"off-center subject toward the {vertical} {horizontal}"
+
+    # Share of the frame that is nearly free of detail
+    blocks = edges[: h - h % 8, : w - w % 8].reshape(h // 8, 8, w // 8, 8).mean(axis=(1, 3))
+    empty = float((blocks < EDGE_THRESHOLD / 4).mean()) if blocks.size else 0.0
+    if empty > 0.4:
+        composition += " with generous negative space"
+
+    return composition, {"detail_center": [round(cx, 3), round(cy, 3)], "negative_space": round(empty, 3)}
+
+
+def extract_style(image_data: bytes) -> Dict:
+    """
+    Measure the style fields of a reference image locally.
+
+    Args:
+        image_data: Image bytes (ideally already prepared by ReferencePreprocessor)
+
+    Returns:
+        Dict with color_palette, lighting, texture, composition and the
+        underlying `metrics`
+    """
+    rgb = load_rgb(image_data)
+    gray = luminance(rgb)
+    edges = _edge_map(gray)
+
+    palette = kmeans_palette(rgb)
+    lighting, lighting_metrics = _describe_lighting(gray, rgb)
+    texture, texture_metrics = _describe_texture(gray, edges)
+    composition, composition_metrics = _describe_composition(edges)
+
+    # Mean HSV-style saturation (max - min over max)
+    high, low = rgb.max(axis=-1), rgb.min(axis=-1)
+    saturation = float(np.where(high > 0, (high - low) / np.maximum(high, 1), 0).mean())
+
+    return {
+        "color_palette": [color for color, _ in palette],
+        "palette_weights": [round(share, 3) for _, share in palette],
+        "lighting": lighting,
+        "texture": texture,
+        "composition": composition,
+        "metrics": {
+            **lighting_metrics,
+            **texture_metrics,
+            **composition_metrics,
+            "saturation": round(saturation, 3),
+        },
+    }
+
+
+def describe_locally(style: Dict) -> Dict:
+    """
+    Fill mood, style_keywords and style_description from local measurements.
+
+    Used in "local" mode (no model call) and as a fallback when the model
+    call for the descriptive fields fails.
+
+    Args:
+        style: Output of extract_style()
+
+    Returns:
+        Dict with mood, style_keywords and style_description
+    """
+    metrics = style["metrics"]
+    bright = metrics["mean_luminance"] > 150
+    dark = metrics["mean_luminance"] < 85
+    vivid = metrics["saturation"] > 0.45
+    muted = metrics["saturation"] < 0.2
+    warm = metrics["warmth"] > 15
+
+    if dark:
+        mood = "cozy and intimate" if warm else "moody and dramatic"
+    elif bright and vivid:
+        mood = "energetic and playful"
+    elif bright:
+        mood = "calm and airy"
+    else:
+        mood = "inviting and balanced" if warm else "clean and professional"
+
+    keywords = [
+        "vibrant" if vivid else "muted" if muted else "natural color",
+        "warm tones" if warm else "cool tones" if metrics["warmth"] < -15 else "neutral tones",
+        "high contrast" if metrics["luminance_std"] > 70 else "soft light" if metrics["luminance_std"] < 35 else "even light",
+        "detailed" if metrics["edge_density"] >= 0.12 else "minimal" if metrics["edge_density"] < 0.04 else "textured",
+    ]
+
+    description = (
+        f"A {mood} image with {style['lighting']}. "
+        f"{style['composition'].capitalize()}, {style['texture']}, "
+        f"in a palette of {', '.join(style['color_palette'][:3])}."
+    )
+    return {"mood": mood, "style_keywords": keywords, "style_description": description}
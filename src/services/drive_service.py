@@ -3,13 +3,18 @@ Google Drive Service for managing brand assets and generated content.
 """
 import os
 import json
-from typing import Optional, List, Dict
+import time
+import asyncio
+from typing import Optional, List, Dict, Tuple
 from pathlib import Path
 import io
 
 # For local development without Google Drive
 MOCK_MODE = True
 
+# Seconds a file version seen by download_image is trusted without asking Drive
+VERSION_TTL = 300
+
 
 class DriveService:
     """Service for interacting with Google Drive."""
@@ -17,7 +22,8 @@ class DriveService:
     def __init__(
         self,
         service_account_json: Optional[str] = None,
-        root_folder_id: Optional[str] = None
+        root_folder_id: Optional[str] = None,
+        blob_cache=None
     ):
         """
         Initialize Drive service.
@@ -25,9 +31,12 @@ class DriveService:
         Args:
             service_account_json: Path to service account JSON file
             root_folder_id: ID of the root folder in Drive
+            blob_cache: Optional DiskBlobCache for downloaded images
         """
         self.root_folder_id = root_folder_id
         self.service = None
+        self.blob_cache = blob_cache
+        self._versions: Dict[str, Tuple[Optional[str], float]] = {}
 
         if not MOCK_MODE and service_account_json:
             self._init_drive_service(service_account_json)
@@ -43,6 +52,10 @@ class DriveService:
                 scopes=['https://www.googleapis.com/auth/drive']
             )
             self.service = build('drive', 'v3', credentials=credentials)
+
+            if self.blob_cache is None:
+                from ..mcp.blob_cache import DiskBlobCache
+                self.blob_cache = DiskBlobCache()
         except Exception as e:
             print(f"Failed to initialize Drive service: {e}")
             self.service = None
@@ -240,9 +253,28 @@ class DriveService:
             return None
 
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            # Download logic here
-            return None
+            # A recently seen version is trusted, so cache hits skip the metadata call
+            seen = self._versions.get(file_id)
+            if seen and time.monotonic() - seen[1] < VERSION_TTL:
+                version = seen[0]
+                cached = self.blob_cache.get(self.blob_cache.make_key(file_id, version))
+                if cached is not None:
+                    return cached
+
+            meta = await asyncio.to_thread(
+                self.service.files().get(fileId=file_id, fields="md5Checksum, modifiedTime").execute
+            )
+            version = meta.get("md5Checksum") or meta.get("modifiedTime")
+            self._versions[file_id] = (version, time.monotonic())
+            key = self.blob_cache.make_key(file_id, version)
+
+            cached = self.blob_cache.get(key)
+            if cached is not None:
+                return cached
+
+            data = await asyncio.to_thread(self.service.files().get_media(fileId=file_id).execute)
+            self.blob_cache.put(key, data)
+            return data
         except Exception as e:
             print(f"Error downloading image: {e}")
             return None
@@ -4,6 +4,7 @@ Uses Gemini 2.0 Flash for text and Imagen 3 for images.
 """
 import google.generativeai as genai
 from typing import Optional, List
+import asyncio
 import base64
 import httpx
 from pathlib import Path
@@ -12,10 +13,13 @@ from pathlib import Path
 class GeminiService:
     """Service for interacting with Google's Gemini AI."""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, reference_max_edge: int = 1024):
         """Initialize Gemini service with API key."""
+        from ..mcp.image_utils import ReferencePreprocessor
+
         self.api_key = api_key
         genai.configure(api_key=api_key)
+        self.reference_preprocessor = ReferencePreprocessor(max_edge=reference_max_edge)
 
         # Text model for reasoning
         self.text_model = genai.GenerativeModel("gemini-2.0-flash-exp")
@@ -65,36 +69,47 @@ class GeminiService:
         import json
         return json.loads(text)
 
-    async def analyze_reference_image(self, image_data: bytes) -> dict:
+    async def analyze_reference_image(self, image_data: bytes, mode: str = "hybrid") -> dict:
         """
         Analyze a reference image to extract style information.
 
+        Palette, lighting, texture and composition are measured locally; the
+        vision model only writes the mood and style description.
+
         Args:
             image_data: Raw image bytes
+            mode: "hybrid", or "local" to skip the model (batch jobs)
 
         Returns:
             Style information extracted from the image
         """
-        prompt = """
-        Analyze this reference image and extract its visual style for use in generating similar marketing content.
+        from ..mcp.style_analysis import extract_style, describe_locally
+
+        # Sniff, downscale and strip the upload (CPU-bound, cached by content hash)
+        prepared = await asyncio.to_thread(self.reference_preprocessor.prepare, image_data)
+        style = await asyncio.to_thread(extract_style, prepared.data)
+        local = {**style, **describe_locally(style)}
+
+        if mode == "local":
+            return {**local, "analysis": "local"}
+
+        prompt = f"""
+        Describe the visual style of this reference image for use in generating similar marketing content.
+        Measured already: lighting is {style['lighting']}; composition is {style['composition']}.
 
         Return a JSON object with:
-        {
-            "color_palette": ["list of dominant colors as hex codes or names"],
-            "lighting": "description of lighting (e.g., warm golden, cool blue, soft natural)",
-            "composition": "composition style (e.g., centered, rule of thirds, close-up)",
+        {{
             "mood": "overall mood/atmosphere",
-            "texture": "texture quality (e.g., clean, grungy, glossy)",
             "style_description": "2-3 sentence description of the visual style"
-        }
+        }}
 
         Return ONLY valid JSON, no markdown or explanation.
         """
 
         # Create image part for multimodal input
         image_part = {
-            "mime_type": "image/jpeg",
-            "data": base64.b64encode(image_data).decode("utf-8")
+            "mime_type": prepared.mime_type,
+            "data": prepared.data
         }
 
         response = await self.vision_model.generate_content_async([prompt, image_part])
@@ -108,7 +123,7 @@ class GeminiService:
             text = text.strip()
 
         import json
-        return json.loads(text)
+        return {**local, **json.loads(text), "analysis": "hybrid"}
 
     async def generate_image_prompt(
         self,
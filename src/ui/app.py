@@ -7,7 +7,7 @@ import streamlit as st
 import requests
 import base64
 from io import BytesIO
-from PIL import Image
+from PIL import Image, ImageOps
 import json
 
 # Configuration
@@ -68,11 +68,71 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Cache lifetimes (seconds) for API lookups; Streamlit reruns the script on every widget change
+STATUS_TTL = 15
+CLIENTS_TTL = 300
+PLATFORMS_TTL = 3600
+BRAND_TTL = 300
+
+# References larger than this (longest side, px) are downscaled before upload;
+# matches the API's REFERENCE_MAX_EDGE default, which the vision model is sent
+REFERENCE_MAX_SIDE = 1024
+
+# Re-encode settings per source format when a reference has to be downscaled
+REFERENCE_SAVE_OPTIONS = {
+    "JPEG": {"quality": 90, "optimize": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 90},
+}
+
+# Formats re-encoded as another one (most phone cameras write MPO: JPEG plus
+# extra frames the model does not need)
+REFERENCE_FORMAT_ALIASES = {"MPO": "JPEG"}
+
+
+@st.cache_resource
+def get_session():
+    """Shared keep-alive HTTP session for all API calls (one per UI process)."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_json(path, timeout):
+    """GET an API path and return its JSON body; raises on any failure."""
+    response = get_session().get(f"{API_URL}{path}", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+# Failures raise out of the cached functions, so fallbacks are never cached
+
+@st.cache_data(ttl=STATUS_TTL, show_spinner=False)
+def _fetch_status():
+    return _get_json("/", timeout=5) is not None
+
+
+@st.cache_data(ttl=CLIENTS_TTL, show_spinner=False)
+def _fetch_clients():
+    return _get_json("/api/clients", timeout=10)
+
+
+@st.cache_data(ttl=PLATFORMS_TTL, show_spinner=False)
+def _fetch_platforms():
+    return _get_json("/api/platforms", timeout=10)
+
+
+@st.cache_data(ttl=BRAND_TTL, show_spinner=False)
+def _fetch_brand(client_id):
+    return _get_json(f"/api/clients/{client_id}/brand", timeout=10)
+
+
 def get_api_status():
     """Check if the API is available."""
     try:
-        response = requests.get(f"{API_URL}/", timeout=5)
-        return response.status_code == 200
+        return _fetch_status()
     except:
         return False
 
@@ -80,10 +140,7 @@ def get_api_status():
 def get_clients():
     """Fetch list of clients from API."""
     try:
-        response = requests.get(f"{API_URL}/api/clients", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return []
+        return _fetch_clients()
     except:
         # Return mock data if API is down
         return [
@@ -96,10 +153,7 @@ def get_clients():
 def get_platforms():
     """Fetch list of platforms from API."""
     try:
-        response = requests.get(f"{API_URL}/api/platforms", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return {}
+        return _fetch_platforms()
     except:
         return {
             "instagram_post": {"width": 1080, "height": 1080, "label": "Instagram Post (1:1)"},
@@ -112,29 +166,67 @@ def get_platforms():
 def get_brand(client_id):
     """Fetch brand assets for a client."""
     try:
-        response = requests.get(f"{API_URL}/api/clients/{client_id}/brand", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return None
+        return _fetch_brand(client_id)
     except:
         return None
 
 
-def generate_asset(client_id, brief, platform, reference_image=None):
-    """Call the generate API endpoint."""
-    payload = {
+@st.cache_data(max_entries=8, show_spinner=False)
+def prepare_reference(data, mime_type):
+    """
+    Downscale a reference image for upload, keeping its original format.
+
+    Images already within REFERENCE_MAX_SIDE are passed through untouched.
+
+    Args:
+        data: Uploaded file bytes
+        mime_type: MIME type reported by the browser
+
+    Returns:
+        Tuple of (image bytes, MIME type)
+    """
+    image = Image.open(BytesIO(data))  # Only parses the header
+    image_format = REFERENCE_FORMAT_ALIASES.get(image.format, image.format)
+    if max(image.size) <= REFERENCE_MAX_SIDE or image_format not in REFERENCE_SAVE_OPTIONS:
+        return data, mime_type
+
+    # JPEG can decode straight to a reduced size, skipping most of the full-res work
+    image.draft(image.mode, (REFERENCE_MAX_SIDE, REFERENCE_MAX_SIDE))
+    image.thumbnail((REFERENCE_MAX_SIDE, REFERENCE_MAX_SIDE), Image.Resampling.LANCZOS)
+    # EXIF is dropped on re-encode, so bake in the orientation
+    image = ImageOps.exif_transpose(image)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffered = BytesIO()
+    image.save(buffered, format=image_format, **REFERENCE_SAVE_OPTIONS[image_format])
+    return buffered.getvalue(), Image.MIME[image_format]
+
+
+def generate_asset(client_id, brief, platform, reference_image=None, text_mode="model", candidates=1):
+    """
+    Call the generate API endpoint.
+
+    Args:
+        reference_image: Optional (filename, bytes, MIME type) tuple,
+            sent as a multipart file upload
+        text_mode: "model" (copy drawn by the model) or "local" (rendered by the API)
+        candidates: Number of images to generate; the API returns the best-scoring one
+    """
+    form = {
         "client_id": client_id,
         "brief": brief,
-        "platform": platform
+        "platform": platform,
+        "text_mode": text_mode,
+        "candidates": candidates
     }
-
-    if reference_image:
-        payload["reference_image_base64"] = reference_image
+    files = {"reference_image": reference_image} if reference_image else None
 
     try:
-        response = requests.post(
-            f"{API_URL}/api/generate",
-            json=payload,
+        response = get_session().post(
+            f"{API_URL}/api/generate/upload",
+            data=form,
+            files=files,
             timeout=120  # 2 minutes timeout for generation
         )
         return response.json()
@@ -160,6 +252,9 @@ def main():
     with st.sidebar:
         st.header("📋 Configuration")
 
+        if st.button("🔄 Refresh data", help="Reload clients, brands and platforms from the API"):
+            st.cache_data.clear()
+
         # Client Selection
         clients = get_clients()
         client_options = {c["name"]: c["id"] for c in clients}
@@ -204,6 +299,20 @@ def main():
             size = platforms[selected_platform]
             st.caption(f"Size: {size['width']}x{size['height']}px")
 
+        render_text_locally = st.checkbox(
+            "Render text locally",
+            value=False,
+            help="Generate a text-free image and draw the headline and call-to-action in the brand fonts"
+        )
+
+        candidate_count = st.slider(
+            "Candidates",
+            min_value=1,
+            max_value=4,
+            value=1,
+            help="Generate several images in parallel and keep the one that scores best on brand colors, sharpness and text contrast"
+        )
+
     # Main content area
     col1, col2 = st.columns([1, 1])
 
@@ -223,7 +332,7 @@ def main():
         st.subheader("🖼️ Reference Image (Optional)")
         st.caption("Upload an image with the style/aesthetic you want to match")
 
-        reference_image_base64 = None
+        reference_upload = None
         uploaded_file = st.file_uploader(
             "Upload reference image",
             type=["jpg", "jpeg", "png"],
@@ -231,14 +340,11 @@ def main():
         )
 
         if uploaded_file:
-            # Display uploaded image
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Reference Image", use_container_width=True)
+            reference_bytes, reference_mime = prepare_reference(uploaded_file.getvalue(), uploaded_file.type)
+            reference_upload = (uploaded_file.name, reference_bytes, reference_mime)
 
-            # Convert to base64
-            buffered = BytesIO()
-            image.save(buffered, format="PNG")
-            reference_image_base64 = base64.b64encode(buffered.getvalue()).decode()
+            # Display uploaded image
+            st.image(reference_bytes, caption="Reference Image", use_container_width=True)
 
         # Generate button
         st.markdown("---")
@@ -262,7 +368,9 @@ def main():
                     client_id=selected_client_id,
                     brief=brief,
                     platform=selected_platform,
-                    reference_image=reference_image_base64
+                    reference_image=reference_upload,
+                    text_mode="local" if render_text_locally else "model",
+                    candidates=candidate_count
                 )
 
                 # Clear progress
@@ -286,6 +394,19 @@ def main():
                             mime="image/png"
                         )
 
+                    # Show the other ranked candidates
+                    if result.get("candidates") and len(result["candidates"]) > 1:
+                        with st.expander("🏅 Ranked Candidates"):
+                            columns = st.columns(len(result["candidates"]))
+                            for rank, (column, candidate) in enumerate(zip(columns, result["candidates"]), start=1):
+                                with column:
+                                    st.image(
+                                        base64.b64decode(candidate["image_base64"]),
+                                        caption=f"#{rank} · score {candidate['score']:.2f}",
+                                        use_container_width=True
+                                    )
+                                    st.json(candidate.get("metrics", {}), expanded=False)
+
                     # Show details
                     with st.expander("📋 Generation Details"):
                         if result.get("brief_data"):
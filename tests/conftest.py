@@ -0,0 +1,14 @@
+"""
+Shared test setup.
+
+The API imports the MCP servers as top-level modules (src/ on sys.path),
+while the agent and services are imported as the `src` package; make both
+importable.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
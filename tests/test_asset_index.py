@@ -0,0 +1,87 @@
+"""Tests for image fingerprints and similarity search over generated assets."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from mcp.asset_index import AssetIndex, image_fingerprint
+
+
+def _png(pixels: np.ndarray, fmt: str = "PNG") -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _gradient(width=160, height=120, reverse=False) -> np.ndarray:
+    ramp = np.linspace(0, 255, width)[::-1 if reverse else 1]
+    pixels = np.zeros((height, width, 3))
+    pixels[..., 0] = ramp
+    pixels[..., 2] = np.linspace(0, 255, height)[:, None]
+    return pixels
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & (2 ** 64 - 1)).count("1")
+
+
+@pytest.fixture
+def index():
+    index = AssetIndex(":memory:")
+    index.add("burgers", "client", _png(_gradient()), platform="instagram_post",
+              theme="Christmas", brief="Christmas promo for fusion burgers, festive")
+    index.add("tacos", "client", _png(_gradient(reverse=True)), platform="facebook_post",
+              theme="Summer", brief="Summer promo for fish tacos, bright")
+    index.add("other", "other-client", _png(_gradient()), brief="Christmas promo for fusion burgers, festive")
+    return index
+
+
+def test_fingerprint_survives_resizing_and_reencoding():
+    original = image_fingerprint(_png(_gradient()))
+    resized = Image.fromarray(_gradient().astype(np.uint8)).resize((80, 60))
+    jpeg = image_fingerprint(_png(np.asarray(resized), fmt="JPEG"))
+
+    assert (original["width"], original["height"]) == (160, 120)
+    assert (jpeg["width"], jpeg["height"]) == (80, 60)
+    assert _hamming(original["dhash"], jpeg["dhash"]) <= 4
+    assert original["histogram"].sum() == pytest.approx(1.0)
+    assert np.minimum(original["histogram"], jpeg["histogram"]).sum() > 0.8
+
+
+def test_fingerprint_tells_different_images_apart():
+    left, right = image_fingerprint(_png(_gradient())), image_fingerprint(_png(_gradient(reverse=True)))
+    assert _hamming(left["dhash"], right["dhash"]) > 32
+
+
+def test_text_search_ranks_the_same_brief_first(index):
+    results = index.search("client", text="Christmas promo for fusion burgers, festive")
+    assert [r["asset_id"] for r in results] == ["burgers", "tacos"]
+    assert results[0]["similarity"]["text"] > 0.9
+
+
+def test_near_miss_brief_is_not_a_text_match(index):
+    results = index.search("client", text="Christmas promo for fusion tacos, festive")
+    assert results[0]["asset_id"] == "burgers"
+    assert results[0]["similarity"]["text"] < 0.7
+
+
+def test_image_search_platform_filter_and_clients(index):
+    results = index.search("client", image_data=_png(_gradient()), platform="facebook_post", min_score=0.1)
+    assert [r["asset_id"] for r in results] == ["tacos"]
+    assert index.search("missing", text="Christmas") == []
+    assert [r["asset_id"] for r in index.search("other-client", image_data=_png(_gradient()))] == ["other"]
+
+
+@pytest.mark.parametrize("k, expected", [(0, 0), (-1, 0), (1, 1), (10, 2)])
+def test_search_k(index, k, expected):
+    assert len(index.search("client", text="Christmas burgers", k=k)) == expected
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    path = str(tmp_path / "assets.sqlite3")
+    AssetIndex(path).add("burgers", "client", _png(_gradient()), brief="Christmas promo for fusion burgers")
+
+    reloaded = AssetIndex(path)
+    assert "burgers" in reloaded
+    assert reloaded.search("client", text="Christmas promo for fusion burgers")[0]["similarity"]["text"] > 0.9
@@ -0,0 +1,73 @@
+"""Tests for the disk blob cache and the Drive downloads served from it."""
+import pytest
+
+from mcp.blob_cache import DiskBlobCache
+from mcp.drive_server import DriveMCPServer
+from mcp.fake_drive import FakeDriveService
+from src.services import drive_service
+from src.services.drive_service import DriveService
+
+
+class _CountingFiles:
+    """Wraps the fake's files() resource and counts metadata calls."""
+
+    def __init__(self, fake, calls):
+        self._files = fake.files()
+        self._calls = calls
+
+    def get(self, **kwargs):
+        self._calls.append(kwargs["fileId"])
+        return self._files.get(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._files, name)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskBlobCache(str(tmp_path / "blobs"))
+
+
+@pytest.fixture
+def fake():
+    fake = FakeDriveService.seeded()
+    fake.image_id = fake.add_file(fake.root_id, "ref.png", b"\x89PNG-ref", "image/png")["id"]
+    return fake
+
+
+def test_get_returns_bytes_and_misses_unknown_keys(cache):
+    key = DiskBlobCache.make_key("file", "v1")
+    assert cache.get(key) is None
+    cache.put(key, b"blob")
+    assert cache.get(key) == b"blob"
+    assert type(cache.get(key)) is bytes
+
+
+async def test_download_reference_returns_bytes_and_follows_new_versions(fake, cache):
+    drive = DriveMCPServer(
+        service=fake, root_folder_id=fake.root_id, mock_mode=False,
+        mirror_db_path=None, blob_cache=cache, asset_index_path=None
+    )
+    assert await drive.download_reference(fake.image_id) == b"\x89PNG-ref"
+    cached = await drive.download_reference(fake.image_id)
+    assert type(cached) is bytes and cached == b"\x89PNG-ref"
+
+    fake.update_content(fake.image_id, b"\x89PNG-new")
+    assert await drive.download_reference(fake.image_id) == b"\x89PNG-new"
+
+
+async def test_drive_service_cache_hit_skips_metadata_call(fake, cache, monkeypatch):
+    monkeypatch.setattr(drive_service, "MOCK_MODE", False)
+    service = DriveService(blob_cache=cache)
+    calls = []
+    service.service = type("Service", (), {"files": lambda self: _CountingFiles(fake, calls)})()
+
+    assert await service.download_image(fake.image_id) == b"\x89PNG-ref"
+    assert await service.download_image(fake.image_id) == b"\x89PNG-ref"
+    assert calls == [fake.image_id]
+
+    # Past the TTL the version is checked again, picking up the new content
+    monkeypatch.setattr(drive_service, "VERSION_TTL", 0)
+    fake.update_content(fake.image_id, b"\x89PNG-new")
+    assert await service.download_image(fake.image_id) == b"\x89PNG-new"
+    assert len(calls) == 2
@@ -0,0 +1,75 @@
+"""Tests for compiled brand profiles and their caches."""
+import pytest
+
+from mcp.brand_profile import BrandProfile, BrandProfileCache, as_brand_profile
+
+
+RAW = {
+    "name": "Burgers & Curries",
+    "colors": ["#ff5733", "2E4053", "#abc", "#FF5733", "not-a-color"],
+    "secondary_color": "#12345",
+    "style": "bold, warm",
+}
+
+
+def test_compile_normalizes_colors_and_reports_invalid_ones():
+    profile = BrandProfile.compile("burgers", RAW)
+
+    assert profile.colors == ("#FF5733", "#2E4053", "#AABBCC")
+    assert profile.primary_color == "#FF5733"
+    assert profile.secondary_color is None
+    assert profile.colors_rgb[0] == (255, 87, 51)
+    assert len(profile.warnings) == 2
+    assert profile.prompt_fragments["colors"] == "Brand colors: #FF5733, #2E4053, #AABBCC"
+    assert profile.to_dict()["version"] == profile.version
+
+
+def test_version_follows_content():
+    profile = BrandProfile.compile("burgers", RAW)
+    assert BrandProfile.compile("burgers", dict(RAW)).version == profile.version
+    assert BrandProfile.compile("burgers", {**RAW, "style": "minimal"}).version != profile.version
+
+
+def test_profile_is_immutable():
+    profile = BrandProfile.compile("burgers", RAW)
+    with pytest.raises(AttributeError):
+        profile.name = "Other"
+    with pytest.raises(AttributeError):
+        del profile.colors
+
+    data = profile.to_dict()
+    data["colors"].append("#000000")
+    assert "#000000" not in profile.to_dict()["colors"]
+
+
+def test_cache_recompiles_only_when_the_signature_changes():
+    cache = BrandProfileCache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return RAW
+
+    first = cache.get_or_compile("burgers", "md5-a", loader)
+    assert cache.get_or_compile("burgers", "md5-a", loader) is first
+    assert cache.get_or_compile("burgers", "md5-b", loader) is not first
+    assert len(loads) == 2
+
+    cache.invalidate("burgers")
+    cache.get_or_compile("burgers", "md5-b", loader)
+    assert len(loads) == 3
+
+
+def test_as_brand_profile_reuses_versions_but_not_edited_dicts():
+    data = BrandProfile.compile("burgers", RAW).to_dict()
+    profile = as_brand_profile(data)
+    assert as_brand_profile(dict(data)) is profile
+    assert as_brand_profile(profile) is profile
+
+    # Edited after it was returned; the stale version must not win
+    edited = {**data, "colors": ["#000000"], "primary_color": "#000000"}
+    recompiled = as_brand_profile(edited)
+    assert recompiled.colors == ("#000000",)
+    assert recompiled.version != data["version"]
+    assert as_brand_profile(dict(edited)) is recompiled
+    assert as_brand_profile(recompiled.to_dict()) is recompiled
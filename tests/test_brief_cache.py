@@ -0,0 +1,78 @@
+"""Tests for the semantic brief cache."""
+import pytest
+
+from mcp.brief_cache import SemanticBriefCache
+
+
+@pytest.fixture
+def cache():
+    # Low threshold, so the guards below are what rejects the near misses
+    cache = SemanticBriefCache(threshold=0.8)
+    cache.put("client", "Christmas promo for fusion burgers, festive", {"mood": "festive"})
+    cache.put("client", "Christmas promo for fusion burgers, festive, CTA: Order Now", {"call_to_action": "Order Now"})
+    return cache
+
+
+def test_reuses_rephrased_brief(cache):
+    match = cache.get("client", "Xmas promo for fusion burgers, festive mood")
+    assert match is not None and match.brief_data == {"mood": "festive"}
+    assert cache.get("client", "xmas promo for fusion burgers, festive, cta: order now").brief_data == {
+        "call_to_action": "Order Now"
+    }
+
+
+def test_briefs_are_cached_per_client(cache):
+    assert cache.get("other-client", "Christmas promo for fusion burgers, festive") is None
+
+
+def test_different_numbers_are_not_reused():
+    cache = SemanticBriefCache()
+    cache.put("client", "Summer sale on rice bowls, 20% off", {"subheadline": "20% off"})
+    assert cache.get("client", "Summer sale on rice bowls, 30% off") is None
+    assert cache.get("client", "Summer sale on rice bowls - 20% off") is not None
+
+
+@pytest.mark.parametrize("brief", [
+    "Christmas promo for fusion burgers, not festive, somber",
+    "Christmas promo for fusion burgers, festive, no red",
+])
+def test_negated_brief_is_not_reused(cache, brief):
+    assert cache.search("client", brief)[0].similarity >= cache.threshold
+    assert cache.get("client", brief) is None
+
+
+@pytest.mark.parametrize("brief", [
+    "Christmas promo for fusion burgers, festive, CTA: Order Online",
+    "Christmas promo for fusion burgers, festive, headline: Merry Burgers",
+    "Christmas promo for fusion burgers, festive, offer: free fries",
+])
+def test_different_explicit_fields_are_not_reused(cache, brief):
+    assert cache.search("client", brief)[0].similarity >= cache.threshold
+    assert cache.get("client", brief) is None
+
+
+CACHED = "Christmas promotion for fusion burgers with a festive mood and family gathering scene"
+
+
+@pytest.mark.parametrize("brief", [
+    "Christmas promotion for fusion tacos with a festive mood and family gathering scene",
+    "Easter promotion for fusion burgers with a festive mood and family gathering scene",
+    "Christmas promotion for fusion burgers with a somber mood and family gathering scene",
+])
+def test_different_occasion_product_or_mood_is_not_reused(brief):
+    cache = SemanticBriefCache(threshold=0.8)
+    cache.put("client", CACHED, {"theme": "Christmas"})
+    assert cache.search("client", brief)[0].similarity >= 0.8
+    assert cache.get("client", brief) is None
+
+
+def test_different_product_is_not_reused():
+    cache = SemanticBriefCache(threshold=0.0)
+    cache.put("client", "Summer promotion for iced coffee", {"key_elements": ["iced coffee"]})
+    assert cache.get("client", "Summer promotion for iced tea") is None
+
+
+def test_filler_words_do_not_prevent_reuse():
+    cache = SemanticBriefCache()
+    cache.put("client", CACHED, {"theme": "Christmas"})
+    assert cache.get("client", "Xmas Instagram post for fusion burgers - festive, family gathering") is not None
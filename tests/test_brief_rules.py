@@ -0,0 +1,77 @@
+"""Tests for local extraction of templated and key-value briefs."""
+import pytest
+
+from mcp.brief_rules import DEFAULT_MIN_CONFIDENCE, extract_brief
+
+
+def _uses_rules(brief):
+    extraction = extract_brief(brief)
+    return extraction is not None and extraction.confidence >= DEFAULT_MIN_CONFIDENCE
+
+
+def test_one_line_template():
+    extraction = extract_brief("Xmas promo for fusion burgers, festive, warm, CTA: Order Now")
+    assert extraction.format == "template"
+    assert extraction.confidence >= DEFAULT_MIN_CONFIDENCE
+    data = extraction.brief_data
+    assert data["theme"] == "Christmas"
+    assert data["key_elements"] == ["fusion burgers"]
+    assert data["mood"] == "festive, warm"
+    assert data["call_to_action"] == "Order Now"
+    assert data["colors_suggested"] == ["red", "green", "gold"]
+
+
+def test_key_value_brief():
+    extraction = extract_brief("theme: Summer\nproducts: [iced tea, mango lassi]\nmood: fresh\ncta: Visit Us")
+    assert extraction.format == "key_value"
+    assert extraction.brief_data["key_elements"] == ["iced tea", "mango lassi"]
+    assert extraction.brief_data["call_to_action"] == "Visit Us"
+    assert extraction.confidence >= DEFAULT_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("brief, theme", [
+    ("christmas promo for burgers, festive", "Christmas"),
+    ("Back to School deal on lunch boxes, fun", "Back To School"),
+    ("Lunar New Year special for dumplings, lucky", "Lunar New Year"),
+])
+def test_occasion_themes(brief, theme):
+    extraction = extract_brief(brief)
+    assert extraction.brief_data["theme"] == theme
+    assert extraction.confidence >= DEFAULT_MIN_CONFIDENCE
+
+
+def test_offer_becomes_subheadline():
+    extraction = extract_brief("Black Friday sale on rice bowls, 20% off, urgent, CTA: Shop Now")
+    assert extraction.brief_data["theme"] == "Black Friday"
+    assert extraction.brief_data["subheadline"] == "20% off"
+
+
+@pytest.mark.parametrize("brief", [
+    "Create a promo for our new spicy chicken burger, bold, CTA: Order Now",
+    "We need a launch campaign for the new menu, fun, CTA: Visit us",
+    "Make a campaign for burgers",
+    "Please design a special for our curry lovers, warm",
+    "I want a sale on all rice bowls this week, urgent",
+    "We need a Christmas promo for burgers, festive",
+])
+def test_prose_briefs_fall_back_to_the_model(brief):
+    assert not _uses_rules(brief)
+
+
+def test_unrecognized_theme_lowers_confidence():
+    known = extract_brief("Summer special for smash burgers, bold, CTA: Order Now")
+    unknown = extract_brief("Burger Week special for smash burgers, bold, CTA: Order Now")
+    assert unknown.brief_data["theme"] == "Burger Week"
+    assert unknown.confidence < known.confidence
+    assert unknown.confidence < DEFAULT_MIN_CONFIDENCE
+
+
+def test_negated_segment_is_not_a_mood():
+    extraction = extract_brief("Christmas promo for burgers, festive, not spicy, CTA: Order Now")
+    assert extraction.brief_data["mood"] == "festive"
+    assert all("spicy" not in keyword for keyword in extraction.brief_data["style_keywords"])
+    assert extraction.confidence < DEFAULT_MIN_CONFIDENCE
+
+
+def test_negation_in_key_value_brief_falls_back_to_the_model():
+    assert not _uses_rules("theme: Summer\nproducts: [iced tea]\nmood: fresh, no sugar\ncta: Visit Us")
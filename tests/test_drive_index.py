@@ -0,0 +1,106 @@
+"""Tests for the Drive folder index and the folder retry in save_image."""
+import pytest
+
+from mcp import drive_index
+from mcp.blob_cache import DiskBlobCache
+from mcp.drive_index import DriveFolderIndex
+from mcp.drive_server import DriveMCPServer
+from mcp.fake_drive import FakeDriveService
+
+
+class _Clock:
+    """Stand-in for time.monotonic() that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake():
+    return FakeDriveService.seeded()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(drive_index.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def drive(fake, tmp_path):
+    return DriveMCPServer(
+        service=fake, root_folder_id=fake.root_id, mock_mode=False,
+        mirror_db_path=None, blob_cache=DiskBlobCache(str(tmp_path / "blobs")), asset_index_path=None
+    )
+
+
+def _count_lookups(index, monkeypatch):
+    lookups = []
+    find = index._find_child_folder
+
+    def counting(parent_id, name):
+        lookups.append(name)
+        return find(parent_id, name)
+
+    monkeypatch.setattr(index, "_find_child_folder", counting)
+    return lookups
+
+
+def test_warm_index_resolves_without_lookups_until_ttl_expires(fake, clock, monkeypatch):
+    index = DriveFolderIndex(fake, fake.root_id, ttl_seconds=60)
+    lookups = _count_lookups(index, monkeypatch)
+
+    folder_id = index.resolve("clients/burgers-and-curries/brand-assets")
+    assert lookups == ["clients", "burgers-and-curries", "brand-assets"]
+    assert index.resolve("clients/burgers-and-curries/brand-assets") == folder_id
+    assert len(lookups) == 3
+
+    # A sibling only walks the segments below the deepest cached ancestor
+    index.resolve("clients/burgers-and-curries/past-campaigns")
+    assert lookups[3:] == ["past-campaigns"]
+
+    clock.now += 61
+    assert index.resolve("clients/burgers-and-curries/brand-assets") == folder_id
+    assert lookups[4:] == ["clients", "burgers-and-curries", "brand-assets"]
+
+
+def test_resolve_creates_missing_folders_once(fake, clock):
+    index = DriveFolderIndex(fake, fake.root_id)
+    assert index.resolve("clients/new-client/generated") is None
+
+    created = index.resolve("clients/new-client/generated", create=True)
+    index.invalidate()
+    assert index.resolve("clients/new-client/generated", create=True) == created
+    assert len(fake.query("name = 'new-client'")) == 1
+
+
+async def test_save_image_re_resolves_a_deleted_folder_once(fake, drive):
+    first = await drive.save_image("burgers-and-curries", "launch", "instagram", b"png-1", "one.png")
+    stale_id = fake.metadata(first["file_id"])["parents"][0]
+
+    # The cached folder is deleted behind the index's back
+    fake.delete(stale_id)
+    second = await drive.save_image("burgers-and-curries", "launch", "instagram", b"png-2", "two.png")
+
+    parent_id = fake.metadata(second["file_id"])["parents"][0]
+    assert parent_id != stale_id
+    assert fake.content(second["file_id"]) == b"png-2"
+    assert drive.folder_index.resolve("clients/burgers-and-curries/generated/launch/instagram") == parent_id
+
+
+async def test_save_image_does_not_retry_other_errors(fake, drive, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(drive.folder_index, "invalidate", invalidated.append)
+
+    def timeout(*args, **kwargs):
+        raise TimeoutError("upload timed out")
+
+    monkeypatch.setattr(fake, "add_file", timeout)
+
+    with pytest.raises(Exception, match="upload timed out"):
+        await drive.save_image("burgers-and-curries", "launch", "instagram", b"png", "one.png")
+    assert invalidated == []
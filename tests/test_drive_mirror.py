@@ -0,0 +1,162 @@
+"""Tests for the Drive metadata mirror's full and incremental sync."""
+import json
+import threading
+import time
+
+import pytest
+
+from mcp.drive_mirror import DriveMetadataMirror
+from mcp.fake_drive import FakeDriveService
+
+
+# A folder outside the mirrored root (e.g. someone's My Drive)
+OUTSIDE = "outside-root"
+
+
+@pytest.fixture
+def fake():
+    return FakeDriveService.seeded()
+
+
+@pytest.fixture
+def mirror(fake):
+    mirror = DriveMetadataMirror(fake, fake.root_id, db_path=":memory:")
+    mirror.sync()
+    return mirror
+
+
+def _client_folder(fake, name):
+    clients_id = fake.query(f"'{fake.root_id}' in parents and name = 'clients'")[0]["id"]
+    return fake.query(f"'{clients_id}' in parents and name = '{name}'")[0]["id"], clients_id
+
+
+def test_full_sync_mirrors_clients_brands_and_campaigns(mirror):
+    assert [c["id"] for c in mirror.list_clients()] == ["burgers-and-curries", "tech-startup-xyz"]
+    assert mirror.get_brand_assets("burgers-and-curries")["primary_color"] == "#FF5733"
+    campaigns = mirror.get_past_campaigns("tech-startup-xyz")
+    assert [c["name"] for c in campaigns] == ["summer-2024"]
+    assert [i["name"] for i in campaigns[0]["images"]] == ["summer-01.png"]
+
+
+def test_incremental_sync_applies_content_changes_renames_and_deletes(fake, mirror):
+    client_id, _ = _client_folder(fake, "burgers-and-curries")
+    brand_id = fake.query(f"'{client_id}' in parents and name = 'brand-assets'")[0]["id"]
+    colors_id = fake.query(f"'{brand_id}' in parents and name = 'colors.json'")[0]["id"]
+    before = mirror.brand_signature("burgers-and-curries")
+
+    fake.update_content(colors_id, json.dumps({"primary_color": "#000000"}).encode())
+    tech_id, _ = _client_folder(fake, "tech-startup-xyz")
+    fake.rename(tech_id, "tech-startup-abc")
+    mirror.sync()
+
+    assert mirror.get_brand_assets("burgers-and-curries")["primary_color"] == "#000000"
+    assert mirror.brand_signature("burgers-and-curries") != before
+    assert [c["id"] for c in mirror.list_clients()] == ["burgers-and-curries", "tech-startup-abc"]
+    # The renamed client's subtree is still mirrored
+    assert mirror.get_past_campaigns("tech-startup-abc")[0]["name"] == "summer-2024"
+
+    fake.delete(tech_id)
+    mirror.sync()
+    assert [c["id"] for c in mirror.list_clients()] == ["burgers-and-curries"]
+    assert mirror.get_past_campaigns("tech-startup-abc") == []
+
+
+def test_folder_moved_into_tree_is_crawled(fake, mirror):
+    # Built outside the mirrored tree, so the feed has no entries for its
+    # descendants once it is moved in
+    staging = fake.add_folder(OUTSIDE, "new-client")
+    campaigns = fake.add_folder(fake.add_folder(staging, "past-campaigns"), "launch")
+    fake.add_file(campaigns, "hero.png", b"png", "image/png")
+    mirror.sync()
+    assert "new-client" not in [c["id"] for c in mirror.list_clients()]
+
+    _, clients_id = _client_folder(fake, "burgers-and-curries")
+    fake.move(staging, clients_id)
+    mirror.sync()
+
+    assert "new-client" in [c["id"] for c in mirror.list_clients()]
+    campaigns = mirror.get_past_campaigns("new-client")
+    assert [i["name"] for i in campaigns[0]["images"]] == ["hero.png"]
+
+
+def test_child_listed_before_its_parents_later_change_is_kept(fake, mirror):
+    _, clients_id = _client_folder(fake, "burgers-and-curries")
+    # The folder is created outside the tree, gets a child, and is then moved
+    # in: the feed lists the child first, the folder (latest change) after it
+    folder = fake.add_folder(OUTSIDE, "pending-client")
+    campaigns = fake.add_folder(folder, "past-campaigns")
+    fake.move(folder, clients_id)
+    # A later change to the child moves it after the folder; a later change
+    # to the folder moves the folder after the child again
+    fake.rename(campaigns, "past-campaigns")
+    fake.rename(folder, "late-client")
+    mirror.sync()
+
+    assert "late-client" in [c["id"] for c in mirror.list_clients()]
+    assert mirror.get_past_campaigns("late-client") == []
+    assert mirror._client_folder("late-client", "past-campaigns") == campaigns
+
+
+def test_file_moved_out_of_tree_is_removed(fake, mirror):
+    tech_id, _ = _client_folder(fake, "tech-startup-xyz")
+    fake.move(tech_id, OUTSIDE)
+    mirror.sync()
+    assert [c["id"] for c in mirror.list_clients()] == ["burgers-and-curries"]
+    assert mirror.file_version(tech_id) is None
+
+
+def test_failed_sync_rolls_back(fake, mirror, monkeypatch):
+    clients_before = mirror.list_clients()
+
+    def broken_list(*args, **kwargs):
+        raise RuntimeError("network down")
+
+    monkeypatch.setattr(type(fake.files()), "list", broken_list)
+    with pytest.raises(RuntimeError):
+        mirror.sync(force_full=True)
+
+    # The DELETE of the aborted re-crawl is not visible, and not committed later
+    assert mirror.list_clients() == clients_before
+    monkeypatch.undo()
+    mirror.sync()
+    assert mirror.list_clients() == clients_before
+
+
+def test_crawl_follows_list_pagination():
+    fake = FakeDriveService.seeded()
+    fake.max_page_size = 2
+    client_id, _ = _client_folder(fake, "burgers-and-curries")
+    campaigns_id = fake.query(f"'{client_id}' in parents and name = 'past-campaigns'")[0]["id"]
+    for i in range(4):
+        fake.add_folder(campaigns_id, f"campaign-{i}")
+
+    mirror = DriveMetadataMirror(fake, fake.root_id, db_path=":memory:")
+    mirror.sync()
+
+    names = [c["name"] for c in mirror.get_past_campaigns("burgers-and-curries")]
+    assert names == ["campaign-0", "campaign-1", "campaign-2", "campaign-3", "summer-2024"]
+
+
+def test_reads_are_not_blocked_by_a_sync_waiting_on_drive(fake, mirror, monkeypatch):
+    clients = mirror.list_clients()
+    in_drive_call = threading.Event()
+    release = threading.Event()
+    original_list = type(fake.files()).list
+
+    def slow_list(self, *args, **kwargs):
+        in_drive_call.set()
+        release.wait(5)
+        return original_list(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(fake.files()), "list", slow_list)
+    worker = threading.Thread(target=mirror.sync, kwargs={"force_full": True})
+    worker.start()
+    try:
+        assert in_drive_call.wait(5)
+        started = time.perf_counter()
+        assert mirror.list_clients() == clients
+        assert time.perf_counter() - started < 0.5
+    finally:
+        release.set()
+        worker.join(5)
+    assert mirror.list_clients() == clients
@@ -0,0 +1,103 @@
+"""Tests for model tier routing and the escalation of unusable responses."""
+import pytest
+
+from mcp import model_router
+from mcp.media_server import MediaMCPServer
+from mcp.model_router import EWMA_ALPHA, ModelRouter, brief_complexity
+
+
+TIERS = ("small", "large")
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Stream:
+    def __init__(self, text):
+        self._chunks = [_Chunk(text[i:i + 7]) for i in range(0, len(text), 7)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class _Model:
+    """GenerativeModel stand-in that streams a fixed response."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    async def generate_content_async(self, contents, stream=False):
+        self.calls += 1
+        return _Stream(self.text)
+
+
+def test_short_briefs_score_lower_than_detailed_ones():
+    short = brief_complexity("Xmas promo for burgers, festive")
+    detailed = brief_complexity(
+        "Create a Christmas campaign for our fusion burgers and rice bowls. It must include the "
+        "20% off offer and the 2-for-1 deal, but avoid red; only use the brand palette. "
+        "Show a family gathering, not a party. Also add the new store address and opening hours."
+    )
+    assert 0 <= short < 0.2 < detailed <= 1
+
+
+@pytest.mark.parametrize("complexity, tier", [(0.0, 0), (0.49, 0), (0.5, 1), (1.0, 1), (1.7, 1), (-1.0, 0)])
+def test_complexity_maps_evenly_onto_tiers(complexity, tier):
+    assert ModelRouter(TIERS).route("brief", complexity) == tier
+
+
+def test_record_keeps_moving_averages():
+    router = ModelRouter(TIERS)
+    router.record("brief", 0, latency=1.0, parsed=True)
+    router.record("brief", 0, latency=2.0, parsed=False)
+
+    stats = router.stats()[0]
+    assert stats["calls"] == 2 and stats["failures"] == 1
+    assert stats["latency"] == pytest.approx(EWMA_ALPHA * 2.0 + (1 - EWMA_ALPHA) * 1.0)
+    assert stats["failure_rate"] == pytest.approx(EWMA_ALPHA)
+
+
+def test_unreliable_tier_is_skipped_but_probed(monkeypatch):
+    monkeypatch.setattr(model_router, "PROBE_EVERY", 3)
+    router = ModelRouter(TIERS, min_samples=2)
+    for _ in range(2):
+        router.record("brief", 0, latency=0.1, parsed=False)
+
+    assert [router.route("brief", 0.0) for _ in range(3)] == [1, 1, 0]
+    # Other stages are unaffected
+    assert router.route("reference", 0.0) == 0
+
+
+def test_slow_tier_falls_back_to_a_smaller_one_within_budget():
+    router = ModelRouter(TIERS)
+    router.record("brief", 1, latency=5.0, parsed=True)
+    assert router.route("brief", 1.0, latency_budget=10.0) == 1
+    assert router.route("brief", 1.0, latency_budget=2.0) == 0
+
+
+async def test_unusable_json_is_retried_on_the_next_tier():
+    server = MediaMCPServer(api_key="test", model_tiers=list(TIERS))
+    small, large = _Model("Sure! Here is the brief"), _Model('{"theme": "Christmas", "mood": "festive"}')
+    server.tier_models = [small, large]
+
+    result = await server._routed_json("brief", 0.0, "prompt", None, required=("theme",))
+
+    assert result == {"theme": "Christmas", "mood": "festive"}
+    assert (small.calls, large.calls) == (1, 1)
+    stats = {s["model"]: s for s in server.router.stats()}
+    assert stats["small"]["failures"] == 1 and stats["large"]["failures"] == 0
+
+
+async def test_missing_required_field_on_the_largest_tier_raises():
+    server = MediaMCPServer(api_key="test", model_tiers=list(TIERS))
+    server.tier_models = [_Model('{"mood": "festive"}'), _Model('{"mood": "festive"}')]
+
+    with pytest.raises(ValueError, match="missing theme"):
+        await server._routed_json("brief", 0.0, "prompt", None, required=("theme",))
@@ -0,0 +1,102 @@
+"""Tests for the generated-image quality gate and the gated generation loop."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from mcp.image_quality import quality_gate, retry_prompt
+from mcp.media_server import MediaMCPServer
+
+
+BRAND = {"name": "Test Brand", "colors": ["#FF5733", "#2E4053"]}
+
+
+def _png(pixels: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _on_brand(width=200, height=100) -> bytes:
+    """Noisy image built from the brand colors."""
+    rng = np.random.default_rng(0)
+    palette = np.array([[0xFF, 0x57, 0x33], [0x2E, 0x40, 0x53]])
+    pixels = palette[rng.integers(0, 2, (height, width))]
+    return _png(np.clip(pixels + rng.integers(-10, 10, pixels.shape), 0, 255))
+
+
+def _flat(width=200, height=100, color=(128, 128, 128)) -> bytes:
+    return _png(np.full((height, width, 3), color))
+
+
+def _off_brand(width=200, height=100) -> bytes:
+    """Noisy green image, far from the brand palette."""
+    rng = np.random.default_rng(1)
+    pixels = np.zeros((height, width, 3))
+    pixels[..., 1] = rng.integers(100, 255, (height, width))
+    return _png(pixels)
+
+
+def test_on_brand_image_passes():
+    gate = quality_gate(_on_brand(), 200, 100, BRAND, source_size=(200, 100))
+    assert gate["passed"] and gate["failures"] == []
+
+
+@pytest.mark.parametrize("image, kwargs, failure", [
+    (_flat(), {}, "blank"),
+    (_off_brand(), {}, "brand_coverage"),
+    (_on_brand(150, 100), {}, "resolution"),
+    (_on_brand(), {"source_size": (80, 40)}, "resolution"),
+    (_on_brand(), {"placeholder": True}, "placeholder"),
+])
+def test_failed_checks_are_named(image, kwargs, failure):
+    gate = quality_gate(image, 200, 100, BRAND, **kwargs)
+    assert not gate["passed"]
+    assert failure in gate["failures"]
+
+
+def test_brand_coverage_is_skipped_without_brand_colors():
+    gate = quality_gate(_off_brand(), 200, 100, {})
+    assert gate["passed"] and gate["brand_coverage"] is None
+
+
+def test_retry_prompt_adds_hints_for_addressable_failures():
+    prompt = retry_prompt("A burger", ["blank", "brand_coverage", "resolution"], BRAND)
+    lines = prompt.split("\n")
+    assert lines[0] == "A burger" and len(lines) == 3
+    assert "#FF5733, #2E4053" in lines[2]
+    assert retry_prompt("A burger", ["resolution"], BRAND) == "A burger"
+
+
+async def test_gated_generation_retries_with_hints_until_the_gate_passes():
+    server = MediaMCPServer(api_key="test")
+    outputs = [_flat(color=(0xFF, 0x57, 0x33)), _on_brand()]
+    prompts = []
+
+    async def generate(prompt, width, height):
+        prompts.append(prompt)
+        return outputs[len(prompts) - 1], (width, height)
+
+    server._generate_with_source = generate
+    result = await server.generate_image_gated("A burger", 200, 100, BRAND, max_retries=2)
+
+    assert result["gate"]["passed"]
+    assert result["image"] == outputs[1]
+    assert [attempt["failures"] for attempt in result["attempts"]] == [["blank"], []]
+    assert prompts[0] == "A burger" and prompts[1].startswith("A burger\n")
+
+
+async def test_gated_generation_returns_best_attempt_when_all_fail():
+    server = MediaMCPServer(api_key="test")
+    outputs = iter([_flat(150, 100), _flat()])
+
+    async def generate(prompt, width, height):
+        return next(outputs), (width, height)
+
+    server._generate_with_source = generate
+    result = await server.generate_image_gated("A burger", 200, 100, BRAND, max_retries=1)
+
+    assert not result["gate"]["passed"]
+    assert len(result["attempts"]) == 2
+    assert result["gate"]["failures"] == ["blank", "brand_coverage"]
@@ -0,0 +1,71 @@
+"""Tests for coalescing of concurrent identical tool calls."""
+import asyncio
+
+import pytest
+
+from mcp.single_flight import SingleFlight, call_key
+
+
+def test_call_key_ignores_argument_order_and_callbacks():
+    a = call_key("process_brief", {"brief": "x", "client_name": "c", "on_field": print})
+    b = call_key("process_brief", {"client_name": "c", "brief": "x"})
+    assert a == b
+    assert call_key("process_brief", {"brief": "y", "client_name": "c"}) != a
+    assert call_key("generate_image", {"brief": "x", "client_name": "c"}) != a
+
+
+def test_call_key_hashes_binary_arguments():
+    assert call_key("t", {"image_data": b"abc"}) == call_key("t", {"image_data": bytearray(b"abc")})
+    assert call_key("t", {"image_data": b"abc"}) != call_key("t", {"image_data": b"abd"})
+
+
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.02)
+        return {"tags": ["a"]}
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+
+    assert runs == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+    # Every caller gets its own copy
+    results[0]["tags"].append("b")
+    assert results[1] == {"tags": ["a"]}
+
+    # Finished calls are not cached
+    await flight.do("key", work)
+    assert runs == 2
+
+
+async def test_errors_reach_every_caller_and_release_the_key():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*[flight.do("key", fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_cancelling_one_caller_keeps_the_shared_call_running():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", work))
+    second = asyncio.ensure_future(flight.do("key", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
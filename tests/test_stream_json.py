@@ -0,0 +1,63 @@
+"""Tests for incremental parsing of streamed JSON objects."""
+import json
+
+from mcp.stream_json import IncrementalJSONParser
+
+
+DOCUMENT = (
+    '```json\n{"theme": "Christmas, \\"festive\\" {not a brace}", "path": "C:\\\\menu\\\\",'
+    ' "colors": ["red", "green"], "layout": {"grid": [[1, 2], {"x": "}"}], "empty": {}},'
+    ' "count": 3, "cta": "Order Now \\u2014 today"}\n```'
+)
+EXPECTED = json.loads(DOCUMENT[len("```json\n"):-len("\n```")])
+
+
+def _feed(chunks):
+    parser = IncrementalJSONParser()
+    emitted = [pair for chunk in chunks for pair in parser.feed(chunk)]
+    return parser, emitted
+
+
+def test_any_chunk_split_gives_the_same_members():
+    # Covers splits inside strings, right after a backslash and inside nested values
+    for split in range(1, len(DOCUMENT)):
+        parser, emitted = _feed([DOCUMENT[:split], DOCUMENT[split:]])
+        assert parser.done and not parser.failed, split
+        assert parser.fields == EXPECTED, split
+        assert [key for key, _ in emitted] == list(EXPECTED), split
+
+
+def test_single_character_chunks():
+    parser, emitted = _feed(list(DOCUMENT))
+    assert dict(emitted) == EXPECTED
+    assert emitted[2] == ("colors", ["red", "green"])
+    assert emitted[3] == ("layout", {"grid": [[1, 2], {"x": "}"}], "empty": {}})
+
+
+def test_members_are_emitted_as_soon_as_they_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"theme": "Sum') == []
+    assert parser.feed('mer", "mood": ') == [("theme", "Summer")]
+    assert parser.feed('"fresh"}') == [("mood", "fresh")]
+    # Text after the closing brace is ignored
+    assert parser.feed(', "extra": 1}') == []
+    assert parser.fields == {"theme": "Summer", "mood": "fresh"}
+
+
+def test_truncated_input_keeps_completed_members_only():
+    parser, emitted = _feed(['{"theme": "Summer", "layout": {"grid": [1, ', '2]}, "cta": "Or'])
+    assert not parser.done
+    assert emitted == [("theme", "Summer"), ("layout", {"grid": [1, 2]})]
+    assert parser.text.endswith('"cta": "Or')
+
+
+def test_malformed_member_marks_the_parse_failed():
+    parser, emitted = _feed(['{"theme": Summer, "mood": "warm"}'])
+    assert parser.done and parser.failed
+    assert emitted == [("mood", "warm")]
+
+
+def test_empty_object():
+    parser, emitted = _feed(["Here you go: {", " }"])
+    assert parser.done and not parser.failed
+    assert emitted == [] and parser.fields == {}
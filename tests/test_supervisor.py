@@ -0,0 +1,250 @@
+"""Tests for the supervisor graph: checkpoints, resume, pruning and platform fan-out."""
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+from src.agent.supervisor import MarketingAssetAgent
+from src.config import PLATFORM_SIZES
+
+
+IMAGE = os.urandom(256 * 1024)
+
+
+class StubGemini:
+    """
+    Gemini stand-in; generate_image fails while `failures` is positive, and
+    always for the sizes of `failing_platforms`.
+    """
+
+    def __init__(self, failures: int = 0, failing_platforms=()):
+        self.failures = failures
+        self.failing_sizes = [PLATFORM_SIZES[platform] for platform in failing_platforms]
+        self.brief_calls = 0
+
+    async def process_brief(self, brief, client_name):
+        self.brief_calls += 1
+        return {"theme": "Test Theme", "mood": "calm"}
+
+    async def analyze_reference_image(self, image_data, mode="hybrid"):
+        return {"analysis": mode}
+
+    async def generate_image_prompt(self, brief_data, brand_data, style_data=None, platform="instagram_post"):
+        return "prompt"
+
+    async def generate_image(self, prompt, size):
+        if size in self.failing_sizes:
+            raise RuntimeError(f"no image at {size['width']}x{size['height']}")
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("model unavailable")
+        return IMAGE
+
+
+class StubDrive:
+    """Drive stand-in that records saved platforms."""
+
+    def __init__(self):
+        self.saved = []
+
+    async def get_brand_assets(self, client_id):
+        return {"name": client_id}
+
+    async def save_generated_image(self, client_id, campaign_name, platform, image_data, filename):
+        self.saved.append(platform)
+        return f"memory://{client_id}/{platform}/{filename}"
+
+
+class FlakyDrive(StubDrive):
+    """Drive stand-in whose uploads for `failing_platforms` fail `failures` times, and brand lookups while `brand_down`."""
+
+    def __init__(self, failing_platforms=(), failures: int = 1, brand_down: bool = False):
+        super().__init__()
+        self.failing_platforms = set(failing_platforms)
+        self.failures = failures
+        self.brand_down = brand_down
+
+    async def get_brand_assets(self, client_id):
+        if self.brand_down:
+            raise RuntimeError("Drive unavailable")
+        return await super().get_brand_assets(client_id)
+
+    async def save_generated_image(self, client_id, campaign_name, platform, image_data, filename):
+        if platform in self.failing_platforms and self.failures:
+            self.failures -= 1
+            raise RuntimeError("upload failed")
+        return await super().save_generated_image(client_id, campaign_name, platform, image_data, filename)
+
+
+class SlowDrive(StubDrive):
+    """Drive stand-in whose brand lookup takes a while, tracking peak runs per client."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = {}
+        self.peak = {}
+
+    async def get_brand_assets(self, client_id):
+        self.in_flight[client_id] = self.in_flight.get(client_id, 0) + 1
+        self.peak[client_id] = max(self.peak.get(client_id, 0), self.in_flight[client_id])
+        await asyncio.sleep(0.05)
+        self.in_flight[client_id] -= 1
+        return {"name": client_id}
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite3")
+
+
+def _agent(checkpoint_path, gemini=None, drive=None, **kwargs):
+    return MarketingAssetAgent(
+        gemini or StubGemini(), drive or StubDrive(), checkpoint_path=checkpoint_path,
+        retry_budget={"image_generator": 0}, **kwargs
+    )
+
+
+def _checkpoint_bytes(path):
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT checkpoint, metadata FROM checkpoints").fetchall()
+        rows += conn.execute("SELECT value, NULL FROM writes").fetchall()
+    return [raw for row in rows for raw in row if raw]
+
+
+async def test_images_are_kept_out_of_checkpoints(checkpoint_path):
+    agent = _agent(checkpoint_path)
+    state = await agent.run("client", "brief", reference_image=IMAGE)
+    await agent.aclose()
+
+    assert state["generated_image"] == IMAGE and not state["error"]
+    raw = _checkpoint_bytes(checkpoint_path)
+    assert raw and all(IMAGE[:64] not in blob and IMAGE.hex()[:128].encode() not in blob for blob in raw)
+    assert sum(len(blob) for blob in raw) < len(IMAGE)
+
+
+async def test_resume_reexecutes_failed_node_and_reuses_upstream(checkpoint_path):
+    gemini = StubGemini(failures=1)
+    agent = _agent(checkpoint_path, gemini=gemini)
+    state = await agent.run("client", "brief", reference_image=IMAGE, run_id="run-1")
+    assert "Image generation failed" in state["error"]
+
+    resumed = await agent.resume("run-1")
+    await agent.aclose()
+
+    assert resumed["error"] is None
+    assert resumed["generated_image"] == IMAGE
+    assert resumed["saved_path"].startswith("memory://client/")
+    assert gemini.brief_calls == 1
+
+
+async def test_prune_deletes_expired_runs_and_their_blobs(checkpoint_path):
+    agent = _agent(checkpoint_path)
+    await agent.run("client", "brief", reference_image=IMAGE, run_id="old")
+    blobs = [os.path.join(root, name) for root, _, names in os.walk(f"{checkpoint_path}.blobs") for name in names]
+    assert blobs
+
+    assert await agent.prune_checkpoints(retention=3600) == 0
+    # Backdate the run and its blobs past the retention period
+    await agent._checkpointer.conn.execute("UPDATE agent_runs SET updated_at = 0")
+    await agent._checkpointer.conn.commit()
+    for blob in blobs:
+        os.utime(blob, (0, 0))
+
+    assert await agent.prune_checkpoints(retention=3600) == 1
+    with pytest.raises(KeyError):
+        await agent.resume("old")
+    await agent.aclose()
+
+    assert not _checkpoint_bytes(checkpoint_path)
+    assert not any(os.path.exists(blob) for blob in blobs)
+
+
+async def test_failed_platform_does_not_block_the_others():
+    drive = StubDrive()
+    agent = _agent(None, gemini=StubGemini(failing_platforms=["facebook_post"]), drive=drive)
+    state = await agent.run("client", "brief", platforms=["instagram_post", "facebook_post", "linkedin_post"])
+
+    assert state["error"] is None
+    assert sorted(state["saved_paths"]) == ["instagram_post", "linkedin_post"]
+    assert sorted(drive.saved) == ["instagram_post", "linkedin_post"]
+    assert list(state["platform_errors"]) == ["facebook_post"]
+    assert "Image generation failed" in state["platform_errors"]["facebook_post"]
+    assert any(message.startswith("Not saved (facebook_post)") for message in state["messages"])
+
+
+async def test_run_fails_when_every_platform_fails_and_resume_retries_them(checkpoint_path):
+    gemini = StubGemini(failing_platforms=["instagram_post", "facebook_post"])
+    agent = _agent(checkpoint_path, gemini=gemini)
+    state = await agent.run("client", "brief", platforms=["instagram_post", "facebook_post"], run_id="run-2")
+
+    assert "failed for all platforms" in state["error"]
+    assert state["saved_paths"] == {}
+
+    gemini.failing_sizes = []
+    resumed = await agent.resume("run-2")
+    await agent.aclose()
+
+    assert resumed["error"] is None
+    assert sorted(resumed["saved_paths"]) == ["facebook_post", "instagram_post"]
+    assert gemini.brief_calls == 1
+
+
+async def test_save_retry_only_uploads_the_failed_platforms():
+    drive = FlakyDrive(failing_platforms=["facebook_post"])
+    agent = _agent(None, drive=drive)
+    state = await agent.run("client", "brief", platforms=["instagram_post", "facebook_post"])
+
+    assert state["error"] is None
+    assert sorted(state["saved_paths"]) == ["facebook_post", "instagram_post"]
+    assert sorted(drive.saved) == ["facebook_post", "instagram_post"]
+    assert state["saved_path"] == state["saved_paths"]["instagram_post"]
+
+
+async def test_resume_after_failed_save_skips_saved_platforms(checkpoint_path):
+    drive = FlakyDrive(failing_platforms=["facebook_post"], failures=2)
+    agent = _agent(checkpoint_path, drive=drive)
+    state = await agent.run("client", "brief", platforms=["instagram_post", "facebook_post"], run_id="run-3")
+
+    assert "Save failed: facebook_post" in state["error"]
+    assert list(state["saved_paths"]) == ["instagram_post"]
+
+    resumed = await agent.resume("run-3")
+    await agent.aclose()
+
+    assert resumed["error"] is None
+    assert sorted(resumed["saved_paths"]) == ["facebook_post", "instagram_post"]
+    assert sorted(drive.saved) == ["facebook_post", "instagram_post"]
+
+
+async def test_regenerate_from_clears_an_error_stored_before_the_node(checkpoint_path):
+    drive = FlakyDrive(brand_down=True)
+    agent = _agent(checkpoint_path, drive=drive)
+    state = await agent.run("client", "brief", run_id="run-4")
+    assert "Brand retrieval failed" in state["error"]
+
+    # The branch join already holds brand_retriever's error
+    regenerated = await agent.regenerate_from("run-4", "prompt_builder", {"brand_data": {"name": "client"}})
+    await agent.aclose()
+
+    assert regenerated["error"] is None
+    assert regenerated["saved_path"].startswith("memory://client/")
+
+
+async def test_arun_many_lets_a_lone_client_use_every_slot():
+    drive = SlowDrive()
+    agent = _agent(None, drive=drive)
+    results = [r async for r in agent.arun_many([("solo", f"brief {i}") for i in range(16)], concurrency=8)]
+
+    assert len(results) == 16 and not any(r["error"] for r in results)
+    assert drive.peak["solo"] == 8
+
+
+async def test_arun_many_caps_clients_while_others_wait():
+    drive = SlowDrive()
+    agent = _agent(None, drive=drive)
+    jobs = [("big", f"brief {i}") for i in range(8)] + [("small", f"brief {i}") for i in range(8)]
+    results = [r async for r in agent.arun_many(jobs, concurrency=4)]
+
+    assert len(results) == 16
+    assert drive.peak == {"big": 2, "small": 2}